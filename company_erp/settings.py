@@ -4,6 +4,7 @@ Django settings for company_erp project.
 Generated by 'django-admin startproject' using Django 5.2.x.
 """
 
+import os
 from pathlib import Path
 
 # -----------------------------
@@ -31,11 +32,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',   # first, so it times the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedUserAuthenticationMiddleware',   # AuthenticationMiddleware + cached user
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -82,6 +84,72 @@ DATABASES = {
     }
 }
 
+# ERP_DATABASE=sqlite runs against the bundled db.sqlite3 (and an in-memory
+# test database), e.g. `ERP_DATABASE=sqlite python manage.py test core`.
+if os.environ.get('ERP_DATABASE') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
+
+# -----------------------------
+# CACHE
+# -----------------------------
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'company-erp',
+    },
+    # Single server running several worker processes: share entries on disk
+    'files': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    },
+}
+
+# Cache alias used for dashboard metrics (invalidated by signals, see core/signals.py)
+# and the version counters behind the list pages' ETags. Every worker must see
+# the same counters: the per-process 'default' only suits a single process
+# (runserver, tests). With several workers use 'files', or Redis/Memcached
+# across servers; `manage.py check --deploy` rejects a LocMemCache here.
+ERP_DASHBOARD_CACHE = 'default'
+ERP_DASHBOARD_CACHE_TIMEOUT = 24 * 60 * 60
+
+# -----------------------------
+# SESSIONS
+# -----------------------------
+# 'db'             one django_session query per request
+# 'cached_db'      sessions read from the cache, written through to the DB
+# 'signed_cookies' no server-side storage (session data visible to the client)
+ERP_SESSION_MODE = 'cached_db'
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[ERP_SESSION_MODE]
+
+# The logged-in user is cached this many seconds (see core/middleware.py).
+# Saving or deleting the user drops the entry, but only workers sharing the
+# cache see that: with the per-process 'default', other workers keep the old
+# copy (a deactivated user, an old role) until the timeout. Share it like
+# ERP_DASHBOARD_CACHE; `manage.py check --deploy` rejects a LocMemCache here
+# and for cached sessions.
+ERP_AUTH_USER_CACHE = 'default'
+ERP_AUTH_USER_CACHE_TIMEOUT = 60
+
+# -----------------------------
+# REQUEST PROFILING
+# -----------------------------
+# Per-route percentiles on /erp/admin/perf/ cover the last
+# ERP_PERF_WINDOWS x ERP_PERF_WINDOW_SECONDS; /erp/admin/perf/metrics/ serves
+# Prometheus text to admins or to `Authorization: Bearer <ERP_PERF_METRICS_TOKEN>`.
+ERP_PERF_WINDOW_SECONDS = 60
+ERP_PERF_WINDOWS = 5
+ERP_PERF_FLUSH = False          # write each closed window to core_requestmetric
+ERP_PERF_METRICS_TOKEN = None
 
 # -----------------------------
 # AUTH USER MODEL
@@ -120,6 +188,13 @@ LOGIN_URL = '/login/'                     # Redirect if not logged in
 LOGIN_REDIRECT_URL = '/erp/admin/dashboard/'   # Default dashboard after login
 LOGOUT_REDIRECT_URL = '/login/'
 
+# -----------------------------
+# ADMIN CHANGELISTS
+# -----------------------------
+# Tables with at least this many rows (per DB statistics) are counted from the
+# statistics instead of COUNT(*) in the Lead/Payroll/TeamReport admin.
+ERP_ESTIMATED_COUNT_THRESHOLD = 100000
+
 # -----------------------------
 # DEFAULT AUTO FIELD
 # -----------------------------
@@ -1,5 +1,13 @@
 from django.contrib import admin
-from .models import Team, TeamReport, User, Employee, Payroll
+from django.db.models import Count
+from .models import Team, TeamReport, User, Employee, Payroll, PayrollRule
+from .pagination import EstimatedCountPaginator
+
+
+class EstimatedCountAdmin(admin.ModelAdmin):
+    # Large tables: count from table statistics, skip the second full COUNT(*)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 # ------------------ USER ------------------
 @admin.register(User)
@@ -17,6 +25,7 @@ class UserAdmin(admin.ModelAdmin):
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
     list_display = ('full_name', 'employee_id', 'department', 'designation', 'basic_salary')
+    list_select_related = ('user',)
     search_fields = ('user__username', 'user__first_name', 'user__last_name', 'employee_id', 'department')
 
     def full_name(self, obj):
@@ -27,8 +36,9 @@ class EmployeeAdmin(admin.ModelAdmin):
 
 # ------------------ PAYROLL ------------------
 @admin.register(Payroll)
-class PayrollAdmin(admin.ModelAdmin):
+class PayrollAdmin(EstimatedCountAdmin):
     list_display = ('employee_full_name', 'month', 'year', 'net_salary', 'created_at')
+    list_select_related = ('employee__user',)
     list_filter = ('month', 'year')
     search_fields = ('employee__user__username', 'employee__employee_id')
 
@@ -37,27 +47,41 @@ class PayrollAdmin(admin.ModelAdmin):
     employee_full_name.short_description = 'Employee'
 
 
+@admin.register(PayrollRule)
+class PayrollRuleAdmin(admin.ModelAdmin):
+    list_display = ('department', 'designation', 'hra_rate', 'allowances_rate', 'deductions_rate', 'updated_at')
+    search_fields = ('department', 'designation')
+
+
 # ------------------ TEAM ------------------
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
-    list_display = ('name', 'head_manager', 'managers_list', 'members_list')
+    list_display = ('name', 'head_manager', 'managers_list', 'member_count')
     list_filter = ('head_manager',)
     search_fields = ('name', 'head_manager__username')
     filter_horizontal = ('managers', 'members')  # Multi-select widget
+    list_select_related = ('head_manager',)
+
+    def get_queryset(self, request):
+        # Teams have a few managers but can have thousands of members: count those in SQL
+        queryset = super().get_queryset(request).prefetch_related('managers')
+        return queryset.annotate(member_count=Count('members', distinct=True))
 
     def managers_list(self, obj):
         return ", ".join([m.username for m in obj.managers.all()])
     managers_list.short_description = 'Managers'
 
-    def members_list(self, obj):
-        return ", ".join([m.username for m in obj.members.all()])
-    members_list.short_description = 'Members'
+    def member_count(self, obj):
+        return obj.member_count
+    member_count.admin_order_field = 'member_count'
+    member_count.short_description = 'Members'
 
 
 # ------------------ TEAM REPORT ------------------
 @admin.register(TeamReport)
-class TeamReportAdmin(admin.ModelAdmin):
+class TeamReportAdmin(EstimatedCountAdmin):
     list_display = ('title', 'team_name', 'head_manager', 'created_at')
+    list_select_related = ('team__head_manager',)
     list_filter = ('team', 'created_at')
     search_fields = ('title', 'team__name', 'team__head_manager__username')
 
@@ -74,7 +98,17 @@ from django.contrib import admin
 from .models import Lead
 
 @admin.register(Lead)
-class LeadAdmin(admin.ModelAdmin):
+class LeadAdmin(EstimatedCountAdmin):
     list_display = ('name', 'company', 'assigned_to', 'status', 'priority', 'created_at')
+    list_select_related = ('assigned_to',)
     list_filter = ('status', 'priority', 'assigned_to')
     search_fields = ('name', 'email', 'phone', 'company')
+
+
+from .models import RequestMetric
+
+@admin.register(RequestMetric)
+class RequestMetricAdmin(EstimatedCountAdmin):
+    list_display = ('route', 'window_start', 'requests', 'p50_ms', 'p95_ms', 'p99_ms', 'avg_queries', 'avg_db_ms')
+    list_filter = ('route',)
+    ordering = ('-window_start',)
@@ -0,0 +1,153 @@
+import heapq
+import itertools
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from .dashboard_cache import invalidate_users
+from .models import Lead, LeadAssignmentCursor, User
+
+# -------------------------------
+# Lead Assignment Engine
+# -------------------------------
+# Spreads unassigned leads over the active sales users:
+#   round_robin  in turn, continuing where the previous run stopped (kept in
+#                the LeadAssignmentCursor row, so every worker and restart
+#                sees the same position)
+#   least_open   to whoever has the fewest open leads, from a heap seeded by
+#                one aggregate query
+#   weighted     like least_open, but a High lead counts 3, Medium 2, Low 1,
+#                and the heaviest leads are handed out first
+# Each batch is written with one bulk UPDATE; bulk updates send no signals, so
+# the affected users' dashboards are invalidated explicitly.
+MODES = ('round_robin', 'least_open', 'weighted')
+PRIORITY_WEIGHTS = {'High': 3, 'Medium': 2, 'Low': 1}
+DEFAULT_BATCH_SIZE = 500
+
+
+@dataclass
+class LeadAssignmentResult:
+    mode: str
+    assigned: Counter = field(default_factory=Counter)  # sales user id -> leads assigned
+    elapsed: float = 0.0
+
+    @property
+    def total(self):
+        return sum(self.assigned.values())
+
+
+def sales_users():
+    return User.objects.filter(role='sales', is_active=True).order_by('id')
+
+
+def _weight(priority):
+    return PRIORITY_WEIGHTS.get(priority, 1)
+
+
+def _priority_weight(prefix=''):
+    return Case(
+        *(When(**{f'{prefix}priority': priority}, then=Value(weight)) for priority, weight in PRIORITY_WEIGHTS.items()),
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+
+
+def _open_load(users, weighted):
+    """{user id: open load} for `users` in one aggregate query; closed leads carry no load."""
+    open_leads = Q(lead__status__in=Lead.OPEN_STATUSES)
+    if weighted:
+        load = Sum(_priority_weight('lead__'), filter=open_leads)
+    else:
+        load = Count('lead', filter=open_leads)
+    return {user_id: total or 0 for user_id, total in users.annotate(load=load).values_list('id', 'load')}
+
+
+class _LeastLoaded:
+    """Min-heap of (load, user id); ties go to the lower user id."""
+
+    def __init__(self, loads):
+        self.heap = [(load, user_id) for user_id, load in loads.items()]
+        heapq.heapify(self.heap)
+
+    def take(self, weight):
+        load, user_id = self.heap[0]
+        heapq.heapreplace(self.heap, (load + weight, user_id))
+        return user_id
+
+
+class _RoundRobin:
+    """
+    Cycles through the users (ascending ids), starting with the first id after
+    the one the previous run ended on. Must be built inside the run's transaction.
+    """
+
+    def __init__(self, user_ids):
+        self.cursor = LeadAssignmentCursor.lock()
+        last = self.cursor.last_user_id or 0
+        start = next((i for i, user_id in enumerate(user_ids) if user_id > last), 0)
+        self.users = itertools.cycle(user_ids[start:] + user_ids[:start])
+        self.last = None
+
+    def take(self, weight):
+        self.last = next(self.users)
+        return self.last
+
+    def save(self):
+        if self.last is not None:
+            self.cursor.last_user_id = self.last
+            self.cursor.save(update_fields=['last_user_id'])
+
+
+def _picker(mode, users):
+    if mode == 'round_robin':
+        user_ids = list(users.values_list('id', flat=True))
+        return _RoundRobin(user_ids) if user_ids else None
+    loads = _open_load(users, weighted=mode == 'weighted')
+    return _LeastLoaded(loads) if loads else None
+
+
+def assign_leads(mode='least_open', leads=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Assign every unassigned lead (or the unassigned ones among `leads`, ids or
+    a queryset) to an active sales user using `mode`. The leads are locked
+    while they are handed out, so a concurrent run cannot assign them twice.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown assignment mode {mode!r}; expected one of {MODES}.")
+    result = LeadAssignmentResult(mode=mode)
+    started = time.perf_counter()
+
+    unassigned = Lead.objects.filter(assigned_to__isnull=True)
+    if leads is not None:
+        unassigned = unassigned.filter(pk__in=leads)
+    if mode == 'weighted':
+        ordering = (_priority_weight().desc(), 'id')
+    else:
+        ordering = ('id',)
+    batches = unassigned.select_for_update().only('id', 'priority').order_by(*ordering)
+
+    with transaction.atomic():
+        picker = _picker(mode, sales_users())
+        if picker is None:
+            return result
+        now = timezone.now()
+        while True:
+            # Assigned rows drop out of `unassigned`, so every batch starts at the top.
+            batch = list(batches[:batch_size])
+            if not batch:
+                break
+            for lead in batch:
+                lead.assigned_to_id = picker.take(_weight(lead.priority))
+                lead.updated_at = now
+                result.assigned[lead.assigned_to_id] += 1
+            Lead.objects.bulk_update(batch, ['assigned_to', 'updated_at'])
+        if mode == 'round_robin':
+            picker.save()
+
+    invalidate_users(result.assigned)
+    result.elapsed = time.perf_counter() - started
+    return result
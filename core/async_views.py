@@ -0,0 +1,97 @@
+from functools import wraps
+
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseBadRequest
+from django.shortcuts import redirect, render
+
+from core.dashboards import adashboard_metrics
+from core.pagination import apaginate_keyset
+from core.reports import payrolls_for_listing, period_params
+
+from .models import Employee, Lead, TeamReport
+
+# --------------------------------
+# Async Access Decorators
+# --------------------------------
+def async_login_required(view_func):
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        # Templates read request.user; resolve it here so rendering never hits the DB synchronously.
+        request.user = user
+        return await view_func(request, *args, **kwargs)
+    return _wrapped_view
+
+
+def async_role_required(allowed_roles):
+    def decorator(view_func):
+        @wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            user = await request.auser()
+            if user.role not in allowed_roles:
+                return redirect('unauthorized')
+            return await view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
+
+# --------------------------------
+# Async Dashboards
+# --------------------------------
+@async_login_required
+@async_role_required(['head_hr'])
+async def head_hr_dashboard(request):
+    context = await adashboard_metrics(request.user)
+    return render(request, 'head_hr/dashboard.html', context)
+
+@async_login_required
+@async_role_required(['manager'])
+async def manager_dashboard(request):
+    context = await adashboard_metrics(request.user)
+    return render(request, 'manager/dashboard.html', context)
+
+@async_login_required
+@async_role_required(['head_manager'])
+async def head_manager_dashboard(request):
+    context = await adashboard_metrics(request.user)
+    return render(request, 'head_manager/dashboard.html', context)
+
+@async_login_required
+@async_role_required(['sales'])
+async def sales_dashboard(request):
+    context = await adashboard_metrics(request.user)
+    return render(request, 'sales/dashboard.html', context)
+
+# --------------------------------
+# Async List Views
+# --------------------------------
+@async_login_required
+@async_role_required(['hr', 'head_hr'])
+async def manage_employees(request):
+    page = await apaginate_keyset(request, Employee.objects.select_related('user'), ordering=('id',))
+    return render(request, 'hr/employee_list.html', {'employees': page.object_list, 'page': page})
+
+@async_login_required
+@async_role_required(['hr', 'head_hr', 'account', 'head_account'])
+async def manage_payrolls(request):
+    try:
+        start, end = period_params(request.GET)
+    except ValueError:
+        return HttpResponseBadRequest("Periods must look like 2025-07.")
+    payrolls, ordering = payrolls_for_listing(start, end)
+    page = await apaginate_keyset(request, payrolls, ordering=ordering)
+    return render(request, 'hr/payroll_list.html', {'payrolls': page.object_list, 'page': page})
+
+@async_login_required
+@async_role_required(['manager'])
+async def manager_tasks(request):
+    tasks = TeamReport.objects.filter(team__managers=request.user).select_related('team')
+    page = await apaginate_keyset(request, tasks)
+    return render(request, 'manager/tasks.html', {'tasks': page.object_list, 'page': page})
+
+@async_login_required
+@async_role_required(['sales'])
+async def sales_leads(request):
+    page = await apaginate_keyset(request, Lead.objects.filter(assigned_to=request.user))
+    return render(request, 'sales/leads.html', {'leads': page.object_list, 'page': page})
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# -------------------------------
+# Deployment Checks
+# -------------------------------
+# These caches hold state every worker process must agree on. LocMemCache
+# keeps a separate copy per process, so a write handled by one worker would
+# go unnoticed by the others. `manage.py check --deploy` refuses them there.
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+SHARED_CACHE_SETTINGS = {
+    'ERP_DASHBOARD_CACHE': "dashboard metrics, list-page ETags, the payroll rules and their version counters",
+    'ERP_AUTH_USER_CACHE': "the logged-in user, dropped on save so deactivation and role changes apply at once",
+}
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def _cache_aliases():
+    """(setting, cache alias, what it holds) for every cache that must be shared."""
+    for setting, purpose in SHARED_CACHE_SETTINGS.items():
+        yield setting, getattr(settings, setting, 'default'), purpose
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        yield 'SESSION_CACHE_ALIAS', settings.SESSION_CACHE_ALIAS, "sessions, dropped on logout"
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    for setting, alias, purpose in _cache_aliases():
+        if settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_BACKENDS:
+            errors.append(Error(
+                f"{setting} points at the process-local cache {alias!r}, which holds {purpose}.",
+                hint="Use a cache shared by all workers: 'files' on a single server, Redis or Memcached across servers.",
+                id='core.E001',
+            ))
+    return errors
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .dashboards import DASHBOARD_METRICS
+
+# -------------------------------
+# Dashboard Metrics Cache
+# -------------------------------
+# Entries are keyed by role, user and the version of every scope the figures
+# depend on:
+#   'payroll'   employee/payroll totals (head HR dashboard)
+#   'user:<id>' one user's own leads, teams and reports
+# and core/freshness.py validates list pages against the same versions, plus
+#   'employees' / 'payrolls'  any change to the HR list pages' rows
+# and core/rules.py caches the compiled payroll rules under 'payroll_rules'.
+# Writes bump the versions of the scopes they touch (see core/signals.py), so
+# an entry is never served after its data changed and no TTL is needed for
+# correctness. The timeout only lets superseded entries age out.
+KEY_PREFIX = 'erp:dashboard'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    """The ERP_DASHBOARD_CACHE backend, shared by everything keyed on scope versions."""
+    return caches[getattr(settings, 'ERP_DASHBOARD_CACHE', 'default')]
+
+
+def cache_timeout():
+    """How long an entry keyed on scope versions may outlive being superseded."""
+    return getattr(settings, 'ERP_DASHBOARD_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def _version_key(scope):
+    return f'{KEY_PREFIX}:version:{scope}'
+
+
+def scopes_for(user):
+    scopes = [f'user:{user.pk}']
+    if user.role == 'head_hr':
+        scopes.append('payroll')
+    return scopes
+
+
+def _versions(scopes):
+    cache = get_cache()
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start unknown (or evicted) scopes at a fresh value so an old entry can never match.
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def scope_versions(scopes):
+    """Current versions of `scopes`; a scope's version changes whenever its data does."""
+    return _versions(scopes)
+
+
+def scope_version(scope):
+    return _versions([scope])[0]
+
+
+def _record(role, outcome):
+    with _stats_lock:
+        _stats[(role, outcome)] += 1
+
+
+def cache_stats():
+    """Hit/miss counters of this process, per role: {role: {'hits': n, 'misses': n}}."""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    stats = {}
+    for (role, outcome), count in snapshot.items():
+        stats.setdefault(role, {'hits': 0, 'misses': 0})[outcome] = count
+    return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def cached_dashboard_metrics(user):
+    """dashboard_metrics(user), served from the cache while its scopes are unchanged."""
+    metrics = DASHBOARD_METRICS.get(user.role)
+    if metrics is None:
+        return {}
+
+    scopes = scopes_for(user)
+    versions = '.'.join(str(version) for version in _versions(scopes))
+    key = f'{KEY_PREFIX}:{user.role}:{user.pk}:{versions}'
+    cache = get_cache()
+
+    context = cache.get(key)
+    if context is not None:
+        _record(user.role, 'hits')
+        return context
+
+    _record(user.role, 'misses')
+    context = metrics(user)
+    cache.set(key, context, timeout=cache_timeout())
+    return context
+
+
+def _bump(scopes):
+    cache = get_cache()
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate(*scopes):
+    """
+    Bump `scopes` now and again once the current transaction commits, so a
+    reader that recomputed from pre-commit data cannot leave a stale entry.
+    """
+    scopes = [scope for scope in set(scopes) if scope]
+    if not scopes:
+        return
+    _bump(scopes)
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def invalidate_users(user_ids):
+    invalidate(*(f'user:{user_id}' for user_id in user_ids if user_id))
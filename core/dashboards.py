@@ -0,0 +1,109 @@
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import Count, OuterRef, Q
+
+from .hierarchy import descendants
+from .models import Lead, OrgLink, Team, TeamReport, User
+from .reports import count_subquery, headcounts
+
+# -------------------------------
+# Dashboard Metrics
+# -------------------------------
+# Each function returns the template context for one role's dashboard using a
+# fixed number of queries (one), however many teams, reports or leads the
+# user has.
+
+
+def _team_counts(queryset):
+    return queryset.annotate(
+        member_count=count_subquery(Team.members.through.objects.filter(team_id=OuterRef('pk'))),
+        report_count=count_subquery(TeamReport.objects.filter(team_id=OuterRef('pk'))),
+    ).order_by('name', 'id')
+
+
+def _managers_under(user):
+    # Managers sit at depth 1 below their head manager in the org closure table.
+    return descendants(user, depth=1, level=OrgLink.HEAD_MANAGER).filter(role='manager')
+
+
+def _lead_counts(user):
+    return Lead.objects.filter(assigned_to=user), {
+        'total_leads': Count('id'),
+        'open_leads': Count('id', filter=Q(status='Open')),
+        'closed_leads': Count('id', filter=Q(status='Closed')),
+    }
+
+
+def head_hr_metrics(user):
+    return {
+        **headcounts(),
+        'total_reports': 0,  # You can calculate actual pending HR reports here
+    }
+
+
+def manager_metrics(user):
+    teams = list(_team_counts(user.assigned_teams.all()))
+    return {
+        'teams': teams,
+        'total_team_members': sum(team.member_count for team in teams),
+        'total_reports': sum(team.report_count for team in teams),
+    }
+
+
+def head_manager_metrics(user):
+    return (
+        User.objects.filter(pk=user.pk)
+        .annotate(
+            total_teams=count_subquery(Team.objects.filter(head_manager=user)),
+            total_managers=count_subquery(_managers_under(user)),
+            total_reports=count_subquery(TeamReport.objects.filter(team__head_manager=user)),
+        )
+        .values('total_teams', 'total_managers', 'total_reports')
+        .get()
+    )
+
+
+def sales_metrics(user):
+    leads, counts = _lead_counts(user)
+    return leads.aggregate(**counts)
+
+
+DASHBOARD_METRICS = {
+    'head_hr': head_hr_metrics,
+    'manager': manager_metrics,
+    'head_manager': head_manager_metrics,
+    'sales': sales_metrics,
+}
+
+
+def dashboard_metrics(user):
+    """Context for the dashboard of `user.role` ({} for roles without metrics)."""
+    metrics = DASHBOARD_METRICS.get(user.role)
+    return metrics(user) if metrics else {}
+
+
+# -------------------------------
+# Async Dashboard Metrics (ASGI views)
+# -------------------------------
+# The same functions as the sync dashboards, so the figures cannot diverge.
+# Each is one query, so there is nothing to overlap within a request; what the
+# ASGI views gain is that the query runs on a worker thread with its own
+# connection (thread_sensitive=False) rather than queueing with every other
+# request's ORM calls on the one shared sync thread. Inside a transaction the
+# query stays on that transaction's connection so it sees its writes.
+def _on_own_connection(metrics, user):
+    try:
+        return metrics(user)
+    finally:
+        # The worker's connection, like a request's: kept only under CONN_MAX_AGE.
+        connection.close_if_unusable_or_obsolete()
+
+
+async def adashboard_metrics(user):
+    """dashboard_metrics(user) for async views."""
+    metrics = DASHBOARD_METRICS.get(user.role)
+    if metrics is None:
+        return {}
+    if await sync_to_async(lambda: connection.in_atomic_block)():
+        return await sync_to_async(metrics)(user)
+    return await sync_to_async(_on_own_connection, thread_sensitive=False)(metrics, user)
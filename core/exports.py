@@ -0,0 +1,226 @@
+import csv
+import datetime
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+
+from .models import Employee, Payroll
+from .reports import in_periods
+
+# -------------------------------
+# Streaming CSV and XLSX Exports
+# -------------------------------
+# Both formats are written row by row as the keyset chunks arrive. An XLSX
+# file is a zip of SpreadsheetML parts; zipfile can write it to a stream
+# that cannot seek (sizes go in data descriptors), so the sheet is deflated
+# and sent as it is generated, with no spreadsheet dependency.
+EXPORT_CHUNK_SIZE = 2000
+FORMATS = ('csv', 'xlsx')
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+PAYROLL_COLUMNS = [
+    ('Employee ID', 'employee__employee_id'),
+    ('Username', 'employee__user__username'),
+    ('Department', 'employee__department'),
+    ('Month', 'month'),
+    ('Year', 'year'),
+    ('Basic Salary', 'employee__basic_salary'),
+    ('HRA', 'hra'),
+    ('Allowances', 'allowances'),
+    ('Deductions', 'deductions'),
+    ('Net Salary', 'net_salary'),
+]
+
+EMPLOYEE_COLUMNS = [
+    ('Employee ID', 'employee_id'),
+    ('Username', 'user__username'),
+    ('First Name', 'user__first_name'),
+    ('Last Name', 'user__last_name'),
+    ('Email', 'user__email'),
+    ('Department', 'department'),
+    ('Designation', 'designation'),
+    ('Contact Number', 'contact_number'),
+    ('Basic Salary', 'basic_salary'),
+]
+
+
+class Echo:
+    """File-like object whose write() just hands the CSV line back."""
+
+    def write(self, value):
+        return value
+
+
+def iter_values(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield value tuples in primary-key order, `chunk_size` rows per query.
+
+    Each chunk seeks past the last id seen, so memory stays flat even on
+    backends whose drivers buffer a whole result set (MySQL).
+    """
+    last_id = None
+    while True:
+        chunk = queryset.order_by('pk')
+        if last_id is not None:
+            chunk = chunk.filter(pk__gt=last_id)
+        rows = list(chunk.values_list('pk', *fields)[:chunk_size])
+        for row in rows:
+            yield row[1:]
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def stream_csv(columns, queryset, filename):
+    writer = csv.writer(Echo())
+
+    def rows():
+        # The header goes out before the first query runs.
+        yield writer.writerow([title for title, _ in columns])
+        for values in iter_values(queryset, [field for _, field in columns]):
+            yield writer.writerow(values)
+
+    return StreamingHttpResponse(
+        rows(),
+        content_type='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+# Control characters are not allowed in XML 1.0 text.
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class ChunkBuffer:
+    """Write-only stream for zipfile; take() hands back what was written since the last call."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(INVALID_XML_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def stream_xlsx(columns, queryset, filename):
+    def parts():
+        buffer = ChunkBuffer()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as workbook:
+            for name, xml in XLSX_PARTS.items():
+                workbook.writestr(name, XML_DECLARATION + xml)
+            with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+                sheet.write((
+                    XML_DECLARATION
+                    + '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                    + _xlsx_row(title for title, _ in columns)
+                ).encode())
+                yield buffer.take()
+                for number, values in enumerate(iter_values(queryset, [field for _, field in columns]), start=1):
+                    sheet.write(_xlsx_row(values).encode())
+                    if number % EXPORT_CHUNK_SIZE == 0:
+                        yield buffer.take()
+                sheet.write(b'</sheetData></worksheet>')
+        yield buffer.take()
+
+    return StreamingHttpResponse(
+        parts(),
+        content_type=XLSX_CONTENT_TYPE,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+
+def export_response(columns, queryset, name, fmt='csv'):
+    """`queryset` as a streamed `name`.csv or `name`.xlsx download; ValueError for another format."""
+    if fmt == 'csv':
+        return stream_csv(columns, queryset, f'{name}.csv')
+    if fmt == 'xlsx':
+        return stream_xlsx(columns, queryset, f'{name}.xlsx')
+    raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}.")
+
+
+def payroll_export(year=None, month=None, department=None, start=None, end=None, fmt='csv'):
+    """
+    Payroll CSV or XLSX, filtered by period range (`start`/`end` first-of-month
+    dates), by year and/or month, and by department. Year filters become
+    ranges on `period`; a month on its own matches the stored month name, so
+    neither wraps the indexed column in a function. A year filter also keeps
+    that year's rows whose month never parsed (NULL period), so they are
+    exported rather than lost.
+    Raises ValueError for a month filter that is not a month or an unknown format.
+    """
+    payrolls = in_periods(Payroll.objects.all(), start, end)
+    if month:
+        period = Payroll.period_of(month, year or 2000)
+        if period is None:
+            raise ValueError(f"Unknown month {month!r}.")
+        if year:
+            payrolls = payrolls.filter(period=period)
+        else:
+            payrolls = payrolls.filter(month=Payroll.month_name(month))
+    elif year:
+        year = int(year)
+        payrolls = payrolls.filter(
+            Q(period__range=(datetime.date(year, 1, 1), datetime.date(year, 12, 1)))
+            | Q(period__isnull=True, year=year)
+        )
+    if department:
+        payrolls = payrolls.filter(employee__department=department)
+    return export_response(PAYROLL_COLUMNS, payrolls, 'payroll', fmt)
+
+
+def employee_export(fmt='csv'):
+    return export_response(EMPLOYEE_COLUMNS, Employee.objects.all(), 'employees', fmt)
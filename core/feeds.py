@@ -0,0 +1,86 @@
+import hashlib
+from dataclasses import dataclass
+
+from django.db.models import Max
+
+from .dashboard_cache import cache_timeout, get_cache, scope_version
+from .models import TeamReport
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, _decode_cursor, _encode_cursor, _page_size, _seek
+
+# -------------------------------
+# Incremental Task Feed
+# -------------------------------
+# Managers poll for team reports newer than a cursor (the last item's
+# created_at and id, encoded like the keyset pagination cursors), read in
+# ascending order along TeamReport's (team, created_at, id) index.
+#
+# Conditional requests cost no queries: the ETag is built from the version of
+# the manager's dashboard cache scope, which core/signals.py bumps whenever a
+# report on one of their teams is written or their teams change, and
+# Last-Modified is cached under that same version.
+FEED_ORDERING = ('created_at', 'id')
+
+
+@dataclass
+class FeedPage:
+    items: list
+    cursor: str
+    has_more: bool = False
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _scope(user):
+    return f'user:{user.pk}'
+
+
+def task_feed_queryset(user):
+    return TeamReport.objects.filter(team__managers=user)
+
+
+def feed_params(request):
+    """(since cursor, page size) from the query string."""
+    return request.GET.get('since', ''), _page_size(request, '', DEFAULT_PAGE_SIZE)
+
+
+def parse_since(since):
+    """Decoded `since` cursor, None for an empty one; InvalidCursor otherwise."""
+    if not since:
+        return None
+    values = _decode_cursor(since, TeamReport, FEED_ORDERING)
+    if values is None:
+        raise InvalidCursor(since)
+    return values
+
+
+def task_feed(user, since=None, size=DEFAULT_PAGE_SIZE):
+    """Up to `size` of `user`'s team reports after the `since` cursor, oldest first."""
+    size = max(1, min(size, MAX_PAGE_SIZE))
+    reports = task_feed_queryset(user).select_related('team').order_by(*FEED_ORDERING)
+    values = parse_since(since)
+    if values is not None:
+        reports = reports.filter(_seek(FEED_ORDERING, values, forward=True))
+    items = list(reports[:size + 1])
+    page = FeedPage(items=items[:size], cursor=since or '', has_more=len(items) > size)
+    if page.items:
+        last = page.items[-1]
+        page.cursor = _encode_cursor([getattr(last, name) for name in FEED_ORDERING])
+    return page
+
+
+def task_feed_etag(user, since='', size=DEFAULT_PAGE_SIZE):
+    tag = f'{user.pk}:{scope_version(_scope(user))}:{since or ""}:{size}'
+    return hashlib.sha1(tag.encode()).hexdigest()
+
+
+def task_feed_last_modified(user):
+    """Creation time of the user's newest team report (None without any), cached per scope version."""
+    key = f'erp:task-feed:last-modified:{user.pk}:{scope_version(_scope(user))}'
+    cache = get_cache()
+    cached = cache.get(key)
+    if cached is None:
+        cached = (task_feed_queryset(user).aggregate(latest=Max('created_at'))['latest'],)
+        cache.set(key, cached, timeout=cache_timeout())
+    return cached[0]
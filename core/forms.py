@@ -47,3 +47,79 @@ class LeadForm(forms.ModelForm):
             'priority': forms.Select(attrs={'class': 'form-control'}),
             'notes': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
         }
+
+
+# ----------------------------------
+# Lead Import Row Form
+# ----------------------------------
+class LeadImportForm(forms.ModelForm):
+    """Validates and normalizes one row of a bulk lead import (see core/imports.py)."""
+    class Meta:
+        model = Lead
+        fields = ['name', 'email', 'phone', 'company', 'status', 'priority', 'notes']
+
+    def clean_email(self):
+        return Lead.normalize_email(self.cleaned_data['email']) or None
+
+    def clean_phone(self):
+        return Lead.normalize_phone(self.cleaned_data['phone']) or None
+
+    def clean_company(self):
+        return Lead.normalize_company(self.cleaned_data['company']) or None
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get('email') and not cleaned_data.get('phone') and not self.has_error('email'):
+            raise forms.ValidationError("email or phone is required")
+        return cleaned_data
+
+
+# ----------------------------------
+# Monthly Payroll Run Form
+# ----------------------------------
+class PayrollRunForm(forms.Form):
+    """Month and year of a bulk payroll run; the month comes back as its full name, e.g. 'mar' -> 'March'."""
+    month = forms.CharField(max_length=20)
+    year = forms.IntegerField(min_value=1, max_value=9999)
+
+    def clean(self):
+        import calendar
+        from .models import Payroll
+        cleaned = super().clean()
+        if 'month' in cleaned and 'year' in cleaned:
+            period = Payroll.period_of(cleaned['month'], cleaned['year'])
+            if period is None:
+                self.add_error('month', "Enter a month name or number, e.g. March.")
+            else:
+                cleaned['month'] = calendar.month_name[period.month]
+        return cleaned
+
+
+# ----------------------------------
+# Payroll Rule What-If Form
+# ----------------------------------
+class PayrollRuleChangeForm(forms.Form):
+    """One proposed change to the payroll rules; nothing is saved (see core/rules.simulate)."""
+    department = forms.CharField(max_length=100, required=False)
+    designation = forms.CharField(max_length=100, required=False)
+    hra_rate = forms.DecimalField(max_digits=5, decimal_places=4, min_value=0, required=False)
+    allowances_rate = forms.DecimalField(max_digits=5, decimal_places=4, min_value=0, required=False)
+    deductions_rate = forms.DecimalField(max_digits=5, decimal_places=4, min_value=0, required=False)
+    remove = forms.BooleanField(required=False)
+
+    def clean(self):
+        cleaned = super().clean()
+        rates = ('hra_rate', 'allowances_rate', 'deductions_rate')
+        if not cleaned.get('remove') and any(cleaned.get(rate) is None for rate in rates):
+            raise forms.ValidationError("All three rates are required unless the rule is being removed.")
+        return cleaned
+
+    @property
+    def scope(self):
+        return (self.cleaned_data['department'], self.cleaned_data['designation'])
+
+    def rule(self):
+        from .models import PayrollRule
+        return PayrollRule(department=self.scope[0], designation=self.scope[1], **{
+            rate: self.cleaned_data[rate] for rate in ('hra_rate', 'allowances_rate', 'deductions_rate')
+        })
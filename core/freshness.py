@@ -0,0 +1,93 @@
+import hashlib
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .dashboard_cache import cache_timeout, get_cache, scope_versions
+
+# -------------------------------
+# Conditional GET for List Pages
+# -------------------------------
+# A page's validator is the version of every cache scope its rows depend on
+# (see core/dashboard_cache.py; core/signals.py and the bulk writers bump
+# them), always including the user's own scope, plus the newest stored
+# updated_at of its rows where they have one. The ETag hashes those with the
+# user, URL and CSRF cookie. Last-Modified is the later of that updated_at and
+# the time this set of versions was first seen, so a delete (which moves no
+# updated_at) or a cache reset (which starts fresh versions) still moves it.
+# The updated_at is cached per version set, so If-None-Match and
+# If-Modified-Since are answered with 304 from the cache alone, before the
+# view builds its queryset or renders anything.
+KEY_PREFIX = 'erp:freshness'
+
+
+def _validators(request, scopes, updated_rows):
+    """(ETag, Last-Modified) for this request, worked out once per request."""
+    if not hasattr(request, '_freshness_validators'):
+        names = [*scopes, f'user:{request.user.pk}']
+        versions = '|'.join(f'{scope}={version}' for scope, version in zip(names, scope_versions(names)))
+        digest = hashlib.sha1(versions.encode()).hexdigest()
+
+        cache = get_cache()
+        seen_key = f'{KEY_PREFIX}:seen:{digest}'
+        cache.add(seen_key, timezone.now(), timeout=cache_timeout())
+        seen = cache.get(seen_key)
+        updated_at = None
+        if updated_rows:
+            updated_key = f'{KEY_PREFIX}:updated:{request.resolver_match.view_name}:{digest}'
+            cached = cache.get(updated_key)
+            if cached is None:
+                cached = (updated_rows(request).aggregate(latest=Max('updated_at'))['latest'],)
+                cache.set(updated_key, cached, timeout=cache_timeout())
+            updated_at = cached[0]
+
+        tag = '|'.join([
+            str(request.user.pk), request.get_full_path(), request.META.get('CSRF_COOKIE', ''), versions,
+            updated_at.isoformat() if updated_at else '',
+        ])
+        request._freshness_validators = (
+            hashlib.sha1(tag.encode()).hexdigest(), max(filter(None, [seen, updated_at]), default=None)
+        )
+    return request._freshness_validators
+
+
+def conditional_page(scopes=(), updated_rows=None):
+    """
+    Decorate a GET view whose output only changes with the cache scope names
+    in `scopes` (the user's own scope is always added) and the rows of
+    `updated_rows(request)`, a queryset with an `updated_at` column. Apply it
+    inside the login and role checks, so a redirect is never cached and then
+    answered with 304.
+    """
+    def etag(request, *args, **kwargs):
+        return _validators(request, scopes, updated_rows)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return _validators(request, scopes, updated_rows)[1]
+
+    def decorator(view_func):
+        conditional = condition(etag_func=etag, last_modified_func=last_modified)(view_func)
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if len(get_messages(request)):
+                # A flash message (e.g. after a redirect-after-POST) must be rendered, and the
+                # page carrying it gets no validators, so it is never revalidated into a 304.
+                response = view_func(request, *args, **kwargs)
+            else:
+                response = conditional(request, *args, **kwargs)
+            if response.status_code not in (200, 304):
+                # Errors and redirects must not be revalidated into a 304 later.
+                del response['ETag']
+                del response['Last-Modified']
+            # Per-user pages: browsers may keep them but must revalidate every time.
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return _wrapped_view
+    return decorator
+
@@ -0,0 +1,89 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import OrgLink, Team, User
+
+# -------------------------------
+# Org Hierarchy (closure table)
+# -------------------------------
+# Every team contributes the paths
+#   head manager -> manager   (depth 1)
+#   head manager -> member    (depth 2)
+#   manager      -> member    (depth 1)
+# to OrgLink, so "everyone under X" is one indexed lookup instead of joins
+# through both membership tables; the head manager dashboard and the member
+# checks of the head manager views read it. Rows are
+# rebuilt per team by the signals in core/signals.py whenever a team's head
+# manager, managers or members change.
+BATCH_SIZE = 1000
+
+
+def _users_by_team(through, team_ids):
+    users = defaultdict(set)
+    for team_id, user_id in through.objects.filter(team_id__in=team_ids).values_list('team_id', 'user_id'):
+        users[team_id].add(user_id)
+    return users
+
+
+def _batches(ids, size=BATCH_SIZE):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _links(head_manager_id, managers, members):
+    for manager_id in managers:
+        yield OrgLink.HEAD_MANAGER, head_manager_id, manager_id, 1
+    for member_id in members:
+        yield OrgLink.HEAD_MANAGER, head_manager_id, member_id, 2
+        for manager_id in managers:
+            yield OrgLink.MANAGER, manager_id, member_id, 1
+
+
+def refresh_teams(team_ids):
+    """Rebuild the links of `team_ids` (deleted teams just lose theirs). Four queries for any number of teams."""
+    team_ids = set(team_ids)
+    if not team_ids:
+        return 0
+    with transaction.atomic():
+        OrgLink.objects.filter(team_id__in=team_ids).delete()
+        heads = dict(Team.objects.filter(pk__in=team_ids).values_list('pk', 'head_manager_id'))
+        managers = _users_by_team(Team.managers.through, heads)
+        members = _users_by_team(Team.members.through, heads)
+        links = [
+            OrgLink(team_id=team_id, ancestor_id=ancestor, descendant_id=descendant,
+                    ancestor_level=level, depth=depth)
+            for team_id, head_manager_id in heads.items()
+            for level, ancestor, descendant, depth in _links(head_manager_id, managers[team_id], members[team_id])
+            if ancestor != descendant
+        ]
+        OrgLink.objects.bulk_create(links, batch_size=BATCH_SIZE)
+    return len(links)
+
+
+def rebuild_hierarchy():
+    """Rebuild the whole closure table, e.g. after raw inserts into the membership tables."""
+    with transaction.atomic():
+        OrgLink.objects.all().delete()
+        team_ids = list(Team.objects.values_list('pk', flat=True))
+        return sum(refresh_teams(batch) for batch in _batches(team_ids))
+
+
+# -------------------------------
+# Lookups (one query each)
+# -------------------------------
+def descendant_links(user, depth=None, level=None, team=None):
+    """`user`'s links down the hierarchy, optionally at one depth, in one role (`level`) or within one team."""
+    links = OrgLink.objects.filter(ancestor=user)
+    if depth is not None:
+        links = links.filter(depth=depth)
+    if level is not None:
+        links = links.filter(ancestor_level=level)
+    if team is not None:
+        links = links.filter(team=team)
+    return links
+
+
+def descendants(user, depth=None, level=None, team=None):
+    """Users under `user` through any team (or `team` only); `depth=1` is direct reports only."""
+    return User.objects.filter(pk__in=descendant_links(user, depth, level, team).values('descendant_id'))
@@ -0,0 +1,397 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .assignment import MODES as ASSIGNMENT_MODES, assign_leads
+from .dashboard_cache import invalidate, invalidate_users
+from .forms import EmployeeForm, LeadImportForm
+from .models import Employee, EmployeeIdSequence, Lead, User
+from .search import index_leads
+
+# -------------------------------
+# Bulk Employee Import
+# -------------------------------
+DEFAULT_BATCH_SIZE = 500
+USER_FIELDS = ['username', 'password', 'first_name', 'last_name', 'email']
+EMPLOYEE_FIELDS = ['department', 'designation', 'contact_number', 'basic_salary']
+
+
+@dataclass
+class BatchReport:
+    number: int
+    rows: int = 0
+    created: int = 0
+    errors: list = field(default_factory=list)  # [(row number, message)]
+
+
+@dataclass
+class ImportReport:
+    batches: list = field(default_factory=list)
+
+    @property
+    def rows(self):
+        return sum(batch.rows for batch in self.batches)
+
+    @property
+    def created(self):
+        return sum(batch.created for batch in self.batches)
+
+    @property
+    def errors(self):
+        return [error for batch in self.batches for error in batch.errors]
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    return {'.json': 'json', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(extension, 'csv')
+
+
+def iter_rows(stream, fmt='csv'):
+    """
+    Yield dict rows from a text stream.
+
+    CSV and JSON Lines are read one line at a time. A plain JSON array has to be
+    parsed whole, so prefer CSV/JSON Lines for very large files.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    elif fmt == 'json':
+        yield from json.load(stream)
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _chunked(rows, size):
+    batch = []
+    for number, row in enumerate(rows, start=1):
+        batch.append((number, row))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _init_worker():
+    # Needed when the pool spawns fresh interpreters instead of forking.
+    django.setup()
+
+
+def _clean(value):
+    return '' if value is None else str(value).strip()
+
+
+def _user_problems(user_data):
+    """The User model's own field checks (max lengths, username characters, email format) for one row."""
+    exclude = ['password'] if user_data['username'] else ['password', 'username']  # blank is reported already
+    try:
+        User(**user_data).full_clean(exclude=exclude, validate_unique=False, validate_constraints=False)
+    except ValidationError as exc:
+        return [f"{name}: {message}" for name, messages in exc.message_dict.items() for message in messages]
+    return []
+
+
+def _validate_batch(batch, seen_usernames):
+    """
+    Split a batch into (valid rows, errors) with one username lookup for the
+    whole batch. Rows are checked against the User fields and EmployeeForm, so
+    a bad row is reported rather than failing the batch's insert.
+    """
+    valid, errors = [], []
+    usernames = [_clean(row.get('username')) if isinstance(row, dict) else '' for _, row in batch]
+    taken = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+    for (number, row), username in zip(batch, usernames):
+        if not isinstance(row, dict):
+            errors.append((number, "Row is not an object."))
+            continue
+        user_data = {name: _clean(row.get(name)) for name in USER_FIELDS}
+        problems = []
+        if not username:
+            problems.append("username is required")
+        elif username in taken or username in seen_usernames:
+            problems.append(f"username '{username}' already exists")
+        if not user_data['password']:
+            problems.append("password is required")
+        problems.extend(_user_problems(user_data))
+
+        form = EmployeeForm({name: _clean(row.get(name)) for name in EMPLOYEE_FIELDS})
+        if not form.is_valid():
+            problems.extend(
+                f"{name}: {message}" for name, messages in form.errors.items() for message in messages
+            )
+        if problems:
+            errors.append((number, "; ".join(problems)))
+            continue
+
+        seen_usernames.add(username)
+        valid.append((user_data, form.cleaned_data))
+    return valid, errors
+
+
+def _write_batch(valid, hashed_passwords):
+    employee_ids = EmployeeIdSequence.reserve(len(valid))
+    users = User.objects.bulk_create([
+        User(
+            username=user_data['username'],
+            password=password,
+            first_name=user_data['first_name'],
+            last_name=user_data['last_name'],
+            email=user_data['email'],
+            role='employee',
+        )
+        for (user_data, _), password in zip(valid, hashed_passwords)
+    ])
+    if any(user.pk is None for user in users):
+        # Backends like MySQL do not return primary keys from bulk inserts.
+        ids = dict(User.objects.filter(
+            username__in=[user.username for user in users]
+        ).values_list('username', 'id'))
+        for user in users:
+            user.pk = ids[user.username]
+
+    Employee.objects.bulk_create([
+        Employee(user=user, employee_id=employee_id, **{
+            name: employee_data[name] for name in EMPLOYEE_FIELDS
+        })
+        for user, employee_id, (_, employee_data) in zip(users, employee_ids, valid)
+    ])
+
+
+def _hash_passwords(passwords, pool=None, workers=0):
+    """make_password() for each of `passwords`, hashing each distinct password once."""
+    distinct = list(dict.fromkeys(passwords))
+    if pool:
+        hashed = pool.map(make_password, distinct, chunksize=max(1, len(distinct) // workers))
+    else:
+        hashed = map(make_password, distinct)
+    hashes = dict(zip(distinct, hashed))
+    return [hashes[password] for password in passwords]
+
+
+def import_employees(rows, batch_size=DEFAULT_BATCH_SIZE, workers=0, on_batch=None):
+    """
+    Create users and employees from an iterable of dict rows.
+
+    Rows are validated and written one batch at a time: each distinct password
+    in a batch is hashed once, inline or on a pool of `workers` processes (for
+    the import_employees command; never start one inside a web request),
+    employee IDs come from one reserved range per batch, and users and
+    employees are written with bulk_create. `on_batch(report)` is called after
+    every batch.
+    """
+    report = ImportReport()
+    seen_usernames = set()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers else None
+
+    try:
+        for number, batch in enumerate(_chunked(rows, batch_size), start=1):
+            batch_report = BatchReport(number=number, rows=len(batch))
+            valid, batch_report.errors = _validate_batch(batch, seen_usernames)
+
+            if valid:
+                hashed = _hash_passwords([user_data['password'] for user_data, _ in valid], pool, workers)
+                try:
+                    with transaction.atomic():
+                        _write_batch(valid, hashed)
+                        invalidate('payroll', 'employees', 'payrolls')  # bulk_create sends no post_save signals
+                    batch_report.created = len(valid)
+                except IntegrityError as exc:
+                    batch_report.errors.append((batch[0][0], f"Batch not saved: {exc}"))
+
+            report.batches.append(batch_report)
+            if on_batch:
+                on_batch(batch_report)
+    finally:
+        if pool:
+            pool.shutdown()
+    return report
+
+
+# -------------------------------
+# Bulk Lead Import
+# -------------------------------
+# Rows are normalized by LeadImportForm and keyed by Lead.fingerprint_of().
+# Each batch looks its fingerprints up with one query on the indexed column,
+# so spotting a duplicate costs a dict lookup per row however many leads
+# exist. Duplicates (of a stored lead or of an earlier row) are merged into
+# that lead or skipped; new leads are written with one bulk_create per batch.
+# Bulk writes send no signals, so the search index and the assignees'
+# dashboards are updated here.
+LEAD_FIELDS = ['name', 'email', 'phone', 'company', 'status', 'priority', 'notes']
+# A merge only fills what the stored lead is missing, so its fingerprint never
+# changes; status, priority and assignee stay as the sales team left them.
+LEAD_MERGE_FIELDS = ['email', 'phone', 'company', 'notes']
+ON_DUPLICATE = ('merge', 'skip')
+
+
+@dataclass
+class LeadBatchReport:
+    number: int
+    rows: int = 0
+    inserted: int = 0
+    merged: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)  # [(row number, message)]
+
+    @property
+    def rejected(self):
+        return len(self.errors)
+
+
+@dataclass
+class LeadImportReport:
+    batches: list = field(default_factory=list)
+
+    @property
+    def rows(self):
+        return sum(batch.rows for batch in self.batches)
+
+    @property
+    def inserted(self):
+        return sum(batch.inserted for batch in self.batches)
+
+    @property
+    def merged(self):
+        return sum(batch.merged for batch in self.batches)
+
+    @property
+    def skipped(self):
+        return sum(batch.skipped for batch in self.batches)
+
+    @property
+    def errors(self):
+        return [error for batch in self.batches for error in batch.errors]
+
+    @property
+    def rejected(self):
+        return len(self.errors)
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'inserted': self.inserted,
+            'merged': self.merged,
+            'skipped': self.skipped,
+            'rejected': self.rejected,
+            'errors': [{'row': number, 'message': message} for number, message in self.errors],
+        }
+
+
+def _validate_leads(batch):
+    """Split a batch into ([(row number, cleaned data, fingerprint)], errors)."""
+    defaults = {name: Lead._meta.get_field(name).get_default() for name in ('status', 'priority')}
+    valid, errors = [], []
+    for number, row in batch:
+        if not isinstance(row, dict):
+            errors.append((number, "Row is not an object."))
+            continue
+        data = {name: _clean(row.get(name)) for name in LEAD_FIELDS}
+        form = LeadImportForm({**data, **{name: data[name] or default for name, default in defaults.items()}})
+        if not form.is_valid():
+            errors.append((number, "; ".join(
+                f"{name}: {message}" if name != '__all__' else message
+                for name, messages in form.errors.items() for message in messages
+            )))
+            continue
+        data = form.cleaned_data
+        valid.append((number, data, Lead.fingerprint_of(data['email'], data['phone'], data['company'])))
+    return valid, errors
+
+
+def _merge_lead(lead, data):
+    """Fill the fields `lead` is missing from `data`; True if anything changed."""
+    changed = False
+    for name in ('email', 'phone', 'company'):
+        if not getattr(lead, name) and data[name]:
+            setattr(lead, name, data[name])
+            changed = True
+    notes = data['notes']
+    if notes and notes not in (lead.notes or ''):
+        lead.notes = f"{lead.notes}\n{notes}" if lead.notes else notes
+        changed = True
+    return changed
+
+
+def _write_leads(valid, on_duplicate, batch_report):
+    """Merge, skip or insert one validated batch; returns the ids of the inserted leads."""
+    existing = {}
+    fingerprints = {fingerprint for _, _, fingerprint in valid}
+    for lead in Lead.objects.filter(fingerprint__in=fingerprints).order_by('id'):
+        existing.setdefault(lead.fingerprint, lead)  # the oldest lead wins if there are old duplicates
+
+    new, merged = {}, {}
+    for _, data, fingerprint in valid:
+        lead = existing.get(fingerprint) or new.get(fingerprint)
+        if lead is None:
+            new[fingerprint] = Lead(fingerprint=fingerprint, **data)
+        elif on_duplicate == 'skip':
+            batch_report.skipped += 1
+        else:
+            batch_report.merged += 1
+            if _merge_lead(lead, data) and lead.pk:
+                merged[lead.pk] = lead
+
+    inserted = Lead.objects.bulk_create(new.values())
+    if any(lead.pk is None for lead in inserted):
+        # Backends like MySQL do not return primary keys from bulk inserts.
+        ids = dict(Lead.objects.filter(fingerprint__in=new).values_list('fingerprint', 'id'))
+        for lead in inserted:
+            lead.pk = ids[lead.fingerprint]
+    if merged:
+        now = timezone.now()
+        for lead in merged.values():
+            lead.updated_at = now
+        Lead.objects.bulk_update(merged.values(), LEAD_MERGE_FIELDS + ['updated_at'])
+
+    index_leads([*inserted, *merged.values()])
+    invalidate_users({lead.assigned_to_id for lead in merged.values()})
+    batch_report.inserted = len(inserted)
+    return [lead.pk for lead in inserted]
+
+
+def import_leads(rows, batch_size=DEFAULT_BATCH_SIZE, on_duplicate='merge', assign=None, on_batch=None):
+    """
+    Create leads from an iterable of dict rows, merging (`on_duplicate='merge'`)
+    or skipping (`'skip'`) rows whose email, or phone within the same company,
+    matches a stored lead or an earlier row. Rows need a name and an email or
+    phone. New leads are handed out with core.assignment when `assign` names a
+    mode. `on_batch(report)` is called after every batch.
+    """
+    if on_duplicate not in ON_DUPLICATE:
+        raise ValueError(f"Unknown duplicate handling {on_duplicate!r}; expected one of {ON_DUPLICATE}.")
+    if assign is not None and assign not in ASSIGNMENT_MODES:
+        raise ValueError(f"Unknown assignment mode {assign!r}; expected one of {ASSIGNMENT_MODES}.")
+
+    report = LeadImportReport()
+    for number, batch in enumerate(_chunked(rows, batch_size), start=1):
+        batch_report = LeadBatchReport(number=number, rows=len(batch))
+        valid, batch_report.errors = _validate_leads(batch)
+
+        if valid:
+            try:
+                with transaction.atomic():
+                    inserted = _write_leads(valid, on_duplicate, batch_report)
+            except IntegrityError as exc:
+                batch_report.inserted = batch_report.merged = batch_report.skipped = 0
+                batch_report.errors.append((batch[0][0], f"Batch not saved: {exc}"))
+            else:
+                if assign and inserted:
+                    assign_leads(assign, leads=inserted, batch_size=batch_size)
+
+        report.batches.append(batch_report)
+        if on_batch:
+            on_batch(batch_report)
+    return report
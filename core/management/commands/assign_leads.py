@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.assignment import DEFAULT_BATCH_SIZE, MODES, assign_leads
+
+
+class Command(BaseCommand):
+    help = "Assign unassigned leads to active sales users."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=MODES, default='least_open')
+        parser.add_argument('--lead', type=int, action='append', help="Lead id (repeatable; default all unassigned)")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        result = assign_leads(options['mode'], options['lead'], batch_size=options['batch_size'])
+        for user_id, count in sorted(result.assigned.items()):
+            self.stdout.write(f"sales user {user_id}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Assigned {result.total} leads ({result.mode}) in {result.elapsed:.2f}s"
+        ))
@@ -0,0 +1,75 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent-request throughput of running ERP servers. Start the same "
+        "project under ASGI and WSGI first, e.g.\n"
+        "  uvicorn company_erp.asgi:application --port 8001\n"
+        "  gunicorn company_erp.wsgi:application --bind 127.0.0.1:8002 --threads 8\n"
+        "then compare:\n"
+        "  manage.py benchmark_dashboards --user sales1 "
+        "--url asgi=http://127.0.0.1:8001/erp/async/sales/dashboard/ "
+        "--url wsgi=http://127.0.0.1:8002/erp/sales/dashboard/"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append', required=True, help="label=URL (repeatable)")
+        parser.add_argument('--user', required=True, help="Username to authenticate as")
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=32)
+
+    def session_cookie(self, username):
+        """Create a logged-in session for `username` without going through the login form."""
+        user = get_user_model().objects.filter(username=username).first()
+        if user is None:
+            raise CommandError(f"No user named {username!r}")
+        engine = import_string(f'{settings.SESSION_ENGINE}.SessionStore')
+        session = engine()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+    def fetch(self, url, cookie):
+        request = urllib.request.Request(url, headers={'Cookie': cookie})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        return status, time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        cookie = self.session_cookie(options['user'])
+        for target in options['url']:
+            label, sep, url = target.partition('=')
+            if not sep or '://' in label:
+                label, url = target, target
+
+            self.fetch(url, cookie)  # warm up
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                results = list(pool.map(lambda _: self.fetch(url, cookie), range(options['requests'])))
+            elapsed = time.perf_counter() - started
+
+            latencies = sorted(latency for _, latency in results)
+            errors = sum(1 for status, _ in results if status != 200)
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+            self.stdout.write(
+                f"{label}: {len(results) / elapsed:.1f} req/s, "
+                f"p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, "
+                f"{errors} non-200 responses"
+            )
@@ -0,0 +1,69 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request DB queries and latency of a role_required view under each "
+        "session engine, with Django's AuthenticationMiddleware ('uncached') and with "
+        "core.middleware.CachedUserAuthenticationMiddleware ('cached'), e.g.\n"
+        "  manage.py benchmark_sessions --user hr1 --path /erp/hr/dashboard/"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help="Username to authenticate as")
+        parser.add_argument('--path', required=True, help="URL path of the view to request")
+        parser.add_argument('--requests', type=int, default=200)
+
+    def measure(self, user, path, requests):
+        client = Client()
+        client.force_login(user)
+        client.get(path)  # cold request: fills the session and user caches
+
+        queries = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                response = client.get(path)
+            if response.status_code != 200:
+                raise CommandError(f"{path} returned {response.status_code} for {user.username}")
+            queries += len(captured)
+        elapsed = time.perf_counter() - started
+        return queries / requests, elapsed / requests
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f"No user named {options['user']!r}")
+
+        cached_middleware = list(settings.MIDDLEWARE)
+        uncached_middleware = [
+            'django.contrib.auth.middleware.AuthenticationMiddleware'
+            if path == 'core.middleware.CachedUserAuthenticationMiddleware' else path
+            for path in cached_middleware
+        ]
+
+        setup_test_environment()
+        try:
+            for mode, engine in SESSION_ENGINES.items():
+                for label, middleware in (('uncached', uncached_middleware), ('cached', cached_middleware)):
+                    with override_settings(SESSION_ENGINE=engine, MIDDLEWARE=middleware):
+                        queries, latency = self.measure(user, options['path'], options['requests'])
+                    self.stdout.write(
+                        f"{mode:>14} / {label:<8} {queries:5.2f} queries/request, "
+                        f"{latency * 1000:.2f} ms/request (warm)"
+                    )
+        finally:
+            teardown_test_environment()
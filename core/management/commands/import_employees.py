@@ -0,0 +1,34 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.imports import DEFAULT_BATCH_SIZE, detect_format, import_employees, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk-create employee users from a CSV, JSON or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'json', 'jsonl'], help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, help="Password hashing processes (default: one per CPU; 0 = hash inline)")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+
+        def progress(batch):
+            self.stdout.write(f"Batch {batch.number}: {batch.created}/{batch.rows} created, {len(batch.errors)} errors")
+            for number, message in batch.errors:
+                self.stderr.write(f"  row {number}: {message}")
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            report = import_employees(
+                iter_rows(stream, fmt),
+                batch_size=options['batch_size'],
+                workers=os.cpu_count() if options['workers'] is None else options['workers'],
+                on_batch=progress,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.created} of {report.rows} rows ({len(report.errors)} errors)"
+        ))
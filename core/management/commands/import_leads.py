@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from core.assignment import MODES
+from core.imports import DEFAULT_BATCH_SIZE, ON_DUPLICATE, detect_format, import_leads, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk-create leads from a CSV, JSON or JSON Lines file, merging or skipping duplicates."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'json', 'jsonl'], help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--on-duplicate', choices=ON_DUPLICATE, default='merge')
+        parser.add_argument('--assign', choices=MODES, help="Assign the new leads to sales users with this mode")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+
+        def progress(batch):
+            self.stdout.write(
+                f"Batch {batch.number}: {batch.inserted} inserted, {batch.merged} merged, "
+                f"{batch.skipped} skipped, {batch.rejected} rejected of {batch.rows}"
+            )
+            for number, message in batch.errors:
+                self.stderr.write(f"  row {number}: {message}")
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            report = import_leads(
+                iter_rows(stream, fmt),
+                batch_size=options['batch_size'],
+                on_duplicate=options['on_duplicate'],
+                assign=options['assign'],
+                on_batch=progress,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.rows} rows: {report.inserted} inserted, {report.merged} merged, "
+            f"{report.skipped} skipped, {report.rejected} rejected"
+        ))
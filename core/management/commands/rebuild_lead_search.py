@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild_index, search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SQLite FTS5 lead search table (MySQL maintains its FULLTEXT index itself)."
+
+    def handle(self, *args, **options):
+        backend = search_backend()
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Lead search index ready ({backend})."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.hierarchy import rebuild_hierarchy
+
+
+class Command(BaseCommand):
+    help = "Rebuild the org hierarchy closure table from teams, managers and members."
+
+    def handle(self, *args, **options):
+        links = rebuild_hierarchy()
+        self.stdout.write(self.style.SUCCESS(f"Org hierarchy rebuilt ({links} links)."))
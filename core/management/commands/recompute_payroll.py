@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.payroll import recompute_payrolls
+from core.reports import parse_period
+
+
+class Command(BaseCommand):
+    help = "Recompute HRA, allowances, deductions and net salary of existing payrolls from current basic salaries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employee', type=int, action='append', help="Employee id (repeatable; default all)")
+        parser.add_argument('--from', dest='start', help="First period, e.g. 2025-04")
+        parser.add_argument('--to', dest='end', help="Last period, e.g. 2026-03")
+        parser.add_argument('--dry-run', action='store_true', help="Only list the changes")
+
+    def handle(self, *args, **options):
+        try:
+            start, end = parse_period(options['start']), parse_period(options['end'])
+        except ValueError:
+            raise CommandError("Periods must look like 2025-07")
+
+        result = recompute_payrolls(options['employee'], start, end, dry_run=options['dry_run'])
+        if not result.dry_run:
+            self.stdout.write(self.style.SUCCESS(f"Recomputed {result.rows} payrolls"))
+            return
+
+        for delta in result.deltas:
+            old, new = delta['net_salary']
+            self.stdout.write(
+                f"payroll {delta['id']} (employee {delta['employee_id']}, {delta['month']} {delta['year']}): "
+                f"net {old} -> {new} ({new - old:+})"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.rows} payrolls would change, net salary {result.net_change:+} in total (dry run)"
+        ))
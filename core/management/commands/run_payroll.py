@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.forms import PayrollRunForm
+from core.payroll import DEFAULT_BATCH_SIZE, run_payroll
+
+
+class Command(BaseCommand):
+    help = "Generate (or refresh) payroll rows for every employee for a month/year."
+
+    def add_arguments(self, parser):
+        parser.add_argument('month', help="Payroll month, e.g. 'October'")
+        parser.add_argument('year', type=int)
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        form = PayrollRunForm({'month': options['month'], 'year': options['year']})
+        if not form.is_valid():
+            raise CommandError('; '.join(message for messages in form.errors.values() for message in messages))
+        result = run_payroll(form.cleaned_data['month'], form.cleaned_data['year'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Payroll {result.month} {result.year}: {result.created} created, "
+            f"{result.updated} updated in {result.elapsed:.2f}s "
+            f"({result.rows_per_second:.0f} rows/s)"
+        ))
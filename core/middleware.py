@@ -0,0 +1,151 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import caches
+from django.db import connection
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from core import profiling
+
+# --------------------------------
+# Cached Authentication
+# --------------------------------
+def _user_cache():
+    return caches[getattr(settings, 'ERP_AUTH_USER_CACHE', 'default')]
+
+
+def user_cache_key(user_id):
+    return f'erp:auth-user:{user_id}'
+
+
+def forget_cached_user(user_id):
+    # Only reaches other workers when ERP_AUTH_USER_CACHE is shared (see core/checks.py).
+    _user_cache().delete(user_cache_key(user_id))
+
+
+def get_cached_user(request):
+    """
+    The session's user, served from the cache for ERP_AUTH_USER_CACHE_TIMEOUT
+    seconds instead of a core_user lookup on every request.
+
+    The cached copy is only used while the session's auth hash still matches
+    (a password change logs other sessions out as usual); everything else
+    falls through to django.contrib.auth.get_user().
+    """
+    session = request.session
+    try:
+        user_id = session[SESSION_KEY]
+        backend_path = session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return get_user(request)
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return get_user(request)
+
+    cache = _user_cache()
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if (
+        user is not None
+        and user.is_active
+        and constant_time_compare(session.get(HASH_SESSION_KEY, ''), user.get_session_auth_hash())
+    ):
+        user.backend = backend_path
+        return user
+
+    user = get_user(request)
+    if user.is_authenticated:
+        cache.set(key, user, timeout=getattr(settings, 'ERP_AUTH_USER_CACHE_TIMEOUT', 60))
+    return user
+
+
+class CachedUserAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware that resolves request.user through get_cached_user()."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+
+        async def auser():
+            if not hasattr(request, '_acached_user'):
+                request._acached_user = await sync_to_async(get_cached_user)(request)
+            return request._acached_user
+
+        request.auser = auser
+
+# --------------------------------
+# Request Profiling
+# --------------------------------
+class _QueryTimer:
+    """connection.execute_wrapper() hook counting one request's queries and DB time."""
+
+    def __init__(self):
+        self.queries = 0
+        self.elapsed = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.elapsed += time.perf_counter() - started
+            self.queries += 1
+
+
+def _hook(timer):
+    connection.execute_wrappers.append(timer)
+
+
+def _unhook(timer):
+    connection.execute_wrappers.remove(timer)
+
+
+class ProfilingMiddleware:
+    """
+    Report wall time, query count, DB time and response size of every
+    request to core.profiling, keyed by URL name.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        if self.record(request, response, time.perf_counter() - started, timer):
+            profiling.flush()
+        return response
+
+    async def __acall__(self, request):
+        # Async views reach the database through sync_to_async, on the request's
+        # sync thread, whose connection is not the event loop's: hook that one.
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        await sync_to_async(_hook)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_unhook)(timer)
+        if self.record(request, response, time.perf_counter() - started, timer):
+            await sync_to_async(profiling.flush)()  # ORM writes must not run on the event loop
+        return response
+
+    def record(self, request, response, duration, timer):
+        """Report the request to core.profiling; True when closed windows are due to be flushed."""
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else '<unresolved>'
+        size = None if response.streaming else len(response.content)
+        profiling.record(route, duration, timer.queries, timer.elapsed, size)
+        return profiling.flush_due()
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:35
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    # Start each month's counter after the highest ID already handed out.
+    Employee = apps.get_model('core', 'Employee')
+    EmployeeIdSequence = apps.get_model('core', 'EmployeeIdSequence')
+    last_values = {}
+    for employee_id in Employee.objects.values_list('employee_id', flat=True).iterator():
+        if employee_id and len(employee_id) > 6 and employee_id.isdigit():
+            period, number = employee_id[:6], int(employee_id[6:])
+            last_values[period] = max(number, last_values.get(period, 0))
+    EmployeeIdSequence.objects.bulk_create([
+        EmployeeIdSequence(period=period, last_value=value) for period, value in last_values.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_alter_user_role_lead'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(max_length=6, unique=True)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:37
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_payrolls(apps, schema_editor):
+    # Keep the newest row for each (employee, year, month) before the unique constraint is added.
+    Payroll = apps.get_model('core', 'Payroll')
+    duplicates = (
+        Payroll.objects.values('employee_id', 'year', 'month')
+        .annotate(rows=Count('id'), keep=Max('id'))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        Payroll.objects.filter(
+            employee_id=group['employee_id'], year=group['year'], month=group['month']
+        ).exclude(id=group['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0006_employeeidsequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['assigned_to', 'status'], name='lead_assignee_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['assigned_to', 'created_at', 'id'], name='lead_assignee_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['created_at', 'id'], name='lead_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payroll',
+            index=models.Index(fields=['year', 'month'], name='payroll_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payroll',
+            index=models.Index(fields=['created_at', 'id'], name='payroll_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teamreport',
+            index=models.Index(fields=['team', 'created_at', 'id'], name='teamreport_team_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role'], name='user_role_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_payrolls, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='payroll',
+            constraint=models.UniqueConstraint(fields=('employee', 'year', 'month'), name='unique_payroll_employee_period'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+SEARCH_COLUMNS = 'name, company, email, phone, notes'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(f'ALTER TABLE core_lead ADD FULLTEXT INDEX lead_search_idx ({SEARCH_COLUMNS})')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'CREATE VIRTUAL TABLE core_lead_fts USING fts5({SEARCH_COLUMNS})')
+        schema_editor.execute(
+            f'INSERT INTO core_lead_fts (rowid, {SEARCH_COLUMNS}) '
+            "SELECT id, name, COALESCE(company, ''), COALESCE(email, ''), COALESCE(phone, ''), "
+            "COALESCE(notes, '') FROM core_lead"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE core_lead DROP INDEX lead_search_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE core_lead_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
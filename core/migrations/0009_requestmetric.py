@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_lead_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('route', models.CharField(max_length=200)),
+                ('window_start', models.DateTimeField()),
+                ('window_seconds', models.PositiveIntegerField()),
+                ('requests', models.PositiveIntegerField()),
+                ('p50_ms', models.FloatField()),
+                ('p95_ms', models.FloatField()),
+                ('p99_ms', models.FloatField()),
+                ('avg_queries', models.FloatField()),
+                ('avg_db_ms', models.FloatField()),
+                ('avg_bytes', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['route', 'window_start'], name='requestmetric_route_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:55
+
+import calendar
+import datetime
+
+from django.db import migrations, models
+
+
+def period_of(month, year):
+    # Frozen copy of Payroll.period_of() as of this migration.
+    name = str(month or '').strip().lower()
+    number = None
+    if name.isdigit():
+        number = int(name)
+    else:
+        for index in range(1, 13):
+            if name in (calendar.month_name[index].lower(), calendar.month_abbr[index].lower()):
+                number = index
+    try:
+        return datetime.date(int(year), number, 1) if number else None
+    except (TypeError, ValueError):
+        return None
+
+
+def fill_periods(apps, schema_editor):
+    # One UPDATE per distinct (month, year) pair rather than one per row.
+    Payroll = apps.get_model('core', 'Payroll')
+    pairs = Payroll.objects.order_by().values_list('month', 'year').distinct()
+    for month, year in list(pairs):
+        period = period_of(month, year)
+        if period:
+            Payroll.objects.filter(month=month, year=year).update(period=period)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_requestmetric'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payroll',
+            name='payroll_period_idx',
+        ),
+        migrations.AddField(
+            model_name='payroll',
+            name='period',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_periods, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='payroll',
+            index=models.Index(fields=['period', 'id'], name='payroll_period_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payroll',
+            index=models.Index(fields=['employee', 'period'], name='payroll_employee_period_idx'),
+        ),
+    ]
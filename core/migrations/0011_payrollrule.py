@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_payroll_period'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(blank=True, max_length=100)),
+                ('designation', models.CharField(blank=True, max_length=100)),
+                ('hra_rate', models.DecimalField(decimal_places=4, max_digits=5)),
+                ('allowances_rate', models.DecimalField(decimal_places=4, max_digits=5)),
+                ('deductions_rate', models.DecimalField(decimal_places=4, max_digits=5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('department', 'designation'), name='unique_payroll_rule_scope')],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_links(apps, schema_editor):
+    # Frozen copy of core.hierarchy.refresh_teams() as of this migration.
+    Team = apps.get_model('core', 'Team')
+    OrgLink = apps.get_model('core', 'OrgLink')
+
+    def users_by_team(through):
+        users = {}
+        for team_id, user_id in through.objects.values_list('team_id', 'user_id'):
+            users.setdefault(team_id, set()).add(user_id)
+        return users
+
+    managers, members = users_by_team(Team.managers.through), users_by_team(Team.members.through)
+    links = []
+    for team_id, head_id in Team.objects.values_list('pk', 'head_manager_id'):
+        paths = [(0, head_id, manager_id, 1) for manager_id in managers.get(team_id, ())]
+        for member_id in members.get(team_id, ()):
+            paths.append((0, head_id, member_id, 2))
+            paths.extend((1, manager_id, member_id, 1) for manager_id in managers.get(team_id, ()))
+        links.extend(
+            OrgLink(team_id=team_id, ancestor_id=ancestor, descendant_id=descendant, ancestor_level=level, depth=depth)
+            for level, ancestor, descendant, depth in paths
+            if ancestor != descendant
+        )
+    OrgLink.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_payrollrule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrgLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ancestor_level', models.PositiveSmallIntegerField(choices=[(0, 'Head manager'), (1, 'Manager')])),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='org_descendant_links', to=settings.AUTH_USER_MODEL)),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='org_ancestor_links', to=settings.AUTH_USER_MODEL)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ancestor', 'depth', 'descendant'], name='orglink_ancestor_idx'), models.Index(fields=['descendant', 'ancestor_level', 'ancestor'], name='orglink_descendant_idx')],
+                'constraints': [models.UniqueConstraint(fields=('team', 'ancestor', 'descendant', 'depth'), name='unique_org_link')],
+            },
+        ),
+        migrations.RunPython(fill_links, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+def fill_updated_at(apps, schema_editor):
+    # Existing payrolls were last written when created; employees start at the migration time.
+    Payroll = apps.get_model('core', 'Payroll')
+    Payroll.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_orglink'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='payroll',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:15
+
+import hashlib
+import re
+
+from django.db import migrations, models
+
+COMPANY_SUFFIXES = {'co', 'company', 'corp', 'corporation', 'inc', 'limited', 'llc', 'llp', 'ltd', 'private', 'pvt'}
+
+
+def fingerprint_of(email, phone, company):
+    # Frozen copy of Lead.fingerprint_of() as of this migration.
+    email = str(email or '').strip().lower()
+    if email:
+        identity = f'email:{email}'
+    else:
+        phone = re.sub(r'\D', '', str(phone or ''))[-10:]
+        if not phone:
+            return ''
+        words = re.sub(r'[^\w\s]', ' ', ' '.join(str(company or '').split()).casefold()).split()
+        while words and words[-1] in COMPANY_SUFFIXES:
+            words.pop()
+        identity = f"phone:{phone}|company:{' '.join(words)}"
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def fill_fingerprints(apps, schema_editor):
+    Lead = apps.get_model('core', 'Lead')
+    batch = []
+    for lead in Lead.objects.only('email', 'phone', 'company').iterator(chunk_size=1000):
+        lead.fingerprint = fingerprint_of(lead.email, lead.phone, lead.company)
+        batch.append(lead)
+        if len(batch) >= 1000:
+            Lead.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    Lead.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(fill_fingerprints, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['fingerprint'], name='lead_fingerprint_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+import calendar
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def canonical_months(apps, schema_editor):
+    # Months are stored by full name from now on (Payroll.month_name()). Rows
+    # that only differed in spelling ('March', 'march', 'Mar') are one period:
+    # keep the most recently updated and drop the rest before renaming.
+    Payroll = apps.get_model('core', 'Payroll')
+    rows = (
+        Payroll.objects.exclude(period=None)
+        .order_by('employee_id', 'period', '-updated_at', '-id')
+        .values_list('id', 'employee_id', 'period', 'month')
+    )
+    duplicates, renames, previous = [], {}, None
+    for pk, employee_id, period, month in rows.iterator(chunk_size=BATCH_SIZE):
+        if (employee_id, period) == previous:
+            duplicates.append(pk)
+            continue
+        previous = (employee_id, period)
+        name = calendar.month_name[period.month]
+        if month != name:
+            renames.setdefault(name, []).append(pk)
+
+    for start in range(0, len(duplicates), BATCH_SIZE):
+        Payroll.objects.filter(pk__in=duplicates[start:start + BATCH_SIZE]).delete()
+    for name, ids in renames.items():
+        for start in range(0, len(ids), BATCH_SIZE):
+            Payroll.objects.filter(pk__in=ids[start:start + BATCH_SIZE]).update(month=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_lead_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(canonical_months, migrations.RunPython.noop),
+    ]
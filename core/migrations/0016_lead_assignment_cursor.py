@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_canonical_payroll_months'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadAssignmentCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_user_id', models.PositiveIntegerField(null=True)),
+            ],
+        ),
+    ]
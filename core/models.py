@@ -1,5 +1,11 @@
+import calendar
+import datetime
+import hashlib
+import re
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 # -------------------------------
 # Custom User Model
@@ -25,9 +31,54 @@ class User(AbstractUser):
     ]
     role = models.CharField(max_length=30, choices=ROLE_CHOICES, default='customer')
 
+    class Meta(AbstractUser.Meta):
+        swappable = 'AUTH_USER_MODEL'
+        indexes = [
+            models.Index(fields=['role'], name='user_role_idx'),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
 
+# -------------------------------
+# Employee ID Sequence
+# -------------------------------
+class EmployeeIdSequence(models.Model):
+    """
+    Per-month counter behind employee IDs (YYYYMM + 4-digit number).
+
+    The row for a month is locked with select_for_update while it is bumped, so
+    concurrent saves never get the same number and deleted employees never
+    free their number for reuse.
+    """
+    period = models.CharField(max_length=6, unique=True)  # e.g. 202510
+    last_value = models.PositiveIntegerField(default=0)
+
+    @staticmethod
+    def current_period():
+        return timezone.localdate().strftime("%Y%m")
+
+    @classmethod
+    def reserve(cls, count=1, period=None):
+        """Reserve `count` consecutive employee IDs and return them as a list."""
+        if count < 1:
+            return []
+        period = period or cls.current_period()
+        with transaction.atomic():
+            sequence, _ = cls.objects.select_for_update().get_or_create(period=period)
+            start = sequence.last_value + 1
+            sequence.last_value += count
+            sequence.save(update_fields=['last_value'])
+        return [f"{period}{number:04d}" for number in range(start, start + count)]
+
+    @classmethod
+    def next_id(cls, period=None):
+        return cls.reserve(1, period)[0]
+
+    def __str__(self):
+        return f"{self.period}: {self.last_value}"
+
+
 # -------------------------------
 # Employee Model
 # -------------------------------
@@ -39,15 +90,11 @@ class Employee(models.Model):
     contact_number = models.CharField(max_length=15)
     photo = models.ImageField(upload_to='employee_photos/', blank=True, null=True)
     basic_salary = models.DecimalField(max_digits=10, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         if not self.employee_id:
-            from datetime import datetime
-            year_month = datetime.now().strftime("%Y%m")
-            same_month_count = Employee.objects.filter(
-                employee_id__startswith=year_month
-            ).count() + 1
-            self.employee_id = f"{year_month}{same_month_count:04d}"  # e.g., 2025100001
+            self.employee_id = EmployeeIdSequence.next_id()  # e.g., 2025100001
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -57,27 +104,126 @@ class Employee(models.Model):
 # -------------------------------
 # Payroll Model
 # -------------------------------
-from decimal import Decimal
+from decimal import ROUND_HALF_UP, Decimal
+
+PAISA = Decimal('0.01')
 
 class Payroll(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
     month = models.CharField(max_length=20)
     year = models.IntegerField()
+    # First day of month/year, kept in sync on save; NULL when `month` is not a month name.
+    period = models.DateField(null=True, blank=True, editable=False)
     hra = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     allowances = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     deductions = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     net_salary = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
-        basic = self.employee.basic_salary
-        self.hra = basic * Decimal('0.20')
-        self.allowances = basic * Decimal('0.10')
-        self.deductions = basic * Decimal('0.05')
-        self.net_salary = basic + self.hra + self.allowances - self.deductions
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'year', 'month'], name='unique_payroll_employee_period'),
+        ]
+        indexes = [
+            models.Index(fields=['period', 'id'], name='payroll_period_date_idx'),
+            models.Index(fields=['employee', 'period'], name='payroll_employee_period_idx'),
+            models.Index(fields=['created_at', 'id'], name='payroll_created_idx'),
+        ]
+
+    @staticmethod
+    def period_of(month, year):
+        """
+        The first day of a payroll period, e.g. ('March', 2025) -> date(2025, 3, 1).
+
+        `month` may be a full or abbreviated month name in any case, or a month
+        number; anything else gives None.
+        """
+        name = str(month or '').strip().lower()
+        number = None
+        if name.isdigit():
+            number = int(name)
+        else:
+            for index in range(1, 13):
+                if name in (calendar.month_name[index].lower(), calendar.month_abbr[index].lower()):
+                    number = index
+        try:
+            return datetime.date(int(year), number, 1) if number else None
+        except (TypeError, ValueError):
+            return None
+
+    @classmethod
+    def month_name(cls, month):
+        """The full name of `month` ('mar', '3' -> 'March'); `month` itself when it is not a month."""
+        period = cls.period_of(month, 2000)
+        return calendar.month_name[period.month] if period else month
+
+    # Share of the basic salary; net = basic + HRA + allowances - deductions.
+    HRA_RATE = Decimal('0.20')
+    ALLOWANCES_RATE = Decimal('0.10')
+    DEDUCTIONS_RATE = Decimal('0.05')
+
+    @classmethod
+    def salary_rates(cls):
+        """{component: multiplier of the basic salary} for each rated column."""
+        return {
+            'hra': cls.HRA_RATE,
+            'allowances': cls.ALLOWANCES_RATE,
+            'deductions': cls.DEDUCTIONS_RATE,
+        }
+
+    @classmethod
+    def salary_components(cls, basic):
+        """
+        Return the HRA, allowances, deductions and net salary for a basic salary
+        at the default rates (PayrollRule overrides them, see core/rules.py).
+        Each rate is rounded half-up to the paisa like SQL ROUND() (see
+        core/payroll.py), and net salary is the sum of the rounded figures, so
+        a stored row always adds up.
+        """
+        components = {
+            field: (basic * rate).quantize(PAISA, rounding=ROUND_HALF_UP)
+            for field, rate in cls.salary_rates().items()
+        }
+        components['net_salary'] = basic + components['hra'] + components['allowances'] - components['deductions']
+        return components
+
+    def save(self, *args, rules=None, **kwargs):
+        """`rules` is a compiled PayrollRules set; by default the saved rules, cached (see core/rules.py)."""
+        from .rules import PayrollRules
+        employee = self.employee
+        rules = rules or PayrollRules.current()
+        components = rules.components(employee.basic_salary, employee.department, employee.designation)
+        for field, value in components.items():
+            setattr(self, field, value)
+        # Stored by full name, so 'March' and 'march' hit the same (employee, year, month) constraint.
+        self.month = self.month_name(self.month)
+        self.period = self.period_of(self.month, self.year)
         super().save(*args, **kwargs)
 
 
+class PayrollRule(models.Model):
+    """
+    Salary rates for a department and/or designation (blank matches any).
+    The most specific rule wins: department and designation, then department,
+    then designation, then the Payroll class defaults. See core/rules.py.
+    """
+    department = models.CharField(max_length=100, blank=True)
+    designation = models.CharField(max_length=100, blank=True)
+    hra_rate = models.DecimalField(max_digits=5, decimal_places=4)
+    allowances_rate = models.DecimalField(max_digits=5, decimal_places=4)
+    deductions_rate = models.DecimalField(max_digits=5, decimal_places=4)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['department', 'designation'], name='unique_payroll_rule_scope'),
+        ]
+
+    def __str__(self):
+        return f"{self.department or 'Any department'} / {self.designation or 'any designation'}"
+
+
 
 
 class Team(models.Model):
@@ -115,8 +261,41 @@ class TeamReport(models.Model):
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['team', 'created_at', 'id'], name='teamreport_team_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.team.name} - {self.title}"
+
+
+class OrgLink(models.Model):
+    """
+    Closure table of the reporting structure (see core/hierarchy.py): one row
+    per (team, ancestor, descendant) path, head manager -> managers -> members.
+    Maintained from Team and its membership signals; never edit it directly.
+    """
+    HEAD_MANAGER, MANAGER = 0, 1
+    LEVEL_CHOICES = [(HEAD_MANAGER, 'Head manager'), (MANAGER, 'Manager')]
+
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='+')
+    ancestor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='org_descendant_links')
+    descendant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='org_ancestor_links')
+    ancestor_level = models.PositiveSmallIntegerField(choices=LEVEL_CHOICES)
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['team', 'ancestor', 'descendant', 'depth'], name='unique_org_link'),
+        ]
+        indexes = [
+            models.Index(fields=['ancestor', 'depth', 'descendant'], name='orglink_ancestor_idx'),
+            models.Index(fields=['descendant', 'ancestor_level', 'ancestor'], name='orglink_descendant_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth}) via team {self.team_id}"
     
 
 
@@ -126,6 +305,8 @@ class Lead(models.Model):
         ('In Progress', 'In Progress'),
         ('Closed', 'Closed'),
     ]
+    # Statuses that still count towards a sales user's workload.
+    OPEN_STATUSES = ('Open', 'In Progress')
 
     PRIORITY_CHOICES = [
         ('Low', 'Low'),
@@ -143,6 +324,105 @@ class Lead(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     notes = models.TextField(blank=True, null=True)
+    # Dedupe key from the normalized email/phone/company, kept in sync on save; blank without email or phone.
+    fingerprint = models.CharField(max_length=64, blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['assigned_to', 'status'], name='lead_assignee_status_idx'),
+            models.Index(fields=['assigned_to', 'created_at', 'id'], name='lead_assignee_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='lead_created_idx'),
+            models.Index(fields=['fingerprint'], name='lead_fingerprint_idx'),
+        ]
+
+    COMPANY_SUFFIXES = {'co', 'company', 'corp', 'corporation', 'inc', 'limited', 'llc', 'llp', 'ltd', 'private', 'pvt'}
+
+    @staticmethod
+    def normalize_email(email):
+        return str(email or '').strip().lower()
+
+    @staticmethod
+    def normalize_phone(phone):
+        """Digits only, keeping the last ten so '+91 98765-43210' and '9876543210' match."""
+        digits = re.sub(r'\D', '', str(phone or ''))
+        return digits[-10:] if len(digits) > 10 else digits
+
+    @staticmethod
+    def normalize_company(company):
+        """Collapse whitespace, e.g. '  Acme   Pvt. Ltd ' -> 'Acme Pvt. Ltd'."""
+        return ' '.join(str(company or '').split())
+
+    @classmethod
+    def company_key(cls, company):
+        """Company as compared for dedupe: 'Acme Pvt. Ltd.' and 'ACME' give 'acme'."""
+        words = re.sub(r'[^\w\s]', ' ', cls.normalize_company(company).casefold()).split()
+        while words and words[-1] in cls.COMPANY_SUFFIXES:
+            words.pop()
+        return ' '.join(words)
+
+    @classmethod
+    def fingerprint_of(cls, email=None, phone=None, company=None):
+        """
+        SHA-256 of the lead's identity: the email when there is one, otherwise
+        the phone number within its company. '' when neither is known, so such
+        leads are never merged.
+        """
+        email = cls.normalize_email(email)
+        if email:
+            identity = f'email:{email}'
+        else:
+            phone = cls.normalize_phone(phone)
+            if not phone:
+                return ''
+            identity = f'phone:{phone}|company:{cls.company_key(company)}'
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.fingerprint = self.fingerprint_of(self.email, self.phone, self.company)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'email', 'phone', 'company'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'fingerprint'}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.name} - {self.status}"
+
+
+class LeadAssignmentCursor(models.Model):
+    """
+    Where round-robin lead assignment (core/assignment.py) stopped: a single
+    row, locked with select_for_update for the length of a run so concurrent
+    runs take turns. A plain user id rather than a ForeignKey, so deleting that
+    user keeps the position instead of restarting the cycle.
+    """
+    last_user_id = models.PositiveIntegerField(null=True)
+
+    @classmethod
+    def lock(cls):
+        """The cursor row, locked until the current transaction ends; created on first use."""
+        return cls.objects.select_for_update().get_or_create(pk=1)[0]
+
+    def __str__(self):
+        return f"Round robin after user {self.last_user_id}"
+
+
+class RequestMetric(models.Model):
+    """One route's request figures for one closed profiling window (see core/profiling.py)."""
+    route = models.CharField(max_length=200)
+    window_start = models.DateTimeField()
+    window_seconds = models.PositiveIntegerField()
+    requests = models.PositiveIntegerField()
+    p50_ms = models.FloatField()
+    p95_ms = models.FloatField()
+    p99_ms = models.FloatField()
+    avg_queries = models.FloatField()
+    avg_db_ms = models.FloatField()
+    avg_bytes = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['route', 'window_start'], name='requestmetric_route_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.name} - {self.status}"
\ No newline at end of file
+        return f"{self.route} @ {self.window_start}"
@@ -0,0 +1,209 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# -------------------------------
+# Keyset (cursor) Pagination
+# -------------------------------
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    size: int
+    has_next: bool = False
+    has_previous: bool = False
+    next_query: str = ''
+    previous_query: str = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _json_value(value):
+    # Full-precision isoformat: DjangoJSONEncoder would truncate microseconds.
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_cursor(values):
+    raw = json.dumps(values, default=_json_value).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, model, names):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(names):
+            return None
+        return [model._meta.get_field(name).to_python(value) for name, value in zip(names, values)]
+    except (ValueError, TypeError, binascii.Error, ValidationError):
+        return None
+
+
+def _page_size(request, prefix, default):
+    try:
+        size = int(request.GET.get(f'{prefix}size', default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _seek(ordering, values, forward):
+    """Match rows strictly after (or before) `values` in `ordering`."""
+    clauses, equal = [], {}
+    for key, value in zip(ordering, values):
+        name, descending = key.lstrip('-'), key.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        clauses.append(Q(**equal, **{f'{name}__{lookup}': value}))
+        equal[name] = value
+    return reduce(or_, clauses)
+
+
+def _reverse(ordering):
+    return [key[1:] if key.startswith('-') else f'-{key}' for key in ordering]
+
+
+def _keyset_query(request, queryset, ordering, page_size, prefix):
+    """Work out the page request and return (state, limited queryset)."""
+    ordering = list(ordering)
+    names = [key.lstrip('-') for key in ordering]
+    size = _page_size(request, prefix, page_size)
+
+    after = request.GET.get(f'{prefix}after')
+    before = request.GET.get(f'{prefix}before')
+    forward = not before
+    cursor = _decode_cursor(after if forward else before, queryset.model, names) if (after or before) else None
+
+    if forward:
+        qs = queryset.order_by(*ordering)
+    else:
+        qs = queryset.order_by(*_reverse(ordering))
+    if cursor is not None:
+        qs = qs.filter(_seek(ordering, cursor, forward))
+
+    state = {'names': names, 'size': size, 'forward': forward, 'cursor': cursor, 'prefix': prefix}
+    return state, qs[:size + 1]
+
+
+def _keyset_page(request, state, rows):
+    size, forward, prefix = state['size'], state['forward'], state['prefix']
+    more = len(rows) > size
+    rows = rows[:size]
+    if not forward:
+        rows.reverse()
+
+    page = KeysetPage(object_list=rows, size=size)
+    if forward:
+        page.has_next, page.has_previous = more, state['cursor'] is not None
+    else:
+        page.has_next, page.has_previous = state['cursor'] is not None, more
+
+    def query_for(direction, row):
+        params = request.GET.copy()
+        params.pop(f'{prefix}after', None)
+        params.pop(f'{prefix}before', None)
+        params[f'{prefix}{direction}'] = _encode_cursor([getattr(row, name) for name in state['names']])
+        return params.urlencode()
+
+    if rows and page.has_next:
+        page.next_query = query_for('after', rows[-1])
+    if rows and page.has_previous:
+        page.previous_query = query_for('before', rows[0])
+    return page
+
+
+def paginate_keyset(request, queryset, ordering=('-created_at', '-id'), page_size=DEFAULT_PAGE_SIZE, prefix=''):
+    """
+    Return one page of `queryset` using keyset pagination.
+
+    `ordering` must end with a unique column (normally `id`) so that the order
+    is stable. The cursor for the next/previous page is the encoded sort key
+    of the last/first row, so every page is an index seek no matter how deep
+    it is, unlike OFFSET. `prefix` namespaces the query parameters when a
+    page shows more than one paginated list.
+    """
+    state, qs = _keyset_query(request, queryset, ordering, page_size, prefix)
+    return _keyset_page(request, state, list(qs))
+
+
+async def apaginate_keyset(request, queryset, ordering=('-created_at', '-id'), page_size=DEFAULT_PAGE_SIZE, prefix=''):
+    """Async version of paginate_keyset() for async views."""
+    state, qs = _keyset_query(request, queryset, ordering, page_size, prefix)
+    return _keyset_page(request, state, [row async for row in qs])
+
+
+# -------------------------------
+# Estimated-count Paginator (admin changelists)
+# -------------------------------
+def estimated_row_count(model):
+    """
+    Row count of `model`'s table from the database's statistics, or None.
+
+    MySQL reads information_schema, PostgreSQL reads pg_class and SQLite reads
+    sqlite_stat1 (only populated after ANALYZE). The figure is approximate.
+    """
+    table = model._meta.db_table
+    queries = {
+        'mysql': (
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+        ),
+        'postgresql': "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+        'sqlite': "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1",
+    }
+    sql = queries.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not row or row[0] is None:
+        return None
+    try:
+        # sqlite_stat1.stat is "<rows> <rows per key> ..."
+        estimate = int(str(row[0]).split()[0])
+    except ValueError:
+        return None
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that skips the exact COUNT(*) on large unfiltered tables.
+
+    Once the table statistics report at least ERP_ESTIMATED_COUNT_THRESHOLD
+    rows (setting, default 100000; 0/None disables), an unfiltered queryset is
+    counted from the statistics. Filtered querysets, such as admin searches,
+    are still counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        threshold = getattr(settings, 'ERP_ESTIMATED_COUNT_THRESHOLD', 100000)
+        query = getattr(self.object_list, 'query', None)
+        if threshold and query is not None and not query.where and not query.distinct:
+            estimate = estimated_row_count(self.object_list.model)
+            if estimate is not None and estimate >= threshold:
+                return estimate
+        return super().count
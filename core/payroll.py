@@ -0,0 +1,158 @@
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Now
+
+from .dashboard_cache import invalidate
+from .models import PAISA, Employee, Payroll
+from .reports import in_periods
+from .rules import PayrollRules
+
+# -------------------------------
+# Bulk Payroll Run
+# -------------------------------
+DEFAULT_BATCH_SIZE = 500
+
+
+@dataclass
+class PayrollRunResult:
+    month: str
+    year: int
+    created: int = 0
+    updated: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def total(self):
+        return self.created + self.updated
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed:
+            return float(self.total)
+        return self.total / self.elapsed
+
+
+def _chunked(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_payroll(month, year, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Generate payroll rows for every employee for the given month/year.
+
+    Salaries are read with one query, computed a batch at a time by the
+    payroll rules engine (core/rules.py) and each batch is written with a single
+    upsert (INSERT ... ON CONFLICT (employee, year, month) DO UPDATE, or
+    INSERT ... ON DUPLICATE KEY UPDATE on MySQL), so re-running a month updates
+    rows in place instead of duplicating them.
+
+    The employees and their existing payrolls for the month are read with
+    SELECT ... FOR UPDATE, so a concurrent run of the same month waits for this
+    one and the created/updated counts stay exact.
+    """
+    year = int(year)
+    month = Payroll.month_name(month)
+    period = Payroll.period_of(month, year)
+    result = PayrollRunResult(month=month, year=year)
+    started = time.perf_counter()
+
+    rules = PayrollRules.load()
+    employees = (
+        Employee.objects.select_for_update()
+        .order_by('id')
+        .values_list('id', 'basic_salary', 'department', 'designation')
+    )
+    # MySQL's ON DUPLICATE KEY UPDATE fires on any unique key and takes no target.
+    upsert_target = (
+        {'unique_fields': ['employee', 'year', 'month']}
+        if connection.features.supports_update_conflicts_with_target else {}
+    )
+    with transaction.atomic():
+        for batch in _chunked(employees.iterator(chunk_size=batch_size), batch_size):
+            salaries = rules.calculate(batch)
+            existing = len(Payroll.objects.select_for_update().filter(
+                month=month, year=year, employee_id__in=salaries.employee_ids
+            ).values_list('id', flat=True))
+            Payroll.objects.bulk_create(
+                [
+                    Payroll(employee_id=emp_id, month=month, year=year, period=period,
+                            **salaries.components(index))
+                    for index, emp_id in enumerate(salaries.employee_ids)
+                ],
+                batch_size=batch_size,
+                update_conflicts=True,
+                **upsert_target,
+                update_fields=['period', 'hra', 'allowances', 'deductions', 'net_salary', 'updated_at'],
+            )
+            result.created += len(batch) - existing
+            result.updated += existing
+
+    # bulk_create sends no post_save signals
+    invalidate('payroll', 'payrolls')
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+# -------------------------------
+# Incremental Recompute
+# -------------------------------
+@dataclass
+class PayrollRecomputeResult:
+    dry_run: bool
+    rows: int = 0
+    deltas: list = field(default_factory=list)  # dry runs only, see recompute_payrolls()
+
+    @property
+    def net_change(self):
+        return sum((delta['net_salary'][1] - delta['net_salary'][0] for delta in self.deltas), Decimal(0))
+
+
+def recompute_payrolls(employees=None, start=None, end=None, dry_run=False, rules=None):
+    """
+    Bring HRA, allowances, deductions and net salary of existing payrolls in
+    line with the employees' current basic salaries under `rules` (default:
+    the saved PayrollRule set).
+
+    `employees` (ids or an Employee queryset) and the period range `start`
+    through `end` choose the payrolls; rows that are already correct are left
+    alone. The update is one UPDATE ... SET statement: each column reads its
+    employee through a correlated subquery rather than a join, so it stays a
+    single statement on every backend. With `dry_run`, nothing
+    is written and `deltas` lists every row that would change:
+    {'id', 'employee_id', 'month', 'year', <column>: (old, new), ...}.
+    """
+    expressions = (rules or PayrollRules.load()).sql_components()
+    payrolls = in_periods(Payroll.objects.all(), start, end)
+    if employees is not None:
+        payrolls = payrolls.filter(employee__in=employees)
+    stale = Q()
+    for column, expression in expressions.items():
+        stale |= ~Q(**{column: expression})
+    payrolls = payrolls.filter(stale)
+
+    result = PayrollRecomputeResult(dry_run=dry_run)
+    if not dry_run:
+        result.rows = payrolls.update(**expressions, updated_at=Now())
+        if result.rows:
+            invalidate('payrolls')  # update() sends no signals
+        return result
+
+    computed = {f'new_{column}': expression for column, expression in expressions.items()}
+    for row in payrolls.annotate(**computed).values('id', 'employee_id', 'month', 'year', *expressions, *computed):
+        delta = {key: row[key] for key in ('id', 'employee_id', 'month', 'year')}
+        for column in expressions:
+            delta[column] = (row[column], Decimal(row[f'new_{column}']).quantize(PAISA))
+        result.deltas.append(delta)
+    result.rows = len(result.deltas)
+    return result
@@ -0,0 +1,241 @@
+import datetime
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+# -------------------------------
+# Request Profiling
+# -------------------------------
+# ProfilingMiddleware (core/middleware.py) reports every request here, per URL
+# name. Each metric goes into a fixed-bucket histogram, so recording is a
+# bisect and an increment under a lock, whatever the traffic. Two copies are
+# kept per route:
+#   cumulative   since the process started (Prometheus counters)
+#   windows      the last ERP_PERF_WINDOWS slices of ERP_PERF_WINDOW_SECONDS
+#                each, merged for the rolling percentiles on /erp/admin/perf/
+INF = float('inf')
+
+METRICS = {
+    'duration_seconds': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, INF),
+    'db_queries': (0, 1, 2, 3, 5, 10, 20, 50, 100, 500, INF),
+    'db_duration_seconds': (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, INF),
+    'response_size_bytes': (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, INF),
+}
+
+_lock = threading.Lock()
+_routes = {}
+_last_flushed_slot = None
+
+
+def _window_seconds():
+    return getattr(settings, 'ERP_PERF_WINDOW_SECONDS', 60)
+
+
+def _window_count():
+    return getattr(settings, 'ERP_PERF_WINDOWS', 5)
+
+
+@dataclass
+class Histogram:
+    bounds: tuple
+    counts: list = None
+    total: float = 0
+    count: int = 0
+
+    def __post_init__(self):
+        if self.counts is None:
+            self.counts = [0] * len(self.bounds)
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        self.count += other.count
+
+    def percentile(self, q):
+        """Estimate the q-th percentile (0-100), interpolating inside the bucket that holds it."""
+        if not self.count:
+            return None
+        rank = self.count * q / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[i - 1] if i else 0
+                upper = self.bounds[i]
+                if upper == INF:
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-2]
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+def _histograms():
+    return {metric: Histogram(bounds) for metric, bounds in METRICS.items()}
+
+
+@dataclass
+class RouteStats:
+    cumulative: dict = field(default_factory=_histograms)
+    windows: dict = field(default_factory=dict)  # slot number -> histograms
+
+    def observe(self, slot, values):
+        window = self.windows.get(slot)
+        if window is None:
+            window = self.windows[slot] = _histograms()
+            for old in [s for s in self.windows if s <= slot - _window_count()]:
+                del self.windows[old]
+        for metric, value in values.items():
+            if value is not None:
+                self.cumulative[metric].observe(value)
+                window[metric].observe(value)
+
+    def rolling(self, slot):
+        merged = _histograms()
+        for window_slot, window in self.windows.items():
+            if window_slot > slot - _window_count():
+                for metric, histogram in window.items():
+                    merged[metric].merge(histogram)
+        return merged
+
+
+def current_slot(now=None):
+    return int((time.time() if now is None else now) // _window_seconds())
+
+
+def record(route, duration, queries, db_duration, size):
+    """Add one request's measurements; `size` is None for streamed responses."""
+    values = {
+        'duration_seconds': duration,
+        'db_queries': queries,
+        'db_duration_seconds': db_duration,
+        'response_size_bytes': size,
+    }
+    slot = current_slot()
+    with _lock:
+        stats = _routes.get(route)
+        if stats is None:
+            stats = _routes[route] = RouteStats()
+        stats.observe(slot, values)
+
+
+def reset():
+    global _last_flushed_slot
+    with _lock:
+        _routes.clear()
+        _last_flushed_slot = None
+
+
+def route_summaries():
+    """Rolling-window figures per route, slowest p95 first, for the perf page."""
+    slot = current_slot()
+    with _lock:
+        rolling = {route: stats.rolling(slot) for route, stats in _routes.items()}
+
+    rows = []
+    for route, histograms in rolling.items():
+        duration = histograms['duration_seconds']
+        if not duration.count:
+            continue
+        rows.append({
+            'route': route,
+            'requests': duration.count,
+            'p50_ms': duration.percentile(50) * 1000,
+            'p95_ms': duration.percentile(95) * 1000,
+            'p99_ms': duration.percentile(99) * 1000,
+            'avg_queries': histograms['db_queries'].mean,
+            'p95_queries': histograms['db_queries'].percentile(95),
+            'avg_db_ms': histograms['db_duration_seconds'].mean * 1000,
+            'avg_bytes': histograms['response_size_bytes'].mean,
+        })
+    rows.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return rows
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _bound(value):
+    return '+Inf' if value == INF else repr(float(value))
+
+
+def prometheus_text():
+    """Cumulative histograms in the Prometheus text exposition format (0.0.4)."""
+    with _lock:
+        snapshot = {
+            route: {metric: Histogram(h.bounds, list(h.counts), h.total, h.count)
+                    for metric, h in stats.cumulative.items()}
+            for route, stats in _routes.items()
+        }
+
+    lines = []
+    for metric in METRICS:
+        name = f'erp_request_{metric}'
+        lines.append(f'# TYPE {name} histogram')
+        for route in sorted(snapshot):
+            histogram = snapshot[route][metric]
+            route_label = f'route="{_label(route)}"'
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{route_label},le="{_bound(bound)}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{route_label}}} {histogram.total!r}')
+            lines.append(f'{name}_count{{{route_label}}} {histogram.count}')
+    return '\n'.join(lines) + '\n'
+
+
+def flush_due():
+    """True once a window has closed since the last flush (only with ERP_PERF_FLUSH on)."""
+    if not getattr(settings, 'ERP_PERF_FLUSH', False):
+        return False
+    last = _last_flushed_slot
+    return last is None or current_slot() - 1 > last
+
+
+def flush():
+    """
+    Write one RequestMetric row per route for every closed window not yet
+    written, and return how many rows were created.
+    """
+    global _last_flushed_slot
+    from .models import RequestMetric
+
+    slot = current_slot()
+    width = _window_seconds()
+    rows = []
+    with _lock:
+        last = _last_flushed_slot
+        _last_flushed_slot = slot - 1
+        for route, stats in _routes.items():
+            for window_slot, window in stats.windows.items():
+                if window_slot >= slot or (last is not None and window_slot <= last):
+                    continue
+                duration = window['duration_seconds']
+                if not duration.count:
+                    continue
+                rows.append(RequestMetric(
+                    route=route,
+                    window_start=datetime.datetime.fromtimestamp(window_slot * width, tz=datetime.timezone.utc),
+                    window_seconds=width,
+                    requests=duration.count,
+                    p50_ms=duration.percentile(50) * 1000,
+                    p95_ms=duration.percentile(95) * 1000,
+                    p99_ms=duration.percentile(99) * 1000,
+                    avg_queries=window['db_queries'].mean,
+                    avg_db_ms=window['db_duration_seconds'].mean * 1000,
+                    avg_bytes=window['response_size_bytes'].mean,
+                ))
+    RequestMetric.objects.bulk_create(rows)
+    return len(rows)
@@ -0,0 +1,113 @@
+import datetime
+
+from django.db.models import Count, F, Subquery, Sum, Value
+
+from .models import Employee, Payroll
+
+# -------------------------------
+# Payroll Reporting
+# -------------------------------
+def parse_year(value):
+    """A `year` query parameter -> int between 1 and 9999; None when empty. Raises ValueError."""
+    if not value:
+        return None
+    if not value.isdigit() or not datetime.MINYEAR <= int(value) <= datetime.MAXYEAR:
+        raise ValueError(f"Year must be a number between {datetime.MINYEAR} and {datetime.MAXYEAR}.")
+    return int(value)
+
+
+def parse_period(value):
+    """'2025-07' (an <input type="month"> value) -> date(2025, 7, 1); None when empty. Raises ValueError."""
+    if not value:
+        return None
+    # strptime takes at most four year digits but accepts '0000', which date() rejects
+    parse_year(value.partition('-')[0])
+    return datetime.datetime.strptime(value, '%Y-%m').date()
+
+
+def period_params(params):
+    """(start, end) from the `from`/`to` query parameters; raises ValueError for malformed values."""
+    return parse_period(params.get('from')), parse_period(params.get('to'))
+
+
+def payrolls_for_listing(start=None, end=None):
+    """
+    Payroll list queryset and keyset ordering: newest first, or by period when
+    a range is given so the range and the ordering use the same index.
+    """
+    payrolls = Payroll.objects.select_related('employee__user')
+    if start or end:
+        return in_periods(payrolls, start, end), ('-period', '-id')
+    return payrolls, ('-created_at', '-id')
+
+
+def in_periods(payrolls, start=None, end=None):
+    """
+    Restrict `payrolls` to the periods `start` through `end` (first-of-month
+    dates, either may be None), as a range on the indexed `period` column.
+    """
+    if start:
+        payrolls = payrolls.filter(period__gte=start)
+    if end:
+        payrolls = payrolls.filter(period__lte=end)
+    return payrolls
+
+
+def count_subquery(queryset, distinct=False):
+    """A scalar COUNT(*) subquery over `queryset`, usable in annotate()/values()."""
+    return Subquery(
+        queryset.order_by()
+        .annotate(grouping=Value(1))
+        .values('grouping')
+        .annotate(total=Count('pk', distinct=distinct))
+        .values('total')
+    )
+
+
+def headcounts():
+    """{'total_employees': n, 'total_payrolls': n} from one single-row query, for dashboards."""
+    row = next(iter(
+        Employee.objects.order_by()
+        .annotate(grouping=Value(1))
+        .values('grouping')
+        .annotate(total_employees=Count('pk'), total_payrolls=count_subquery(Payroll.objects.all()))
+        .values('total_employees', 'total_payrolls')
+    ), None)
+    # Payrolls belong to employees, so without employees there are none.
+    return row or {'total_employees': 0, 'total_payrolls': 0}
+
+
+def payroll_summary(start=None, end=None):
+    """
+    Totals, counts and per-year/per-month payroll breakdowns, optionally for
+    the periods `start` through `end` only.
+
+    Two queries: the employee count, and one grouped query that returns a row
+    per period in date order. The totals and per-year figures are folded from
+    those few period rows in Python. Rows whose month is not a month name (no
+    `period`) sort last.
+    """
+    periods = list(
+        in_periods(Payroll.objects.all(), start, end)
+        .values('period', 'year', 'month')
+        .annotate(payrolls=Count('id'), total_salary=Sum('net_salary'))
+        .order_by(F('period').asc(nulls_last=True), 'year', 'month')
+    )
+    total_employees = Employee.objects.count()
+
+    by_year = {}
+    for period in periods:
+        year = by_year.setdefault(period['year'], {'year': period['year'], 'payrolls': 0, 'total_salary': 0})
+        year['payrolls'] += period['payrolls']
+        year['total_salary'] += period['total_salary'] or 0
+
+    return {
+        'total_employees': total_employees,
+        'total_payrolls': sum(period['payrolls'] for period in periods),
+        'total_salary': sum((period['total_salary'] or 0) for period in periods),
+        'by_year': list(by_year.values()),
+        'by_month': [
+            {key: period[key] for key in ('year', 'month', 'payrolls', 'total_salary')}
+            for period in periods
+        ],
+    }
@@ -0,0 +1,257 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Round
+
+from .dashboard_cache import cache_timeout, get_cache, invalidate, scope_version
+from .models import Employee, Payroll, PayrollRule
+
+# -------------------------------
+# Payroll Rules Engine
+# -------------------------------
+# Salaries are computed in integer paise and rates in 1/10000ths (the four
+# decimal places of PayrollRule), so a whole month is plain integer arithmetic
+# with the same half-up rounding as Payroll.salary_components() and SQL ROUND().
+# Employees sharing a rule are computed together, one column at a time. Net
+# salary is basic + HRA + allowances - deductions of the rounded figures, in
+# Python and in SQL alike, so every stored row adds up.
+RATED = ('hra', 'allowances', 'deductions')
+COMPONENTS = (*RATED, 'net_salary')
+RULES_SCOPE = 'payroll_rules'
+RULES_KEY_PREFIX = 'erp:payroll-rules'
+RATE_UNITS = 10000
+PAISE = 100
+
+
+def _paise(amount):
+    return int(Decimal(amount) * PAISE)
+
+
+def _rupees(paise):
+    return Decimal(paise) / PAISE
+
+
+@dataclass(frozen=True)
+class Rates:
+    hra: Decimal
+    allowances: Decimal
+    deductions: Decimal
+
+    def units(self):
+        """{component: rate in 1/10000ths of the basic salary}."""
+        return {component: int(getattr(self, component) * RATE_UNITS) for component in RATED}
+
+
+DEFAULT_RATES = Rates(Payroll.HRA_RATE, Payroll.ALLOWANCES_RATE, Payroll.DEDUCTIONS_RATE)
+
+
+@dataclass
+class SalaryColumns:
+    """One month of salaries, column-wise: columns[component][i] is employee_ids[i]'s figure in paise."""
+    employee_ids: list
+    departments: list
+    basic: list
+    columns: dict
+
+    def __len__(self):
+        return len(self.employee_ids)
+
+    def components(self, index):
+        return {component: _rupees(values[index]) for component, values in self.columns.items()}
+
+    def totals(self):
+        totals = {'basic_salary': _rupees(sum(self.basic))}
+        totals.update((component, _rupees(sum(values))) for component, values in self.columns.items())
+        return totals
+
+    def totals_by_department(self):
+        sums = defaultdict(lambda: defaultdict(int))
+        for index, department in enumerate(self.departments):
+            for component, values in self.columns.items():
+                sums[department][component] += values[index]
+        return {
+            department: {component: _rupees(total) for component, total in components.items()}
+            for department, components in sums.items()
+        }
+
+
+@dataclass
+class PayrollRules:
+    """
+    A compiled rule set. Build it once (PayrollRules.load()) and use it for a
+    whole run: rule lookups are memoized per (department, designation).
+    """
+    scopes: dict = field(default_factory=dict)  # (department, designation) -> Rates
+    _resolved: dict = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def compile(cls, rules):
+        return cls({
+            (rule.department, rule.designation): Rates(rule.hra_rate, rule.allowances_rate, rule.deductions_rate)
+            for rule in rules
+        })
+
+    @classmethod
+    def load(cls):
+        return cls.compile(PayrollRule.objects.all())
+
+    @classmethod
+    def current(cls):
+        """
+        The saved rule set, kept in the dashboard cache until a PayrollRule
+        changes (core/signals.py bumps RULES_SCOPE), so single-row payroll
+        saves do not read the rules table every time.
+        """
+        cache = get_cache()
+        key = f'{RULES_KEY_PREFIX}:{scope_version(RULES_SCOPE)}'
+        scopes = cache.get(key)
+        if scopes is None:
+            scopes = cls.load().scopes
+            # Inside a transaction the rules read may be its own uncommitted writes, so they are only
+            # cached once it commits (at once outside one); a rollback caches nothing.
+            transaction.on_commit(lambda: cache.set(key, scopes, timeout=cache_timeout()))
+        return cls(dict(scopes))
+
+    def with_changes(self, rules=(), removed=()):
+        """A new rule set with `rules` added or replacing the same scope, and `removed` scopes dropped."""
+        scopes = {scope: rates for scope, rates in self.scopes.items() if scope not in set(removed)}
+        scopes.update(self.compile(rules).scopes)
+        return PayrollRules(scopes)
+
+    def rates_for(self, department='', designation=''):
+        key = (department, designation)
+        rates = self._resolved.get(key)
+        if rates is None:
+            for scope in (key, (department, ''), ('', designation), ('', '')):
+                if scope in self.scopes:
+                    rates = self.scopes[scope]
+                    break
+            else:
+                rates = DEFAULT_RATES
+            self._resolved[key] = rates
+        return rates
+
+    def calculate(self, employees):
+        """
+        Salaries for `employees`, an iterable of (id, basic_salary, department,
+        designation) tuples such as Employee.objects.values_list(...).
+        """
+        ids, departments, basic, groups = [], [], [], defaultdict(list)
+        for index, (employee_id, salary, department, designation) in enumerate(employees):
+            ids.append(employee_id)
+            departments.append(department)
+            basic.append(_paise(salary))
+            groups[self.rates_for(department, designation)].append(index)
+
+        columns = {component: [0] * len(ids) for component in COMPONENTS}
+        half = RATE_UNITS // 2
+        for rates, indexes in groups.items():
+            group_basic = [basic[index] for index in indexes]
+            for component, rate in rates.units().items():
+                column = columns[component]
+                for index, value in zip(indexes, [(paise * rate + half) // RATE_UNITS for paise in group_basic]):
+                    column[index] = value
+        columns['net_salary'] = [
+            paise + hra + allowances - deductions
+            for paise, hra, allowances, deductions in zip(
+                basic, columns['hra'], columns['allowances'], columns['deductions']
+            )
+        ]
+        return SalaryColumns(ids, departments, basic, columns)
+
+    def calculate_all(self):
+        """Salaries for every employee, from one query."""
+        return self.calculate(
+            Employee.objects.order_by('id').values_list('id', 'basic_salary', 'department', 'designation')
+            .iterator(chunk_size=5000)
+        )
+
+    def components(self, basic, department='', designation=''):
+        """Payroll.salary_components() under these rules for one employee."""
+        return self.calculate([(None, basic, department, designation)]).components(0)
+
+    def sql_components(self):
+        """
+        {column: expression} computing each payroll column from the payroll's
+        employee in SQL, for QuerySet.update() on Payroll (see
+        core/payroll.py). The employee row is a correlated subquery.
+        """
+        values = {component: Round(F('basic_salary') * self._rate_expression(component), 2) for component in RATED}
+        values['net_salary'] = ExpressionWrapper(
+            F('basic_salary') + values['hra'] + values['allowances'] - values['deductions'],
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )
+        return {
+            component: Subquery(
+                Employee.objects.filter(pk=OuterRef('employee_id')).annotate(value=value).values('value')
+            )
+            for component, value in values.items()
+        }
+
+    def _rate_expression(self, component):
+        def rate(rates):
+            return Value(getattr(rates, component), output_field=DecimalField(max_digits=6, decimal_places=4))
+
+        # Most specific first, mirroring rates_for()
+        ordered = sorted(
+            (scope for scope in self.scopes if scope != ('', '')),
+            key=lambda scope: (not scope[0], not scope[1]),
+        )
+        default = rate(self.scopes.get(('', ''), DEFAULT_RATES))
+        if not ordered:
+            return default
+        whens = []
+        for department, designation in ordered:
+            conditions = {}
+            if department:
+                conditions['department'] = department
+            if designation:
+                conditions['designation'] = designation
+            whens.append(When(**conditions, then=rate(self.scopes[department, designation])))
+        return Case(*whens, default=default)
+
+
+def rules_changed():
+    """
+    Drop the cached rule set after a PayrollRule write (called from
+    core/signals.py). Rule sets read during the transaction are cached on
+    commit, under versions that invalidate()'s on-commit bump has superseded.
+    """
+    invalidate(RULES_SCOPE)
+
+
+def simulate(rules=(), removed=(), current=None):
+    """
+    Company-wide monthly cost of the current rules against the same rules with
+    `rules` added/replaced and `removed` scopes dropped. Nothing is written.
+    """
+    current = current or PayrollRules.load()
+    proposed = current.with_changes(rules, removed)
+    employees = list(
+        Employee.objects.order_by('id').values_list('id', 'basic_salary', 'department', 'designation')
+    )
+    before, after = current.calculate(employees), proposed.calculate(employees)
+
+    def delta(old, new):
+        return {key: new[key] - old[key] for key in old}
+
+    before_totals, after_totals = before.totals(), after.totals()
+    before_departments, after_departments = before.totals_by_department(), after.totals_by_department()
+    return {
+        'employees': len(employees),
+        'current': before_totals,
+        'proposed': after_totals,
+        'delta': delta(before_totals, after_totals),
+        'departments': [
+            {
+                'department': department,
+                'current': before_departments[department],
+                'proposed': after_departments[department],
+                'delta': delta(before_departments[department], after_departments[department]),
+            }
+            for department in sorted(before_departments)
+        ],
+    }
@@ -0,0 +1,150 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Lead
+
+# -------------------------------
+# Lead Full-text Search
+# -------------------------------
+# MySQL: a FULLTEXT index on core_lead, maintained by MySQL itself. Words it
+# does not index (shorter than innodb_ft_min_token_size, or stopwords) would
+# be required terms that never match, so they are matched with icontains
+# instead, and a query made only of such words uses the icontains fallback.
+# SQLite: an FTS5 table (core_lead_fts, rowid = lead id) kept in sync from the
+# Lead post_save/post_delete signals and index_leads() for bulk writes.
+# Other backends fall back to icontains.
+SEARCH_FIELDS = ['name', 'company', 'email', 'phone', 'notes']
+FTS_TABLE = 'core_lead_fts'
+DEFAULT_LIMIT = 50
+
+
+_fts_ready = False
+_mysql_fulltext_rules = None
+
+
+def search_backend():
+    global _fts_ready
+    if connection.vendor == 'mysql':
+        return 'mysql'
+    if connection.vendor == 'sqlite':
+        # Only a positive answer is cached: the table appears once migrations have run.
+        _fts_ready = _fts_ready or FTS_TABLE in connection.introspection.table_names()
+        if _fts_ready:
+            return 'fts5'
+    return 'basic'
+
+
+def _terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+def mysql_fulltext_rules():
+    """(innodb_ft_min_token_size, stopwords) of the MySQL server, read once per process."""
+    global _mysql_fulltext_rules
+    if _mysql_fulltext_rules is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT @@innodb_ft_min_token_size, @@innodb_ft_enable_stopword, @@innodb_ft_server_stopword_table'
+            )
+            min_size, stopwords_enabled, stopword_table = cursor.fetchone()
+            stopwords = set()
+            if stopwords_enabled:
+                if stopword_table:
+                    # Given as 'database/table'
+                    table = '.'.join(connection.ops.quote_name(part) for part in stopword_table.split('/'))
+                    cursor.execute(f'SELECT value FROM {table}')
+                else:
+                    cursor.execute('SELECT value FROM INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD')
+                stopwords = {value.lower() for value, in cursor.fetchall()}
+        _mysql_fulltext_rules = (min_size, frozenset(stopwords))
+    return _mysql_fulltext_rules
+
+
+def split_fulltext_terms(terms, min_size, stopwords):
+    """(terms the FULLTEXT index holds, terms it drops) for MySQL boolean mode."""
+    indexed, dropped = [], []
+    for term in terms:
+        if len(term) < min_size or term.lower() in stopwords:
+            dropped.append(term)
+        else:
+            indexed.append(term)
+    return indexed, dropped
+
+
+def _contains_all(terms):
+    condition = Q()
+    for term in terms:
+        condition &= Q(*[Q(**{f'{name}__icontains': term}) for name in SEARCH_FIELDS], _connector=Q.OR)
+    return condition
+
+
+def index_leads(leads):
+    """Write `leads` into the SQLite FTS table (no-op on other backends)."""
+    leads = list(leads)
+    if not leads or search_backend() != 'fts5':
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(lead.pk,) for lead in leads])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(SEARCH_FIELDS)}) VALUES (%s, %s, %s, %s, %s, %s)',
+            [[lead.pk] + [getattr(lead, name) or '' for name in SEARCH_FIELDS] for lead in leads],
+        )
+
+
+def unindex_leads(lead_ids):
+    if search_backend() != 'fts5':
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in lead_ids])
+
+
+def rebuild_index():
+    if search_backend() != 'fts5':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        columns = ', '.join(SEARCH_FIELDS)
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, {columns}) '
+            f'SELECT id, {", ".join(f"COALESCE({name}, %s)" for name in SEARCH_FIELDS)} FROM {Lead._meta.db_table}',
+            [''] * len(SEARCH_FIELDS),
+        )
+
+
+def search_leads(query, queryset=None, limit=DEFAULT_LIMIT):
+    """
+    Leads in `queryset` matching every word of `query` (as a prefix), best match first.
+    """
+    queryset = Lead.objects.all() if queryset is None else queryset
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    backend = search_backend()
+    if backend == 'mysql':
+        indexed, dropped = split_fulltext_terms(terms, *mysql_fulltext_rules())
+        if indexed:
+            against = ' '.join(f'+{term}*' for term in indexed)
+            rank = RawSQL(
+                f"MATCH ({', '.join(SEARCH_FIELDS)}) AGAINST (%s IN BOOLEAN MODE)", [against]
+            )
+            matches = queryset.filter(_contains_all(dropped)).annotate(rank=rank).filter(rank__gt=0)
+            return list(matches.order_by('-rank', '-id')[:limit])
+
+    if backend == 'fts5':
+        match = ' '.join('"{}"*'.format(term) for term in terms)
+        scope_sql, scope_params = queryset.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({scope_sql}) '
+                f'ORDER BY bm25({FTS_TABLE}) LIMIT %s',
+                [match, *scope_params, limit],
+            )
+            ranked_ids = [row[0] for row in cursor.fetchall()]
+        leads = Lead.objects.in_bulk(ranked_ids)
+        return [leads[pk] for pk in ranked_ids if pk in leads]
+
+    return list(queryset.filter(_contains_all(terms)).order_by('-created_at', '-id')[:limit])
@@ -0,0 +1,289 @@
+import calendar
+import datetime
+import random
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from .dashboard_cache import invalidate
+from .hierarchy import rebuild_hierarchy
+from .models import Employee, Lead, Payroll, Team, TeamReport, User
+from .payroll import _chunked
+from .rules import PayrollRules
+from .search import rebuild_index
+
+# -------------------------------
+# Scale Data Generator
+# -------------------------------
+# Volumes per unit of `scale`; scale=100 gives 100k users, 2,000 teams and a
+# million leads and team reports. Every value comes from one random.Random(seed)
+# and payroll periods end at `reference_date`, so the same arguments always
+# produce the same data set whatever the date and whatever is already stored.
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_REFERENCE_DATE = datetime.date(2025, 1, 1)
+ROLE_WEIGHTS = {
+    'admin': 1, 'hr': 10, 'head_hr': 2, 'employee': 600, 'manager': 50, 'head_manager': 10,
+    'sales': 150, 'head_sales': 5, 'support': 40, 'head_support': 2, 'tech': 40, 'head_tech': 2,
+    'account': 20, 'head_account': 2, 'customer': 64, 'head_customer': 2,
+}
+TEAMS = 20
+TEAM_REPORTS = 10000
+LEADS = 10000
+
+DEPARTMENTS = ['Engineering', 'Sales', 'Support', 'Finance', 'Operations', 'HR', 'Marketing']
+DESIGNATIONS = ['Associate', 'Analyst', 'Engineer', 'Senior Engineer', 'Lead', 'Specialist', 'Executive']
+FIRST_NAMES = ['Aarav', 'Diya', 'Ishaan', 'Meera', 'Kabir', 'Ananya', 'Rohan', 'Saanvi', 'Vivaan', 'Priya']
+LAST_NAMES = ['Shah', 'Patel', 'Mehta', 'Iyer', 'Reddy', 'Gupta', 'Nair', 'Joshi', 'Desai', 'Kapoor']
+COMPANY_WORDS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Stark', 'Wayne', 'Tyrell', 'Soylent', 'Hooli', 'Vandelay']
+COMPANY_SUFFIXES = ['Corp', 'Industries', 'Labs', 'Systems', 'Traders', 'Pvt Ltd']
+REPORT_TOPICS = ['Sprint review', 'Weekly status', 'Client follow-up', 'Incident summary', 'Quarterly plan']
+
+
+@dataclass
+class SeedReport:
+    tables: list = field(default_factory=list)  # [(table, rows, seconds)]
+
+    @property
+    def rows(self):
+        return sum(rows for _, rows, _ in self.tables)
+
+
+def _assign_pks(objects, model, field_name):
+    """Backends like MySQL do not return primary keys from bulk inserts; look them up by a unique field."""
+    if all(obj.pk is not None for obj in objects):
+        return
+    ids = dict(model.objects.filter(
+        **{f'{field_name}__in': [getattr(obj, field_name) for obj in objects]}
+    ).values_list(field_name, 'id'))
+    for obj in objects:
+        obj.pk = ids[getattr(obj, field_name)]
+
+
+def _assign_pks_in_order(objects, model, field_name, after_pk):
+    """
+    Like _assign_pks for a field that is not unique: the rows this transaction
+    inserted after `after_pk` are matched to `objects` in insertion order.
+    """
+    if all(obj.pk is not None for obj in objects):
+        return
+    ids = list(model.objects.filter(
+        pk__gt=after_pk or 0, **{f'{field_name}__in': {getattr(obj, field_name) for obj in objects}}
+    ).order_by('pk').values_list('pk', flat=True))
+    if len(ids) != len(objects):
+        raise RuntimeError(f"Expected {len(objects)} new {model.__name__} rows, found {len(ids)}")
+    for obj, pk in zip(objects, ids):
+        obj.pk = pk
+
+
+def _insert_through(through, left, right, pairs, batch_size):
+    """INSERT (left_id, right_id) rows straight into an M2M through table."""
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}, {}) VALUES (%s, %s)'.format(
+        quote(through._meta.db_table),
+        quote(through._meta.get_field(left).column),
+        quote(through._meta.get_field(right).column),
+    )
+    rows = 0
+    with connection.cursor() as cursor:
+        for batch in _chunked(pairs, batch_size):
+            cursor.executemany(sql, batch)
+            rows += len(batch)
+    return rows
+
+
+def _periods(months, end):
+    """The last `months` (month name, year) periods, oldest first, ending with the month of `end`."""
+    index = end.year * 12 + end.month - 1
+    return [
+        (calendar.month_name[i % 12 + 1], i // 12)
+        for i in range(index - months + 1, index + 1)
+    ]
+
+
+def seed_erp(scale=1, seed=0, months=36, prefix='seed', password='password',
+             batch_size=DEFAULT_BATCH_SIZE, on_table=None, reference_date=DEFAULT_REFERENCE_DATE, dev=False):
+    """
+    Generate a synthetic ERP data set `scale` times the base volumes.
+
+    Every generated user shares one password hash, so this only runs with
+    DEBUG on or `dev=True`; ValueError otherwise.
+
+    Payroll history runs for `months` months up to the month of `reference_date`.
+    Employee IDs are `<prefix>-<number>` rather than drawn from
+    EmployeeIdSequence, so they do not depend on earlier runs; ValueError if the
+    prefix leaves no room for them.
+
+    Rows are written with batched bulk_create and M2M links with raw inserts
+    into the through tables, so no model signals fire: the lead search index and
+    org hierarchy are rebuilt and the payroll and list page scopes invalidated
+    once at the end.
+    `on_table(table, rows, seconds)` is called as each table finishes.
+    """
+    if not (dev or settings.DEBUG):
+        raise ValueError("Seeded users share one password hash; run with DEBUG or pass --dev on a development database")
+    employee_count = ROLE_WEIGHTS['employee'] * scale
+    employee_id_length = Employee._meta.get_field('employee_id').max_length
+    if len(f'{prefix}-{employee_count:06d}') > employee_id_length:
+        raise ValueError(f"Prefix {prefix!r} is too long for {employee_id_length}-character employee IDs")
+
+    rng = random.Random(seed)
+    report = SeedReport()
+
+    def timed(table, write):
+        started = time.perf_counter()
+        with transaction.atomic():
+            rows = write()
+        elapsed = time.perf_counter() - started
+        report.tables.append((table, rows, elapsed))
+        if on_table:
+            on_table(table, rows, elapsed)
+
+    # One hash for every generated account; hashing per user would dominate the run.
+    hashed_password = make_password(password, salt=f'{prefix}{seed}'.ljust(12, 'x'))
+    users_by_role = {}
+
+    def write_users():
+        rows = 0
+        for role, weight in ROLE_WEIGHTS.items():
+            users = users_by_role[role] = []
+            names = (f'{prefix}-{role}-{i}' for i in range(weight * scale))
+            for batch in _chunked(names, batch_size):
+                created = User.objects.bulk_create([
+                    User(
+                        username=username,
+                        password=hashed_password,
+                        first_name=rng.choice(FIRST_NAMES),
+                        last_name=rng.choice(LAST_NAMES),
+                        email=f'{username}@example.com',
+                        role=role,
+                    )
+                    for username in batch
+                ])
+                _assign_pks(created, User, 'username')
+                users.extend(user.pk for user in created)
+                rows += len(created)
+        return rows
+
+    employees = []  # (employee pk, salary components)
+    rules = PayrollRules.load()
+
+    def write_employees():
+        employee_ids = (f'{prefix}-{number:06d}' for number in range(1, employee_count + 1))
+        for batch in _chunked(users_by_role['employee'], batch_size):
+            created = Employee.objects.bulk_create([
+                Employee(
+                    user_id=user_id,
+                    employee_id=employee_id,
+                    department=rng.choice(DEPARTMENTS),
+                    designation=rng.choice(DESIGNATIONS),
+                    contact_number=f'9{rng.randrange(10 ** 9):09d}',
+                    basic_salary=Decimal(rng.randrange(30, 300) * 500),
+                )
+                for user_id, employee_id in zip(batch, employee_ids)
+            ])
+            _assign_pks(created, Employee, 'employee_id')
+            salaries = rules.calculate(
+                (employee.pk, employee.basic_salary, employee.department, employee.designation)
+                for employee in created
+            )
+            employees.extend(
+                (employee_id, salaries.components(index)) for index, employee_id in enumerate(salaries.employee_ids)
+            )
+        return len(employees)
+
+    def write_payrolls():
+        rows = 0
+        for month, year in _periods(months, reference_date):
+            period = Payroll.period_of(month, year)
+            payrolls = (
+                Payroll(employee_id=employee_id, month=month, year=year, period=period, **components)
+                for employee_id, components in employees
+            )
+            for batch in _chunked(payrolls, batch_size):
+                rows += len(Payroll.objects.bulk_create(batch))
+        return rows
+
+    team_ids = []
+
+    def write_teams():
+        head_managers = users_by_role['head_manager']
+        # Team names are not unique, so on MySQL the new rows are found by position
+        last_pk = Team.objects.order_by('-pk').values_list('pk', flat=True).first()
+        teams = Team.objects.bulk_create([
+            Team(name=f'{prefix} Team {i}', head_manager_id=rng.choice(head_managers))
+            for i in range(TEAMS * scale)
+        ], batch_size=batch_size)
+        _assign_pks_in_order(teams, Team, 'name', last_pk)
+        team_ids.extend(team.pk for team in teams)
+        return len(teams)
+
+    def write_team_managers():
+        managers = users_by_role['manager']
+        pairs = [
+            (team_id, manager_id)
+            for team_id in team_ids
+            for manager_id in rng.sample(managers, min(len(managers), rng.randint(1, 3)))
+        ]
+        return _insert_through(Team.managers.through, 'team', 'user', pairs, batch_size)
+
+    def write_team_members():
+        members = users_by_role['employee']
+        pairs = [
+            (team_id, member_id)
+            for team_id in team_ids
+            for member_id in rng.sample(members, min(len(members), rng.randint(5, 15)))
+        ]
+        return _insert_through(Team.members.through, 'team', 'user', pairs, batch_size)
+
+    def write_team_reports():
+        reports = (
+            TeamReport(
+                team_id=rng.choice(team_ids),
+                title=f'{rng.choice(REPORT_TOPICS)} #{i}',
+                description=f'{rng.choice(REPORT_TOPICS)} for week {rng.randint(1, 52)}.',
+            )
+            for i in range(TEAM_REPORTS * scale)
+        )
+        return sum(len(TeamReport.objects.bulk_create(batch)) for batch in _chunked(reports, batch_size))
+
+    def write_leads():
+        sales = users_by_role['sales']
+        statuses = [status for status, _ in Lead.STATUS_CHOICES]
+        priorities = [priority for priority, _ in Lead.PRIORITY_CHOICES]
+
+        def lead(i):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            company = f'{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}'
+            email, phone = f'{first}.{last}{i}@example.com'.lower(), f'9{rng.randrange(10 ** 9):09d}'
+            return Lead(
+                name=f'{first} {last}',
+                email=email,
+                phone=phone,
+                company=company,
+                fingerprint=Lead.fingerprint_of(email, phone, company),  # bulk_create skips save()
+                status=rng.choices(statuses, weights=[5, 3, 2])[0],
+                priority=rng.choice(priorities),
+                assigned_to_id=rng.choice(sales),
+                notes=f'Interested in a {company} proposal.',
+            )
+
+        leads = (lead(i) for i in range(LEADS * scale))
+        return sum(len(Lead.objects.bulk_create(batch)) for batch in _chunked(leads, batch_size))
+
+    timed('users', write_users)
+    timed('employees', write_employees)
+    timed('payrolls', write_payrolls)
+    timed('teams', write_teams)
+    timed('team managers', write_team_managers)
+    timed('team members', write_team_members)
+    timed('team reports', write_team_reports)
+    timed('leads', write_leads)
+
+    rebuild_index()
+    timed('org links', rebuild_hierarchy)
+    invalidate('payroll', 'employees', 'payrolls')
+    return report
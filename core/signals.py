@@ -0,0 +1,229 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .dashboard_cache import invalidate, invalidate_users
+from .hierarchy import refresh_teams
+from .middleware import forget_cached_user
+from .models import Employee, Lead, Payroll, PayrollRule, Team, TeamReport, User
+from .rules import rules_changed
+from .search import index_leads, unindex_leads
+from .teams import BULK_ACTION
+
+
+# -------------------------------
+# Lead Search Index
+# -------------------------------
+@receiver(post_save, sender=Lead)
+def index_saved_lead(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_leads([instance])
+
+
+@receiver(post_delete, sender=Lead)
+def unindex_deleted_lead(sender, instance, **kwargs):
+    unindex_leads([instance.pk])
+
+
+# -------------------------------
+# Dashboard Cache Invalidation
+# -------------------------------
+def team_audience(team_ids):
+    """Users whose dashboards show these teams: their head managers and managers."""
+    team_ids = list(team_ids)
+    if not team_ids:
+        return set()
+    users = set(Team.objects.filter(pk__in=team_ids).values_list('head_manager_id', flat=True))
+    users.update(
+        Team.managers.through.objects.filter(team_id__in=team_ids).values_list('user_id', flat=True)
+    )
+    return users
+
+
+# Shown for managers on their head managers' team pages, and for every user in the page header.
+USER_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(post_init, sender=Lead)
+@receiver(post_init, sender=Team)
+@receiver(post_init, sender=User)
+def remember_loaded_values(sender, instance, **kwargs):
+    # Old owner/role, so a save can also invalidate whoever the row moved away from.
+    # Read __dict__ directly so deferred fields are not fetched one row at a time.
+    if sender is Lead:
+        instance._loaded_assigned_to_id = instance.__dict__.get('assigned_to_id')
+    elif sender is Team:
+        instance._loaded_head_manager_id = instance.__dict__.get('head_manager_id')
+    else:
+        instance._loaded_role = instance.__dict__.get('role')
+        instance._loaded_names = tuple(instance.__dict__.get(name) for name in USER_NAME_FIELDS)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_save, sender=Payroll)
+def payroll_scope_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        invalidate('payroll')
+
+
+@receiver(post_delete, sender=Employee)
+@receiver(post_delete, sender=Payroll)
+def payroll_scope_deleted(sender, instance, **kwargs):
+    invalidate('payroll')
+
+
+@receiver(post_save, sender=PayrollRule)
+@receiver(post_delete, sender=PayrollRule)
+def payroll_rules_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        rules_changed()
+
+
+@receiver(post_save, sender=Lead)
+@receiver(post_delete, sender=Lead)
+def lead_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_users({instance.assigned_to_id, getattr(instance, '_loaded_assigned_to_id', None)})
+        instance._loaded_assigned_to_id = instance.assigned_to_id
+
+
+@receiver(post_save, sender=Team)
+def team_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        if created or instance.head_manager_id != getattr(instance, '_loaded_head_manager_id', None):
+            refresh_teams([instance.pk])
+        users = team_audience([instance.pk])
+        users.add(getattr(instance, '_loaded_head_manager_id', None))
+        invalidate_users(users)
+        instance._loaded_head_manager_id = instance.head_manager_id
+
+
+@receiver(pre_delete, sender=Team)
+def team_deleted(sender, instance, **kwargs):
+    # pre_delete: the manager rows are gone by post_delete.
+    invalidate_users(team_audience([instance.pk]))
+
+
+@receiver(post_save, sender=TeamReport)
+def team_report_saved(sender, instance, created, raw=False, **kwargs):
+    # Dashboards only count reports, but the task feed's ETags (core/feeds.py) cover edits too.
+    if not raw:
+        invalidate_users(team_audience([instance.team_id]))
+
+
+@receiver(post_delete, sender=TeamReport)
+def team_report_deleted(sender, instance, **kwargs):
+    invalidate_users(team_audience([instance.team_id]))
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+@receiver(m2m_changed, sender=Team.managers.through)
+def team_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == BULK_ACTION:
+        # core.teams: one signal for a whole bulk change, sent after the writes.
+        users = team_audience(kwargs['changes'].team_ids)
+        if sender is Team.managers.through:
+            users.update(pk_set)
+        invalidate_users(users)
+        return
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # user.assigned_teams / user.team_memberships changed: pk_set holds team ids
+        if action == 'pre_clear':
+            pk_set = sender.objects.filter(user_id=instance.pk).values_list('team_id', flat=True)
+        users = team_audience(pk_set or [])
+        users.add(instance.pk)
+    else:
+        # Before a clear the audience still includes the managers being removed.
+        users = team_audience([instance.pk])
+        if sender is Team.managers.through and pk_set:
+            users.update(pk_set)
+    invalidate_users(users)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    names = tuple(instance.__dict__.get(name) for name in USER_NAME_FIELDS)
+    if (
+        instance.role == getattr(instance, '_loaded_role', instance.role)
+        and names == getattr(instance, '_loaded_names', names)
+    ):
+        return
+    # A role change alters the head managers' manager counts and the user's own dashboard;
+    # a new name shows on the team pages of the teams they manage and in their own header.
+    team_ids = Team.managers.through.objects.filter(user_id=instance.pk).values_list('team_id', flat=True)
+    users = team_audience(team_ids)
+    users.add(instance.pk)
+    invalidate_users(users)
+    instance._loaded_role = instance.role
+    instance._loaded_names = names
+
+
+@receiver(pre_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # Membership rows disappear with the user without an m2m_changed signal.
+    team_ids = set(Team.managers.through.objects.filter(user_id=instance.pk).values_list('team_id', flat=True))
+    team_ids.update(Team.members.through.objects.filter(user_id=instance.pk).values_list('team_id', flat=True))
+    invalidate_users(team_audience(team_ids))
+
+
+# -------------------------------
+# Cached Session User
+# -------------------------------
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_session_user(sender, instance, **kwargs):
+    user_id = instance.pk
+    forget_cached_user(user_id)
+    # Again after commit, in case a request re-cached the old row in between.
+    transaction.on_commit(lambda: forget_cached_user(user_id))
+
+
+# -------------------------------
+# Org Hierarchy
+# -------------------------------
+# Team deletes cascade to their links; new teams and head manager changes are
+# handled in team_saved() above, before its old head manager is forgotten.
+@receiver(m2m_changed, sender=Team.members.through)
+@receiver(m2m_changed, sender=Team.managers.through)
+def team_hierarchy_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == BULK_ACTION:
+        refresh_teams(kwargs['changes'].team_ids)
+    elif not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        refresh_teams([instance.pk])
+    elif reverse and action in ('post_add', 'post_remove'):
+        refresh_teams(pk_set)
+    elif reverse and action == 'pre_clear':
+        team_ids = sender.objects.filter(user_id=instance.pk).values_list('team_id', flat=True)
+        instance._hierarchy_cleared_team_ids = set(team_ids)
+    elif reverse and action == 'post_clear':
+        refresh_teams(getattr(instance, '_hierarchy_cleared_team_ids', ()))
+
+
+# -------------------------------
+# List Page Freshness
+# -------------------------------
+# Scopes validating the HR list pages (core/freshness.py). The pages show
+# user names too, so any user write counts except the login timestamp.
+EMPLOYEE_LIST_SCOPES = ('employees',)
+PAYROLL_LIST_SCOPES = ('payrolls',)
+LIST_SCOPES = {
+    Employee: EMPLOYEE_LIST_SCOPES + PAYROLL_LIST_SCOPES,
+    Payroll: PAYROLL_LIST_SCOPES,
+    User: EMPLOYEE_LIST_SCOPES + PAYROLL_LIST_SCOPES,
+}
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_save, sender=Payroll)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Employee)
+@receiver(post_delete, sender=Payroll)
+@receiver(post_delete, sender=User)
+def list_rows_changed(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and set(update_fields) == {'last_login'}):
+        return
+    invalidate(*LIST_SCOPES[sender])
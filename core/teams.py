@@ -0,0 +1,119 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed
+
+from .models import Team, User
+
+# -------------------------------
+# Team Membership Service
+# -------------------------------
+# Membership edits are applied as diffs straight on the M2M through tables:
+# one read of the affected teams' current rows, one bulk INSERT for additions
+# and one DELETE for removals, all in a single transaction. Receivers get one
+# m2m_changed with action BULK_ACTION for the whole change instead of one
+# pre/post pair per team; its `changes` argument is the MembershipChange.
+RELATIONS = ('members', 'managers')
+BULK_ACTION = 'post_bulk_change'
+
+
+@dataclass
+class MembershipChange:
+    relation: str
+    added: dict = field(default_factory=dict)  # team id -> set of user ids
+    removed: dict = field(default_factory=dict)
+
+    @property
+    def team_ids(self):
+        return set(self.added) | set(self.removed)
+
+    @property
+    def user_ids(self):
+        return set().union(*self.added.values(), *self.removed.values())
+
+    @property
+    def rows(self):
+        return sum(map(len, self.added.values())) + sum(map(len, self.removed.values()))
+
+    def __bool__(self):
+        return bool(self.rows)
+
+
+def _through(relation):
+    if relation not in RELATIONS:
+        raise ValueError(f"Unknown team relation {relation!r}; expected one of {RELATIONS}.")
+    return getattr(Team, relation).through
+
+
+def _current(through, team_ids):
+    current = defaultdict(set)
+    for team_id, user_id in through.objects.filter(team_id__in=team_ids).values_list('team_id', 'user_id'):
+        current[team_id].add(user_id)
+    return current
+
+
+def apply_membership(relation, add=None, remove=None, replace=None):
+    """
+    Change the users of several teams at once. `add`, `remove` and `replace`
+    (the team's exact new set) map a team id to user ids; rows that already
+    match are skipped. The teams are locked for the transaction so concurrent
+    edits of the same teams queue up. Returns the MembershipChange written.
+    """
+    through = _through(relation)
+    add = {team_id: set(user_ids) for team_id, user_ids in (add or {}).items()}
+    remove = {team_id: set(user_ids) for team_id, user_ids in (remove or {}).items()}
+    replace = {team_id: set(user_ids) for team_id, user_ids in (replace or {}).items()}
+    team_ids = set(add) | set(remove) | set(replace)
+    change = MembershipChange(relation)
+    if not team_ids:
+        return change
+
+    with transaction.atomic():
+        list(Team.objects.select_for_update().filter(pk__in=team_ids).order_by('pk').values_list('pk'))
+        current = _current(through, team_ids)
+        for team_id, user_ids in replace.items():
+            add.setdefault(team_id, set()).update(user_ids)
+            remove.setdefault(team_id, set()).update(current[team_id] - user_ids)
+        for team_id, user_ids in add.items():
+            if user_ids - current[team_id]:
+                change.added[team_id] = user_ids - current[team_id]
+        for team_id, user_ids in remove.items():
+            if user_ids & current[team_id]:
+                change.removed[team_id] = user_ids & current[team_id]
+
+        if change.added:
+            through.objects.bulk_create(
+                [
+                    through(team_id=team_id, user_id=user_id)
+                    for team_id, user_ids in change.added.items()
+                    for user_id in user_ids
+                ],
+                ignore_conflicts=True,
+            )
+        if change.removed:
+            through.objects.filter(reduce(or_, (
+                Q(team_id=team_id, user_id__in=user_ids) for team_id, user_ids in change.removed.items()
+            ))).delete()
+        if change:
+            m2m_changed.send(
+                sender=through, instance=None, action=BULK_ACTION, reverse=False,
+                model=User, pk_set=change.user_ids, using=through.objects.db, changes=change,
+            )
+    return change
+
+
+def set_team_users(team, relation, user_ids):
+    """Make `user_ids` the team's exact members (or managers), writing only the difference."""
+    return apply_membership(relation, replace={team.pk: user_ids})
+
+
+def move_members(user_ids, source, target, relation='members'):
+    """Move users from one team to another in one transaction; users not on `source` are just added to `target`."""
+    if source.pk == target.pk:
+        return MembershipChange(relation)
+    user_ids = set(user_ids)
+    return apply_membership(relation, add={target.pk: user_ids}, remove={source.pk: user_ids})
@@ -1,3 +1,2120 @@
-from django.test import TestCase
+import datetime
+import time
+from collections import Counter
+import tracemalloc
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import PAISA, Employee, EmployeeIdSequence, Lead, OrgLink, Payroll, PayrollRule, Team, TeamReport, User
+from .pagination import EstimatedCountPaginator
+from .payroll import run_payroll
+from .reports import payroll_summary
+from .rules import PayrollRules
+
+
+def create_employees(count, prefix='emp'):
+    users = User.objects.bulk_create([
+        User(username=f'{prefix}{i}', role='employee') for i in range(count)
+    ])
+    return Employee.objects.bulk_create([
+        Employee(
+            user=user,
+            employee_id=f'{prefix}{i}',
+            department='Engineering',
+            designation='Developer',
+            contact_number='9999999999',
+            basic_salary=Decimal('10000.00'),
+        )
+        for i, user in enumerate(users)
+    ])
+
+
+def create_payrolls(employees, periods):
+    Payroll.objects.bulk_create([
+        Payroll(employee=employee, month=month, year=year, period=Payroll.period_of(month, year),
+                **Payroll.salary_components(employee.basic_salary))
+        for month, year in periods
+        for employee in employees
+    ])
+
+
+# -------------------------------
+# Payroll Reports
+# -------------------------------
+class PayrollSummaryTests(TestCase):
+    periods = [('January', 2024), ('February', 2024), ('January', 2025)]
+
+    def measure(self):
+        with CaptureQueriesContext(connection) as queries:
+            tracemalloc.start()
+            summary = payroll_summary()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return summary, len(queries), peak
+
+    def test_totals_and_breakdowns(self):
+        create_payrolls(create_employees(3), self.periods)
+        summary = payroll_summary()
+
+        self.assertEqual(summary['total_employees'], 3)
+        self.assertEqual(summary['total_payrolls'], 9)
+        self.assertEqual(summary['total_salary'], Decimal('12500') * 9)
+        self.assertEqual(
+            [(row['year'], row['payrolls']) for row in summary['by_year']],
+            [(2024, 6), (2025, 3)],
+        )
+        self.assertEqual(
+            [(row['year'], row['month']) for row in summary['by_month']],
+            [(2024, 'January'), (2024, 'February'), (2025, 'January')],
+        )
+
+    def test_query_count_and_memory_stay_flat_as_table_grows(self):
+        create_payrolls(create_employees(20, 'small'), self.periods)
+        _, small_queries, small_peak = self.measure()
+
+        create_payrolls(create_employees(2000, 'large'), self.periods)
+        summary, large_queries, large_peak = self.measure()
+
+        self.assertEqual(summary['total_payrolls'], 2020 * len(self.periods))
+        self.assertEqual(small_queries, 2)  # employee count + grouped periods
+        self.assertEqual(large_queries, small_queries)
+        # 100x more payroll rows must not mean 100x more memory.
+        self.assertLess(large_peak, small_peak * 2)
+
+    def test_headcounts(self):
+        from .reports import headcounts
+
+        self.assertEqual(headcounts(), {'total_employees': 0, 'total_payrolls': 0})
+        create_payrolls(create_employees(3), self.periods)
+        create_employees(2, 'unpaid')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(headcounts(), {'total_employees': 5, 'total_payrolls': 9})
+        self.assertEqual(len(queries), 1)
+
+    def test_admin_reports_query_count(self):
+        create_payrolls(create_employees(50), self.periods)
+        admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client.force_login(admin)
+
+        # user + employee count + grouped periods (the cached_db session is read from the cache)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('admin_reports'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_payrolls'], 150)
+
+
+# -------------------------------
+# Employee IDs
+# -------------------------------
+class EmployeeIdSequenceTests(TestCase):
+    def new_employee(self, username):
+        user = User.objects.create(username=username, role='employee')
+        return Employee.objects.create(
+            user=user, department='HR', designation='Executive',
+            contact_number='9999999999', basic_salary=Decimal('10000.00'),
+        )
+
+    def test_ids_are_sequential_and_never_reused(self):
+        period = EmployeeIdSequence.current_period()
+        first = self.new_employee('first')
+        second = self.new_employee('second')
+        self.assertEqual(first.employee_id, f'{period}0001')
+        self.assertEqual(second.employee_id, f'{period}0002')
+
+        second.delete()
+        self.assertEqual(self.new_employee('third').employee_id, f'{period}0003')
+
+    def test_reserve_range_for_bulk_import(self):
+        reserved = EmployeeIdSequence.reserve(3, period='202401')
+        self.assertEqual(reserved, ['2024010001', '2024010002', '2024010003'])
+        self.assertEqual(EmployeeIdSequence.next_id(period='202401'), '2024010004')
+        self.assertEqual(EmployeeIdSequence.reserve(0, period='202401'), [])
+
+
+# -------------------------------
+# Keyset Pagination
+# -------------------------------
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_payrolls(create_employees(30), [('January', 2025), ('February', 2025)])
+        cls.hr = User.objects.create_user(username='hr', password='pass', role='hr')
+
+    def setUp(self):
+        self.client.force_login(self.hr)
+
+    def walk(self, query):
+        response = self.client.get(reverse('manage_payrolls') + '?' + query)
+        self.assertEqual(response.status_code, 200)
+        return response.context['page']
+
+    def test_pages_cover_every_row_once_in_stable_order(self):
+        seen, query = [], 'size=7'
+        while True:
+            page = self.walk(query)
+            seen.extend(payroll.id for payroll in page)
+            if not page.has_next:
+                break
+            query = page.next_query
+
+        expected = list(Payroll.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_the_earlier_page(self):
+        first = self.walk('size=10')
+        second = self.walk(first.next_query)
+        self.assertTrue(second.has_previous)
+        back = self.walk(second.previous_query)
+        self.assertEqual([p.id for p in back], [p.id for p in first])
+        self.assertFalse(back.has_previous)
+
+    def test_page_size_is_capped_and_invalid_cursors_fall_back_to_first_page(self):
+        self.assertEqual(self.walk('size=100000').size, 100)
+        self.assertEqual(len(self.walk('after=not-a-cursor&size=5')), 5)
+
+    def test_deep_pages_cost_the_same_queries_as_page_one(self):
+        first = self.walk('size=5')
+        page = first
+        for _ in range(5):
+            page = self.walk(page.next_query)
+
+        with CaptureQueriesContext(connection) as first_queries:
+            self.walk('size=5')
+        with CaptureQueriesContext(connection) as deep_queries:
+            self.walk(page.next_query)
+        self.assertEqual(len(first_queries), len(deep_queries))
+        self.assertNotIn('OFFSET', deep_queries[-1]['sql'])
+
+
+# -------------------------------
+# Bulk Payroll Run
+# -------------------------------
+class PayrollRunTests(TestCase):
+    def test_rerunning_a_month_updates_instead_of_duplicating(self):
+        employees = create_employees(5)
+        first = run_payroll('March', 2025, batch_size=2)
+        self.assertEqual((first.created, first.updated), (5, 0))
+
+        Employee.objects.filter(id=employees[0].id).update(basic_salary=Decimal('20000.00'))
+        second = run_payroll('March', 2025, batch_size=2)
+        self.assertEqual((second.created, second.updated), (0, 5))
+        self.assertEqual(Payroll.objects.filter(month='March', year=2025).count(), 5)
+        self.assertEqual(
+            Payroll.objects.get(employee=employees[0], month='March', year=2025).net_salary,
+            Decimal('25000'),
+        )
+
+    def test_view_runs_a_validated_month(self):
+        create_employees(2)
+        self.client.force_login(User.objects.create(username='hr', role='hr'))
+        response = self.client.post(reverse('run_payroll'), {'month': 'mar', 'year': '2025'})
+        self.assertRedirects(response, reverse('manage_payrolls'), fetch_redirect_response=False)
+        self.assertEqual(Payroll.objects.filter(month='March', year=2025).count(), 2)
+
+        for data in ({'month': 'March', 'year': 'soon'}, {'month': 'March', 'year': '0'},
+                     {'month': 'Marchember', 'year': '2025'}, {'month': 'March'}):
+            response = self.client.post(reverse('run_payroll'), data)
+            self.assertEqual(response.status_code, 400)
+            self.assertTrue(response.context['form'].errors)
+        self.assertEqual(Payroll.objects.count(), 2)
+
+    def test_command(self):
+        from io import StringIO
+        from django.core.management import CommandError, call_command
+
+        create_employees(2)
+        out = StringIO()
+        call_command('run_payroll', '4', '2025', stdout=out)
+        self.assertIn('Payroll April 2025: 2 created', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('run_payroll', 'Smarch', '2025', stdout=out)
+
+    def test_upsert_without_conflict_target(self):
+        # MySQL's ON DUPLICATE KEY UPDATE takes no target; passing unique_fields there raises NotSupportedError.
+        from unittest import mock
+
+        create_employees(3)
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            result = run_payroll('May', 2025)
+        self.assertEqual((result.created, result.updated), (3, 0))
+        self.assertEqual(Payroll.objects.filter(month='May', year=2025).count(), 3)
+
+
+# -------------------------------
+# Query Plans (EXPLAIN harness)
+# -------------------------------
+class QueryPlanTests(TestCase):
+    """
+    Fails if one of the hot views makes the database fall back to a full table
+    scan. Every SELECT issued while rendering the view is re-run under EXPLAIN.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employees = create_employees(40)
+        create_payrolls(cls.employees, [('January', 2025), ('February', 2025)])
+
+        cls.users = {
+            role: User.objects.create_user(username=f'plan_{role}', password='pass', role=role)
+            for role in ['hr', 'sales', 'manager', 'head_manager']
+        }
+        other_sales = User.objects.create(username='plan_other_sales', role='sales')
+        Lead.objects.bulk_create([
+            Lead(
+                name=f'Lead {i}',
+                assigned_to=cls.users['sales'] if i % 2 else other_sales,
+                status=['Open', 'In Progress', 'Closed'][i % 3],
+            )
+            for i in range(200)
+        ])
+        teams = Team.objects.bulk_create([
+            Team(name=f'Team {i}', head_manager=cls.users['head_manager']) for i in range(10)
+        ])
+        for team in teams[:5]:
+            team.managers.add(cls.users['manager'])
+            team.members.add(*[employee.user for employee in cls.employees[:5]])
+        TeamReport.objects.bulk_create([
+            TeamReport(team=teams[i % 10], title=f'Task {i}', description='...') for i in range(200)
+        ])
+
+    def full_scans(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                # A bare "SCAN <table>" (no index) is a full table scan.
+                return [row[-1] for row in cursor.fetchall()
+                        if row[-1].startswith('SCAN ') and 'USING' not in row[-1]]
+            if connection.vendor == 'mysql':
+                cursor.execute(f'EXPLAIN {sql}')
+                columns = [col[0] for col in cursor.description]
+                return [row[columns.index('table')] for row in cursor.fetchall()
+                        if row[columns.index('type')] == 'ALL']
+        self.skipTest(f'No EXPLAIN parser for {connection.vendor}')
+
+    def assert_no_full_scans(self, role, url_name, *args, data=None):
+        self.client.force_login(self.users[role])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name, args=args), data)
+        self.assertEqual(response.status_code, 200)
+
+        for query in queries:
+            if query['sql'].startswith('SELECT'):
+                self.assertEqual(self.full_scans(query['sql']), [], query['sql'])
+
+    def test_sales_views(self):
+        self.assert_no_full_scans('sales', 'sales_dashboard')
+        self.assert_no_full_scans('sales', 'sales_leads')
+
+    def test_manager_views(self):
+        self.assert_no_full_scans('manager', 'manager_dashboard')
+        self.assert_no_full_scans('manager', 'manager_tasks')
+
+    def test_head_manager_dashboard(self):
+        self.assert_no_full_scans('head_manager', 'head_manager_dashboard')
+
+    def test_payroll_list(self):
+        self.assert_no_full_scans('hr', 'manage_payrolls')
+        self.assert_no_full_scans('hr', 'manage_payrolls', data={'from': '2025-02', 'to': '2025-03'})
+
+    def test_harness_detects_full_scans(self):
+        sql, params = Lead.objects.filter(notes='unindexed').query.sql_with_params()
+        with connection.cursor() as cursor:
+            sql = connection.ops.last_executed_query(cursor, sql, params)
+        self.assertNotEqual(self.full_scans(sql), [])
+
+
+# -------------------------------
+# Dashboard Metrics
+# -------------------------------
+class DashboardQueryCountTests(TestCase):
+    # user + one metrics query (the cached_db session is read from the cache)
+    QUERIES = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.head_manager = User.objects.create(username='head', role='head_manager')
+        cls.manager = User.objects.create(username='manager', role='manager')
+        cls.sales = User.objects.create(username='sales', role='sales')
+        cls.head_hr = User.objects.create(username='head_hr', role='head_hr')
+        cls.members = [employee.user for employee in create_employees(6)]
+
+    def setUp(self):
+        cache.clear()
+
+    def add_teams(self, count):
+        for i in range(count):
+            team = Team.objects.create(name=f'Team {Team.objects.count()}', head_manager=self.head_manager)
+            team.managers.add(self.manager)
+            team.members.add(*self.members[:3])
+            TeamReport.objects.create(team=team, title='Weekly report', description='...')
+
+    def get(self, user, url_name):
+        self.client.force_login(user)
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return response.context
+
+    def test_manager_dashboard(self):
+        self.add_teams(1)
+        self.get(self.manager, 'manager_dashboard')
+        self.add_teams(9)
+        context = self.get(self.manager, 'manager_dashboard')
+        self.assertEqual(context['total_team_members'], 30)
+        self.assertEqual(context['total_reports'], 10)
+        self.assertEqual(context['teams'][0].member_count, 3)
+
+    def test_head_manager_dashboard(self):
+        self.add_teams(1)
+        self.get(self.head_manager, 'head_manager_dashboard')
+        self.add_teams(9)
+        context = self.get(self.head_manager, 'head_manager_dashboard')
+        self.assertEqual(context['total_teams'], 10)
+        self.assertEqual(context['total_managers'], 1)
+        self.assertEqual(context['total_reports'], 10)
+
+    def test_sales_dashboard(self):
+        self.get(self.sales, 'sales_dashboard')
+        for i in range(30):
+            Lead.objects.create(name=f'Lead {i}', assigned_to=self.sales, status=['Open', 'Closed', 'In Progress'][i % 3])
+        context = self.get(self.sales, 'sales_dashboard')
+        self.assertEqual(
+            (context['total_leads'], context['open_leads'], context['closed_leads']), (30, 10, 10)
+        )
+
+    def test_head_hr_dashboard(self):
+        create_payrolls(create_employees(10, 'hr'), [('January', 2025)])
+        context = self.get(self.head_hr, 'head_hr_dashboard')
+        self.assertEqual((context['total_employees'], context['total_payrolls']), (16, 10))
+
+
+# -------------------------------
+# Django Admin
+# -------------------------------
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser(username='root', password='pass', email='root@example.com')
+        cls.head_manager = User.objects.create(username='head', role='head_manager')
+        cls.members = [employee.user for employee in create_employees(5)]
+
+    def add_rows(self, count):
+        for _ in range(count):
+            team = Team.objects.create(name='Team', head_manager=self.head_manager)
+            team.managers.add(User.objects.create(username=f'manager{team.id}', role='manager'))
+            team.members.add(*self.members)
+            TeamReport.objects.create(team=team, title='Report', description='...')
+        create_payrolls(Employee.objects.all(), [(f'Month {Team.objects.count()}', 2025)])
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:core_{model}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.client.force_login(self.superuser)
+        self.changelist_queries('team')  # warm the cached session user
+        self.add_rows(2)
+        before = {model: self.changelist_queries(model) for model in ['team', 'teamreport', 'payroll', 'employee']}
+        self.add_rows(8)
+        after = {model: self.changelist_queries(model) for model in ['team', 'teamreport', 'payroll', 'employee']}
+        self.assertEqual(before, after)
+
+    def test_team_changelist_counts_members_in_sql(self):
+        self.client.force_login(self.superuser)
+        self.add_rows(1)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:core_team_changelist'), {'o': '4'})
+        self.assertEqual([team.member_count for team in response.context['cl'].result_list], [5])
+        member_rows = [query for query in queries if 'core_team_members' in query['sql'] and 'COUNT' not in query['sql']]
+        self.assertEqual(member_rows, [])
+
+    def test_estimated_count_paginator(self):
+        create_payrolls(create_employees(30, 'est'), [('January', 2025)])
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        with override_settings(ERP_ESTIMATED_COUNT_THRESHOLD=10):
+            with self.assertNumQueries(1):
+                self.assertGreaterEqual(EstimatedCountPaginator(Payroll.objects.all(), 10).count, 10)
+            # Filtered querysets are always counted exactly
+            filtered = Payroll.objects.filter(employee__employee_id='est1')
+            self.assertEqual(EstimatedCountPaginator(filtered, 10).count, 1)
+
+        with override_settings(ERP_ESTIMATED_COUNT_THRESHOLD=10 ** 9):
+            self.assertEqual(EstimatedCountPaginator(Payroll.objects.all(), 10).count, 30)
+
+
+# -------------------------------
+# Bulk Employee Import
+# -------------------------------
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class EmployeeImportTests(TestCase):
+    CSV = (
+        "username,password,first_name,last_name,email,department,designation,contact_number,basic_salary\n"
+        "asha,secret1,Asha,Rao,asha@example.com,Sales,Executive,9000000001,30000\n"
+        "ravi,secret2,Ravi,Iyer,,Tech,Engineer,9000000002,45000.50\n"
+        "asha,secret3,Dup,User,,Tech,Engineer,9000000003,1000\n"
+        "nopass,,No,Password,,Tech,Engineer,9000000004,1000\n"
+        "meera,secret4,Meera,Das,,Tech,Engineer,9000000005,not-a-number\n"
+    )
+
+    def test_import_reports_per_batch_and_reserves_ids(self):
+        from io import StringIO
+        from .imports import import_employees, iter_rows
+
+        EmployeeIdSequence.reserve(5)
+        report = import_employees(iter_rows(StringIO(self.CSV)), batch_size=2, workers=0)
+
+        self.assertEqual((report.rows, report.created), (5, 2))
+        self.assertEqual([batch.created for batch in report.batches], [2, 0, 0])
+        self.assertEqual([number for number, _ in report.errors], [3, 4, 5])
+
+        asha = Employee.objects.select_related('user').get(user__username='asha')
+        self.assertEqual(asha.user.role, 'employee')
+        self.assertTrue(asha.user.check_password('secret1'))
+        self.assertEqual(asha.employee_id, f'{EmployeeIdSequence.current_period()}0006')
+
+    def test_passwords_hashed_on_process_pool(self):
+        from .imports import import_employees
+
+        rows = [
+            {'username': f'pool{i}', 'password': f'pw{i}', 'department': 'Ops', 'designation': 'Clerk',
+             'contact_number': '9000000000', 'basic_salary': '1000'}
+            for i in range(6)
+        ]
+        report = import_employees(rows, batch_size=4, workers=2)
+        self.assertEqual(report.created, 6)
+        self.assertTrue(User.objects.get(username='pool5').check_password('pw5'))
+
+    def test_user_fields_are_validated_per_row(self):
+        from .imports import import_employees
+
+        employee = {'department': 'Ops', 'designation': 'Clerk', 'contact_number': '9000000000', 'basic_salary': '1000'}
+        rows = [
+            {'username': 'bad-email', 'password': 'pw', 'email': 'not-an-email', **employee},
+            {'username': 'long-name', 'password': 'pw', 'first_name': 'x' * 151, **employee},
+            {'username': 'u' * 151, 'password': 'pw', **employee},
+            {'username': 'has space', 'password': 'pw', **employee},
+            {'username': 'fine', 'password': 'pw', 'email': 'fine@example.com', **employee},
+        ]
+        report = import_employees(rows)
+        self.assertEqual(report.created, 1)
+        errors = dict(report.errors)
+        self.assertEqual(sorted(errors), [1, 2, 3, 4])
+        self.assertIn('email:', errors[1])
+        self.assertIn('first_name:', errors[2])
+        self.assertIn('username:', errors[3])
+
+    def test_a_shared_password_is_hashed_once(self):
+        from unittest import mock
+
+        from . import imports
+
+        rows = [
+            {'username': f'shared{i}', 'password': 'welcome', 'department': 'Ops', 'designation': 'Clerk',
+             'contact_number': '9000000000', 'basic_salary': '1000'}
+            for i in range(4)
+        ]
+        with mock.patch.object(imports, 'make_password', wraps=imports.make_password) as make_password:
+            self.assertEqual(imports.import_employees(rows).created, 4)
+        self.assertEqual(make_password.call_count, 1)
+        self.assertTrue(User.objects.get(username='shared3').check_password('welcome'))
+
+    def test_upload_view(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        self.client.force_login(User.objects.create(username='hr', role='hr'))
+        upload = SimpleUploadedFile('staff.csv', self.CSV.encode())
+        response = self.client.post(reverse('import_employees'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report'].created, 2)
+
+    def test_unreadable_uploads_are_reported(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        self.client.force_login(User.objects.create(username='hr', role='hr'))
+        uploads = [
+            SimpleUploadedFile('staff.jsonl', b'{"username": "asha"}\n{"username": \n'),
+            SimpleUploadedFile('staff.csv', 'username,password\nzoë,secret\n'.encode('latin-1')),
+            SimpleUploadedFile('staff.json', b'[{"username": '),
+            SimpleUploadedFile('staff.csv', b'username\n"' + b'a' * 200000 + b'"\n'),  # over csv.field_size_limit()
+        ]
+        for upload in uploads:
+            response = self.client.post(reverse('import_employees'), {'file': upload})
+            self.assertEqual(response.status_code, 400)
+            self.assertContains(response, 'Could not read the file', status_code=400)
+        self.assertFalse(Employee.objects.exists())
+
+
+# -------------------------------
+# CSV Exports
+# -------------------------------
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        employees = create_employees(5)
+        Employee.objects.filter(id=employees[0].id).update(department='Sales')
+        create_payrolls(employees, [('January', 2024), ('January', 2025)])
+        cls.hr = User.objects.create(username='hr', role='hr')
+
+    def setUp(self):
+        self.client.force_login(self.hr)
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_payroll_export_filters(self):
+        response = self.client.get(reverse('export_payrolls'), {'year': 2025, 'department': 'Sales'})
+        lines = self.read_csv(response)
+        self.assertEqual(lines[0].split(',')[0], 'Employee ID')
+        self.assertEqual(len(lines), 2)
+        self.assertIn(',Sales,January,2025,', lines[1])
+
+        self.assertEqual(self.client.get(reverse('export_payrolls'), {'year': 'abc'}).status_code, 400)
+
+    def test_years_outside_the_calendar_are_rejected(self):
+        for params in ({'year': '0'}, {'year': '10000'}, {'year': '0', 'month': 'January'}, {'from': '0000-01'}):
+            response = self.client.get(reverse('export_payrolls'), params)
+            self.assertEqual(response.status_code, 400, params)
+
+        self.client.force_login(User.objects.create_user(username='reports_admin', password='x', role='admin'))
+        for period in ('0000-01', '10000-01'):
+            response = self.client.get(reverse('admin_reports'), {'from': period})
+            self.assertEqual(response.status_code, 400, period)
+
+    def test_export_reads_in_bounded_chunks(self):
+        from .exports import EMPLOYEE_COLUMNS, iter_values
+
+        fields = [field for _, field in EMPLOYEE_COLUMNS]
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(iter_values(Employee.objects.all(), fields, chunk_size=2))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(len(self.read_csv(self.client.get(reverse('export_employees')))), 6)
+
+    def test_xlsx_export(self):
+        import zipfile
+        from io import BytesIO
+        from xml.etree import ElementTree
+
+        response = self.client.get(reverse('export_payrolls'), {'year': 2025, 'format': 'xlsx'})
+        self.assertTrue(response.streaming)
+        self.assertIn('payroll.xlsx', response['Content-Disposition'])
+        workbook = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(workbook.testzip())
+        sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+        namespace = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+        rows = sheet.findall(f'{namespace}sheetData/{namespace}row')
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(''.join(rows[0][0].itertext()), 'Employee ID')
+        self.assertEqual(rows[1][4].find(f'{namespace}v').text, '2025')  # numbers are numeric cells
+
+        self.assertEqual(self.client.get(reverse('export_employees'), {'format': 'pdf'}).status_code, 400)
+
+    def test_month_filter_reads_the_stored_month(self):
+        with CaptureQueriesContext(connection) as queries:
+            lines = self.read_csv(self.client.get(reverse('export_payrolls'), {'month': 'jan'}))
+        self.assertEqual(len(lines), 11)
+        export = next(query['sql'] for query in queries if 'core_payroll' in query['sql'])
+        self.assertIn('"core_payroll"."month" = ', export)
+        self.assertNotIn('django_date_extract', export)
+
+
+# -------------------------------
+# Lead Search
+# -------------------------------
+class LeadSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create(username='sales', role='sales')
+        cls.other = User.objects.create(username='other', role='sales')
+        cls.acme = Lead.objects.create(name='Priya Shah', company='Acme Corp', email='priya@acme.test',
+                                       notes='Wants an Acme renewal quote', assigned_to=cls.sales)
+        cls.globex = Lead.objects.create(name='Arjun Mehta', company='Globex', notes='Mentioned acme once',
+                                         assigned_to=cls.sales)
+        cls.hidden = Lead.objects.create(name='Acme Hidden', company='Acme Corp', assigned_to=cls.other)
+
+    def test_ranked_prefix_search_scoped_to_queryset(self):
+        from .search import search_leads
+
+        results = search_leads('acm', Lead.objects.filter(assigned_to=self.sales))
+        self.assertEqual(results, [self.acme, self.globex])
+        self.assertEqual(search_leads('acme priya'), [self.acme])
+        self.assertEqual(search_leads('  '), [])
+
+    def test_short_and_stopword_terms(self):
+        from unittest import mock
+
+        from . import search
+
+        it_services = Lead.objects.create(name='Kabir Rao', company='IT Services', assigned_to=self.sales)
+        self.assertEqual(search.search_leads('it services'), [it_services])
+        self.assertEqual(search.search_leads('a globex'), [self.globex])
+
+        self.assertEqual(
+            search.split_fulltext_terms(['a', 'cafe', 'IT', 'services', 'the'], 3, {'the'}),
+            (['cafe', 'services'], ['a', 'IT', 'the']),
+        )
+        # A query of words the FULLTEXT index drops falls back to icontains
+        with mock.patch.object(search, 'search_backend', return_value='mysql'), \
+                mock.patch.object(search, 'mysql_fulltext_rules', return_value=(3, frozenset({'it'}))):
+            self.assertEqual(search.search_leads('it'), [it_services])
+
+    def test_index_follows_save_and_delete(self):
+        from .search import search_leads
+
+        self.globex.notes = 'No longer interested'
+        self.globex.save()
+        self.assertEqual(search_leads('acme', Lead.objects.filter(assigned_to=self.sales)), [self.acme])
+        self.assertEqual(search_leads('interested'), [self.globex])
+
+        self.acme.delete()
+        self.assertEqual(search_leads('priya'), [])
+
+    def test_search_view(self):
+        self.client.force_login(self.sales)
+        response = self.client.get(reverse('search_leads'), {'q': 'acme'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['leads']), [self.acme, self.globex])
+
+
+# -------------------------------
+# Async Views
+# -------------------------------
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.head_manager = User.objects.create(username='head', role='head_manager')
+        cls.manager = User.objects.create(username='manager', role='manager')
+        cls.sales = User.objects.create(username='sales', role='sales')
+        cls.hr = User.objects.create(username='hr', role='hr')
+        team = Team.objects.create(name='Alpha', head_manager=cls.head_manager)
+        team.managers.add(cls.manager)
+        team.members.add(*[employee.user for employee in create_employees(3)])
+        TeamReport.objects.create(team=team, title='Report', description='...')
+        Lead.objects.create(name='Lead', assigned_to=cls.sales, status='Open')
+
+    async def get(self, user, url_name):
+        await self.async_client.aforce_login(user)
+        return await self.async_client.get(reverse(url_name))
+
+    async def test_dashboards_match_sync_metrics(self):
+        response = await self.get(self.manager, 'async_manager_dashboard')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.context['total_team_members'], response.context['total_reports']), (3, 1))
+
+        response = await self.get(self.head_manager, 'async_head_manager_dashboard')
+        self.assertEqual(
+            [response.context[key] for key in ('total_teams', 'total_managers', 'total_reports')], [1, 1, 1]
+        )
+
+        response = await self.get(self.sales, 'async_sales_dashboard')
+        self.assertEqual((response.context['total_leads'], response.context['open_leads']), (1, 1))
+
+    async def test_list_views(self):
+        response = await self.get(self.manager, 'async_manager_tasks')
+        self.assertEqual([task.title for task in response.context['tasks']], ['Report'])
+        response = await self.get(self.hr, 'async_manage_employees')
+        self.assertEqual(len(response.context['employees']), 3)
+
+    async def test_access_checks(self):
+        response = await self.async_client.get(reverse('async_sales_dashboard'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/login/', response.url)
+
+        response = await self.get(self.manager, 'async_sales_dashboard')
+        self.assertRedirects(response, reverse('unauthorized'), fetch_redirect_response=False)
+
+
+class AsyncDashboardConnectionTests(TransactionTestCase):
+    async def test_metrics_run_on_a_worker_connection_outside_transactions(self):
+        import threading
+        from unittest import mock
+
+        from asgiref.sync import sync_to_async
+
+        from .dashboards import DASHBOARD_METRICS, adashboard_metrics, sales_metrics
+
+        sales = await User.objects.acreate(username='sales', role='sales')
+        await Lead.objects.acreate(name='Lead', assigned_to=sales, status='Open')
+        threads = []
+
+        def metrics(user):
+            threads.append(threading.get_ident())
+            return sales_metrics(user)
+
+        with mock.patch.dict(DASHBOARD_METRICS, {'sales': metrics}):
+            context = await adashboard_metrics(sales)
+        self.assertEqual(context, await sync_to_async(sales_metrics)(sales))
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], await sync_to_async(threading.get_ident)())  # not the shared sync thread
+
+
+
+# -------------------------------
+# Dashboard Cache
+# -------------------------------
+class DashboardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.head_manager = User.objects.create(username='head', role='head_manager')
+        cls.manager = User.objects.create(username='manager', role='manager')
+        cls.sales = User.objects.create(username='sales', role='sales')
+        cls.team = Team.objects.create(name='Alpha', head_manager=cls.head_manager)
+        cls.team.managers.add(cls.manager)
+
+    def setUp(self):
+        from .dashboard_cache import reset_cache_stats
+        cache.clear()
+        reset_cache_stats()
+
+    def metrics(self, user):
+        from .dashboard_cache import cached_dashboard_metrics
+        return cached_dashboard_metrics(User.objects.get(pk=user.pk))
+
+    def test_hits_and_misses_are_counted(self):
+        from .dashboard_cache import cache_stats
+
+        self.metrics(self.sales)
+        with self.assertNumQueries(1):  # just loading the user
+            self.metrics(self.sales)
+        self.assertEqual(cache_stats()['sales'], {'hits': 1, 'misses': 1})
+
+    def test_lead_writes_invalidate_old_and_new_owner(self):
+        other = User.objects.create(username='other', role='sales')
+        lead = Lead.objects.create(name='Lead', assigned_to=self.sales)
+        self.assertEqual(self.metrics(self.sales)['total_leads'], 1)
+        self.assertEqual(self.metrics(other)['total_leads'], 0)
+
+        lead = Lead.objects.get(pk=lead.pk)
+        lead.assigned_to = other
+        lead.save()
+        self.assertEqual(self.metrics(self.sales)['total_leads'], 0)
+        self.assertEqual(self.metrics(other)['total_leads'], 1)
+
+    def test_team_changes_invalidate_managers_and_head_manager(self):
+        self.assertEqual(self.metrics(self.manager)['total_reports'], 0)
+        self.assertEqual(self.metrics(self.head_manager)['total_reports'], 0)
+
+        TeamReport.objects.create(team=self.team, title='Report', description='...')
+        self.assertEqual(self.metrics(self.manager)['total_reports'], 1)
+        self.assertEqual(self.metrics(self.head_manager)['total_reports'], 1)
+
+        self.team.members.add(*[employee.user for employee in create_employees(2)])
+        self.assertEqual(self.metrics(self.manager)['total_team_members'], 2)
+
+        self.manager.assigned_teams.clear()
+        self.assertEqual(self.metrics(self.manager)['teams'], [])
+        self.assertEqual(self.metrics(self.head_manager)['total_managers'], 0)
+
+    def test_unrelated_writes_keep_entries(self):
+        from .dashboard_cache import cache_stats
+
+        self.metrics(self.head_manager)
+        Lead.objects.create(name='Lead', assigned_to=self.sales)
+        self.metrics(self.head_manager)
+        self.assertEqual(cache_stats()['head_manager'], {'hits': 1, 'misses': 1})
+
+    def test_deploy_check_requires_a_shared_cache(self):
+        from .checks import check_shared_caches
+
+        errors = check_shared_caches(None)
+        self.assertIn('ERP_DASHBOARD_CACHE', [error.msg.split()[0] for error in errors])
+        with override_settings(ERP_DASHBOARD_CACHE='files'):
+            self.assertNotIn('ERP_DASHBOARD_CACHE', [error.msg.split()[0] for error in check_shared_caches(None)])
+
+    def test_deploy_check_covers_the_user_and_session_caches(self):
+        from .checks import check_shared_caches
+
+        def failing():
+            return {error.msg.split()[0] for error in check_shared_caches(None)}
+
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db'):
+            self.assertTrue({'ERP_AUTH_USER_CACHE', 'SESSION_CACHE_ALIAS'} <= failing())
+        with override_settings(ERP_AUTH_USER_CACHE='files', SESSION_ENGINE='django.contrib.sessions.backends.db'):
+            self.assertFalse({'ERP_AUTH_USER_CACHE', 'SESSION_CACHE_ALIAS'} & failing())
+
+
+class CachedSessionUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = User.objects.create_user(username='hr', password='secret', role='hr')
+
+    def setUp(self):
+        cache.clear()
+
+    def assertWarmRequestsQueryFree(self):
+        self.client.force_login(self.hr)
+        self.client.get(reverse('hr_dashboard'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('hr_dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_cached_db_sessions_skip_the_database(self):
+        self.assertWarmRequestsQueryFree()
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookie_sessions_skip_the_database(self):
+        self.assertWarmRequestsQueryFree()
+
+    def test_saving_the_user_refreshes_the_cached_copy(self):
+        self.client.force_login(self.hr)
+        self.client.get(reverse('hr_dashboard'))
+
+        self.hr.role = 'sales'
+        self.hr.save()
+        response = self.client.get(reverse('hr_dashboard'))
+        self.assertRedirects(response, reverse('unauthorized'), fetch_redirect_response=False)
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.force_login(self.hr)
+        self.client.get(reverse('hr_dashboard'))
+
+        User.objects.filter(pk=self.hr.pk).update(password='changed')  # bypasses signals
+        from .middleware import forget_cached_user
+        forget_cached_user(self.hr.pk)
+        response = self.client.get(reverse('hr_dashboard'))
+        self.assertEqual(response.status_code, 302)
+        self.assertNotEqual(response.url, reverse('unauthorized'))
+
+
+# -------------------------------
+# Request Profiling
+# -------------------------------
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', role='admin')
+        cls.sales = User.objects.create(username='sales', role='sales')
+
+    def setUp(self):
+        from . import profiling
+        cache.clear()
+        profiling.reset()
+
+    def test_histogram_percentiles(self):
+        from .profiling import METRICS, Histogram
+
+        histogram = Histogram(METRICS['duration_seconds'])
+        for _ in range(90):
+            histogram.observe(0.002)
+        for _ in range(10):
+            histogram.observe(0.3)
+        self.assertLessEqual(histogram.percentile(50), 0.005)
+        self.assertGreater(histogram.percentile(95), 0.25)
+        self.assertLessEqual(histogram.percentile(95), 0.5)
+
+    def test_requests_are_recorded_per_url_name(self):
+        from .profiling import route_summaries
+
+        self.client.force_login(self.sales)
+        for _ in range(3):
+            self.client.get(reverse('sales_dashboard'))
+        row = next(row for row in route_summaries() if row['route'] == 'sales_dashboard')
+        self.assertEqual(row['requests'], 3)
+        self.assertGreater(row['avg_queries'], 0)
+        self.assertGreater(row['avg_bytes'], 0)
+
+    def test_perf_pages_are_admin_only(self):
+        self.client.force_login(self.sales)
+        self.assertRedirects(self.client.get(reverse('perf_dashboard')), reverse('unauthorized'),
+                             fetch_redirect_response=False)
+        self.assertEqual(self.client.get(reverse('perf_metrics')).status_code, 403)
+
+        self.client.force_login(self.admin)
+        self.client.get(reverse('admin_dashboard'))
+        self.assertContains(self.client.get(reverse('perf_dashboard')), 'admin_dashboard')
+        response = self.client.get(reverse('perf_metrics'))
+        self.assertContains(response, 'erp_request_duration_seconds_count{route="admin_dashboard"} 1')
+
+    @override_settings(ERP_PERF_METRICS_TOKEN='scrape-me')
+    def test_metrics_accept_bearer_token(self):
+        response = self.client.get(reverse('perf_metrics'), headers={'Authorization': 'Bearer scrape-me'})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('perf_metrics'), headers={'Authorization': 'Bearer wrong'})
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(ERP_PERF_WINDOW_SECONDS=1)
+    def test_flush_writes_closed_windows_once(self):
+        from unittest import mock
+        from . import profiling
+        from .models import RequestMetric
+
+        with mock.patch('core.profiling.time.time', return_value=1000.5):
+            profiling.record('sales_dashboard', 0.01, 2, 0.001, 2048)
+            profiling.record('sales_dashboard', 0.02, 2, 0.001, 2048)
+        with mock.patch('core.profiling.time.time', return_value=1001.5):
+            self.assertEqual(profiling.flush(), 1)
+            self.assertEqual(profiling.flush(), 0)
+        metric = RequestMetric.objects.get()
+        self.assertEqual((metric.route, metric.requests, metric.avg_queries), ('sales_dashboard', 2, 2))
+
+    @override_settings(ERP_PERF_FLUSH=True)
+    async def test_async_requests_count_queries_and_flush_off_the_event_loop(self):
+        from unittest import mock
+        from . import profiling
+        from .models import RequestMetric
+
+        with mock.patch('core.profiling.time.time', return_value=1000.5):
+            profiling.record('sales_dashboard', 0.01, 2, 0.001, 2048)  # a long-closed window
+        await self.async_client.aforce_login(self.sales)
+        response = await self.async_client.get(reverse('async_sales_dashboard'))  # flushes it
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(await RequestMetric.objects.acount(), 1)
+        row = next(row for row in profiling.route_summaries() if row['route'] == 'async_sales_dashboard')
+        self.assertGreater(row['avg_queries'], 0)
+
+
+# -------------------------------
+# Route Query and Latency Budgets
+# -------------------------------
+# Every route in core/urls.py, requested as a role that may use it against a
+# realistically sized data set. A new N+1 pushes a route past its query
+# ceiling, whatever the fixture volumes. Counts are for a cold request: the
+# dashboard cache is empty and the logged-in user is loaded once.
+#   (url name, role, URL kwargs -> seeded object attribute, expected status, query ceiling)
+ROUTE_BUDGETS = [
+    ('login', None, {}, 200, 0),
+    ('logout', 'sales', {}, 302, 3),
+    ('unauthorized', None, {}, 200, 0),
+    ('profile', 'hr', {}, 200, 2),
+    # Dashboards
+    ('admin_dashboard', 'admin', {}, 200, 1),
+    ('hr_dashboard', 'hr', {}, 200, 1),
+    ('head_hr_dashboard', 'head_hr', {}, 200, 2),
+    ('manager_dashboard', 'manager', {}, 200, 2),
+    ('head_manager_dashboard', 'head_manager', {}, 200, 2),
+    ('sales_dashboard', 'sales', {}, 200, 2),
+    ('head_sales_dashboard', 'head_sales', {}, 200, 1),
+    ('assign_leads', 'head_sales', {}, 200, 3),
+    ('import_leads', 'head_sales', {}, 200, 2),
+    ('support_dashboard', 'support', {}, 200, 1),
+    ('head_support_dashboard', 'head_support', {}, 200, 1),
+    ('tech_dashboard', 'tech', {}, 200, 1),
+    ('head_tech_dashboard', 'head_tech', {}, 200, 1),
+    ('account_dashboard', 'account', {}, 200, 1),
+    ('head_account_dashboard', 'head_account', {}, 200, 1),
+    ('customer_dashboard', 'customer', {}, 200, 1),
+    ('head_customer_dashboard', 'head_customer', {}, 200, 1),
+    # Async dashboards and lists
+    ('async_head_hr_dashboard', 'head_hr', {}, 200, 3),
+    ('async_manager_dashboard', 'manager', {}, 200, 2),
+    ('async_head_manager_dashboard', 'head_manager', {}, 200, 4),
+    ('async_sales_dashboard', 'sales', {}, 200, 2),
+    ('async_manage_employees', 'hr', {}, 200, 2),
+    ('async_manage_payrolls', 'hr', {}, 200, 2),
+    ('async_manager_tasks', 'manager', {}, 200, 2),
+    ('async_sales_leads', 'sales', {}, 200, 2),
+    # Admin
+    ('manage_users', 'admin', {}, 200, 2),
+    ('add_user', 'admin', {}, 200, 1),
+    ('edit_user', 'admin', {'user_id': 'spare_user'}, 200, 2),
+    ('delete_user', 'admin', {'user_id': 'spare_user'}, 302, 14),
+    ('admin_reports', 'admin', {}, 200, 3),
+    ('dashboard_cache_stats', 'admin', {}, 200, 1),
+    ('perf_dashboard', 'admin', {}, 200, 1),
+    ('perf_metrics', 'admin', {}, 200, 1),
+    # HR
+    ('hr_reports', 'hr', {}, 200, 3),
+    ('manage_employees', 'hr', {}, 200,  3),
+    ('add_employee', 'hr', {}, 200, 1),
+    ('import_employees', 'hr', {}, 200, 1),
+    ('export_employees', 'hr', {}, 200, 2),
+    ('edit_employee', 'hr', {'employee_id': 'spare_employee'}, 200, 2),
+    ('delete_employee', 'hr', {'employee_id': 'spare_employee'}, 302, 18),
+    ('manage_payrolls', 'account', {}, 200,  3),
+    ('add_payroll', 'account', {}, 200, 2),
+    ('run_payroll', 'head_hr', {}, 200, 1),
+    ('simulate_payroll_rules', 'head_hr', {}, 200, 2),
+    ('export_payrolls', 'account', {}, 200, 2),
+    ('edit_payroll', 'account', {'payroll_id': 'spare_payroll'}, 200, 3),
+    ('delete_payroll', 'account', {'payroll_id': 'spare_payroll'}, 302, 3),
+    # Head manager / manager
+    ('assign_manager', 'head_manager', {}, 200, 3),
+    ('create_team', 'head_manager', {}, 200, 2),
+    ('manage_teams', 'head_manager', {}, 200, 3),
+    ('edit_team', 'head_manager', {'team_id': 'team'}, 200, 2),
+    ('move_team_members', 'head_manager', {}, 200, 3),
+    ('delete_team', 'head_manager', {'team_id': 'spare_team'}, 302, 9),
+    ('assign_task', 'manager', {'team_id': 'team'}, 200, 3),
+    ('manager_tasks', 'manager', {}, 200, 2),
+    ('manager_task_feed', 'manager', {}, 200, 3),
+    # Sales
+    ('sales_leads', 'sales', {}, 200, 3),
+    ('sales_leads_list', 'sales', {}, 200, 3),
+    ('search_leads', 'sales', {}, 200, 3),
+    ('add_lead', 'sales', {}, 200, 1),
+    ('update_lead', 'sales', {'lead_id': 'lead'}, 200, 2),
+]
+
+# Wall-clock ceiling per request; generous enough for a loaded CI machine,
+# tight enough to catch a view that starts scanning whole tables in Python.
+ROUTE_LATENCY_BUDGET = 0.5
+
+
+class RouteBudgetTests(TestCase):
+    EMPLOYEES = 300
+    PERIODS = [('January', 2025), ('February', 2025), ('March', 2025)]
+    TEAMS = 20
+    LEADS = 500
+
+    @classmethod
+    def setUpTestData(cls):
+        from .hierarchy import rebuild_hierarchy
+        from .search import rebuild_index
+
+        cls.users = {
+            role: User.objects.create(username=f'{role}_user', role=role)
+            for role, _ in User.ROLE_CHOICES
+        }
+        managers = User.objects.bulk_create([User(username=f'manager{i}', role='manager') for i in range(10)])
+        employees = create_employees(cls.EMPLOYEES)
+        create_payrolls(employees, cls.PERIODS)
+
+        head_manager = cls.users['head_manager']
+        teams = Team.objects.bulk_create([
+            Team(name=f'Team {i}', head_manager=head_manager) for i in range(cls.TEAMS)
+        ])
+        Team.managers.through.objects.bulk_create([
+            Team.managers.through(team=team, user=user)
+            for i, team in enumerate(teams)
+            for user in (cls.users['manager'] if i % 2 == 0 else managers[i % 10], managers[(i + 1) % 10])
+        ])
+        Team.members.through.objects.bulk_create([
+            Team.members.through(team=team, user=employees[(i * 10 + j) % cls.EMPLOYEES].user)
+            for i, team in enumerate(teams)
+            for j in range(10)
+        ])
+        TeamReport.objects.bulk_create([
+            TeamReport(team=team, title=f'Report {i}', description='Weekly status')
+            for i, team in enumerate(teams * 5)
+        ])
+        sales = [cls.users['sales']] + list(User.objects.bulk_create([
+            User(username=f'sales{i}', role='sales') for i in range(4)
+        ]))
+        Lead.objects.bulk_create([
+            Lead(name=f'Lead {i}', company=f'Company {i % 50}', email=f'lead{i}@example.com',
+                 status=('Open', 'In Progress', 'Closed')[i % 3], assigned_to=sales[i % 5])
+            for i in range(cls.LEADS)
+        ])
+        rebuild_index()
+        rebuild_hierarchy()
+
+        cls.team = teams[0]
+        cls.lead = Lead.objects.filter(assigned_to=cls.users['sales']).first()
+        cls.spare_user = User.objects.create(username='spare', role='customer')
+        cls.spare_employee = employees[-1]
+        cls.spare_payroll = Payroll.objects.filter(employee=employees[-2]).first()
+        cls.spare_team = Team.objects.create(name='Spare', head_manager=head_manager)
+
+    def request(self, url_name, role, kwargs, data=None):
+        cache.clear()
+        self.client.logout()
+        if role:
+            self.client.force_login(self.users[role])
+        url = reverse(url_name, kwargs={key: getattr(self, attr).pk for key, attr in kwargs.items()})
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response, len(queries), time.perf_counter() - started
+
+    def test_every_route_has_a_budget(self):
+        from .urls import urlpatterns
+
+        self.assertEqual({pattern.name for pattern in urlpatterns}, {name for name, *_ in ROUTE_BUDGETS})
+
+    def test_routes_stay_within_query_and_latency_budgets(self):
+        for url_name, role, kwargs, status, max_queries in ROUTE_BUDGETS:
+            with self.subTest(url_name):
+                data = {'q': 'company'} if url_name == 'search_leads' else None
+                response, queries, elapsed = self.request(url_name, role, kwargs, data)
+                self.assertEqual(response.status_code, status)
+                if status == 302:
+                    self.assertNotEqual(response.url, reverse('unauthorized'))
+                self.assertLessEqual(queries, max_queries, f'{url_name} ran {queries} queries')
+                self.assertLess(elapsed, ROUTE_LATENCY_BUDGET, f'{url_name} took {elapsed:.3f}s')
+
+    def test_single_payroll_saves_do_not_reload_the_rules(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            PayrollRules.current()  # warm, as any earlier request would have
+        self.client.force_login(self.users['account'])
+        url = reverse('edit_payroll', kwargs={'payroll_id': self.spare_payroll.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'month': 'April', 'year': 2025})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse([query for query in queries if 'core_payrollrule' in query['sql']])
+        self.assertLessEqual(len(queries), 5)  # user, payroll, employee, duplicate check, UPDATE
+
+
+# -------------------------------
+# Scale Data Generator
+# -------------------------------
+class SeedTests(TestCase):
+    def test_seed_is_deterministic_and_scaled(self):
+        from .seed import LEADS, ROLE_WEIGHTS, TEAMS, seed_erp
+
+        report = seed_erp(scale=1, seed=7, months=2, prefix='a', dev=True)
+        self.assertEqual(User.objects.filter(username__startswith='a-').count(), sum(ROLE_WEIGHTS.values()))
+        self.assertEqual(Payroll.objects.count(), ROLE_WEIGHTS['employee'] * 2)
+        self.assertEqual(Team.objects.count(), TEAMS)
+        self.assertEqual(Lead.objects.count(), LEADS)
+        self.assertEqual(report.rows, sum(rows for _, rows, _ in report.tables))
+        self.assertFalse(Team.objects.filter(members=None).exists())
+
+        def fingerprint(prefix):
+            employees = Employee.objects.filter(user__username__startswith=f'{prefix}-').order_by('id')
+            return list(employees.values_list('department', 'basic_salary'))
+
+        seed_erp(scale=1, seed=7, months=1, prefix='b', dev=True)
+        self.assertEqual(fingerprint('a'), fingerprint('b'))
+
+    def test_seed_ignores_the_clock_and_stored_state(self):
+        from unittest import mock
+
+        from .models import EmployeeIdSequence
+        from .seed import seed_erp
+
+        existing = Team.objects.create(name='c Team 0', head_manager=User.objects.create(username='other'))
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            seed_erp(scale=1, seed=3, months=2, prefix='c', reference_date=datetime.date(2024, 1, 15), dev=True)
+
+        self.assertEqual(
+            set(Payroll.objects.values_list('month', 'year').distinct()), {('December', 2023), ('January', 2024)}
+        )
+        self.assertEqual(Employee.objects.order_by('id').values_list('employee_id', flat=True)[0], 'c-000001')
+        self.assertFalse(EmployeeIdSequence.objects.exists())
+        # Team names are not unique; the existing team must not pick up the new team's links
+        self.assertFalse(existing.members.exists())
+        self.assertFalse(Team.objects.exclude(pk=existing.pk).filter(members=None).exists())
+
+        with self.assertRaises(ValueError):
+            seed_erp(prefix='x' * 20, dev=True)
+
+    def test_seed_needs_debug_or_dev(self):
+        from io import StringIO
+
+        from django.core.management import CommandError, call_command
+
+        from .seed import seed_erp
+
+        with self.assertRaises(ValueError):
+            seed_erp(prefix='d')
+        with self.assertRaises(CommandError):
+            call_command('seed_erp', prefix='d', stdout=StringIO())
+        self.assertFalse(User.objects.exists())
+
+        with self.settings(DEBUG=True):
+            seed_erp(months=1, prefix='d')
+        self.assertTrue(User.objects.filter(username__startswith='d-').exists())
+
+
+# -------------------------------
+# Payroll Periods
+# -------------------------------
+class PayrollPeriodTests(TestCase):
+    periods = [('November', 2024), ('December', 2024), ('January', 2025), ('February', 2025)]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employees = create_employees(3)
+        create_payrolls(cls.employees, cls.periods)
+        cls.hr = User.objects.create(username='hr', role='hr')
+
+    def test_period_of(self):
+        self.assertEqual(Payroll.period_of('March', 2025), datetime.date(2025, 3, 1))
+        self.assertEqual(Payroll.period_of(' sep ', '2024'), datetime.date(2024, 9, 1))
+        self.assertEqual(Payroll.period_of('12', 2024), datetime.date(2024, 12, 1))
+        self.assertIsNone(Payroll.period_of('Month 13', 2024))
+        self.assertIsNone(Payroll.period_of('13', 2024))
+
+    def test_writes_keep_period_in_sync(self):
+        payroll = Payroll.objects.create(employee=self.employees[0], month='march', year=2025)
+        self.assertEqual(payroll.period, datetime.date(2025, 3, 1))
+        run_payroll('April', 2025)
+        self.assertEqual(Payroll.objects.filter(period=datetime.date(2025, 4, 1)).count(), 3)
+
+    def test_summary_range_sorts_across_years(self):
+        summary = payroll_summary(datetime.date(2024, 12, 1), datetime.date(2025, 1, 1))
+        self.assertEqual(summary['total_payrolls'], 6)
+        self.assertEqual([(row['year'], row['month']) for row in summary['by_month']],
+                         [(2024, 'December'), (2025, 'January')])
+
+    def test_list_and_export_filter_by_range(self):
+        self.client.force_login(self.hr)
+        response = self.client.get(reverse('manage_payrolls'), {'from': '2025-01', 'to': '2025-02'})
+        self.assertEqual({payroll.month for payroll in response.context['payrolls']}, {'January', 'February'})
+        self.assertEqual(self.client.get(reverse('manage_payrolls'), {'from': 'soon'}).status_code, 400)
+
+        response = self.client.get(reverse('export_payrolls'), {'year': '2024'})
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows), 1 + 6)
+
+    def test_months_are_stored_by_full_name(self):
+        self.assertEqual(Payroll.month_name('mar'), 'March')
+        self.assertEqual(Payroll.month_name('Bonus'), 'Bonus')
+        run_payroll('march', 2025)
+        self.assertEqual(set(Payroll.objects.filter(year=2025).values_list('month', flat=True)),
+                         {'January', 'February', 'March'})
+
+        self.client.force_login(self.hr)
+        self.client.post(reverse('add_payroll'), {'employee': self.employees[0].pk, 'month': 'MAR', 'year': '2025'})
+        self.assertEqual(Payroll.objects.filter(employee=self.employees[0], period=datetime.date(2025, 3, 1)).count(), 1)
+
+    def test_migration_merges_spellings_of_one_month(self):
+        import importlib
+        from django.apps import apps
+
+        migration = importlib.import_module('core.migrations.0015_canonical_payroll_months')
+        employee = self.employees[0]
+        Payroll.objects.filter(employee=employee, month='January', year=2025).update(month='jan')
+        create_payrolls([employee], [('january', 2025), ('Bonus', 2025)])  # bulk_create skips save()
+        newest = Payroll.objects.get(employee=employee, month='january')
+
+        migration.canonical_months(apps, None)
+        january = Payroll.objects.get(employee=employee, period=datetime.date(2025, 1, 1))
+        self.assertEqual((january.pk, january.month), (newest.pk, 'January'))
+        self.assertTrue(Payroll.objects.filter(employee=employee, month='Bonus').exists())
+
+    def test_export_keeps_unparsed_months_and_rejects_unknown_month_filters(self):
+        create_payrolls(self.employees[:1], [('Bonus', 2024)])
+        self.client.force_login(self.hr)
+        response = self.client.get(reverse('export_payrolls'), {'year': '2024'})
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows), 1 + 7)
+        self.assertTrue(any(',Bonus,2024,' in row for row in rows))
+        self.assertEqual(self.client.get(reverse('export_payrolls'), {'month': 'Smarch'}).status_code, 400)
+
+
+# -------------------------------
+# Payroll Recompute
+# -------------------------------
+class PayrollRecomputeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employees = create_employees(3)
+        create_payrolls(cls.employees, [('January', 2025), ('February', 2025), ('March', 2025)])
+
+    def raise_salaries(self, *employees):
+        Employee.objects.filter(id__in=[employee.id for employee in employees]).update(basic_salary=Decimal('12000.10'))
+
+    def test_dry_run_returns_deltas_without_writing(self):
+        from .payroll import recompute_payrolls
+
+        self.raise_salaries(self.employees[0])
+        result = recompute_payrolls(dry_run=True)
+        self.assertEqual(result.rows, 3)
+        delta = result.deltas[0]
+        self.assertEqual(delta['employee_id'], self.employees[0].id)
+        self.assertEqual(delta['net_salary'], (Decimal('12500.00'), Decimal('15000.12')))
+        self.assertEqual(delta['allowances'], (Decimal('1000.00'), Decimal('1200.01')))
+        self.assertEqual(result.net_change, Decimal('2500.12') * 3)
+        self.assertFalse(Payroll.objects.filter(net_salary__gt=12500).exists())
+
+    def test_single_update_scoped_to_employees_and_periods(self):
+        from .payroll import recompute_payrolls
+
+        self.raise_salaries(*self.employees)
+        rules = PayrollRules.load()
+        with self.assertNumQueries(1):
+            result = recompute_payrolls(
+                self.employees[:2], datetime.date(2025, 2, 1), datetime.date(2025, 3, 1), rules=rules
+            )
+        self.assertEqual(result.rows, 4)
+
+        expected = Payroll.salary_components(Decimal('12000.10'))
+        for payroll in Payroll.objects.filter(employee__in=self.employees[:2], period__gte=datetime.date(2025, 2, 1)):
+            self.assertEqual(
+                {field: getattr(payroll, field) for field in expected}, expected
+            )
+        self.assertEqual(Payroll.objects.filter(net_salary=Decimal('12500')).count(), 5)
+        # Already up to date: nothing left to write
+        self.assertEqual(recompute_payrolls(self.employees[:2], datetime.date(2025, 2, 1)).rows, 0)
+
+
+# -------------------------------
+# Payroll Rules Engine
+# -------------------------------
+class PayrollRulesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employees = create_employees(4)
+        Employee.objects.filter(id=cls.employees[1].id).update(designation='Lead')
+        Employee.objects.filter(id=cls.employees[2].id).update(department='Sales', basic_salary=Decimal('12345.67'))
+        Employee.objects.filter(id=cls.employees[3].id).update(department='Sales', designation='Lead')
+
+    def rule(self, department='', designation='', hra='0.2000', allowances='0.1000', deductions='0.0500'):
+        return PayrollRule(
+            department=department, designation=designation,
+            hra_rate=Decimal(hra), allowances_rate=Decimal(allowances), deductions_rate=Decimal(deductions),
+        )
+
+    def test_defaults_match_salary_components(self):
+        salaries = PayrollRules().calculate_all()
+        self.assertEqual(len(salaries), 4)
+        for index in range(len(salaries)):
+            employee = Employee.objects.get(id=salaries.employee_ids[index])
+            self.assertEqual(salaries.components(index), Payroll.salary_components(employee.basic_salary))
+
+    def test_single_saves_use_the_cached_rules(self):
+        employee = Employee.objects.get(pk=self.employees[0].pk)
+
+        def save(month, commit=True):
+            payroll = Payroll(employee=employee, month=month, year=2025)
+            with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=commit):
+                payroll.save()
+            return payroll, [query for query in queries if 'core_payrollrule' in query['sql']]
+
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = self.rule(hra='0.3000')
+            rule.save()
+        self.assertTrue(save('June')[1])
+        payroll, rule_queries = save('July')
+        self.assertEqual(rule_queries, [])
+        self.assertEqual(payroll.hra, (employee.basic_salary * Decimal('0.3')).quantize(PAISA))
+
+        # Changed but not yet committed: read from the table and not cached, in case of a rollback.
+        rule.hra_rate = Decimal('0.4000')
+        rule.save()
+        self.assertEqual(save('August', commit=False)[0].hra, (employee.basic_salary * Decimal('0.4')).quantize(PAISA))
+        self.assertTrue(save('September', commit=False)[1])
+
+        # Rolled back: the uncommitted rate read inside the transaction is never served afterwards.
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            rule.hra_rate = Decimal('0.5000')
+            rule.save()
+            self.assertEqual(PayrollRules.current().rates_for().hra, Decimal('0.5000'))
+            raise RuntimeError
+        self.assertEqual(PayrollRules.current().rates_for().hra, Decimal('0.4000'))
+
+        payroll = Payroll(employee=employee, month='October', year=2025)
+        with self.assertNumQueries(1):
+            payroll.save(rules=PayrollRules())
+        self.assertEqual(payroll.hra, Payroll.salary_components(employee.basic_salary)['hra'])
+
+    def test_most_specific_rule_wins(self):
+        rules = PayrollRules.compile([
+            self.rule(hra='0.1000'),
+            self.rule(designation='Lead', hra='0.3000'),
+            self.rule(department='Sales', hra='0.4000'),
+            self.rule(department='Sales', designation='Lead', hra='0.5000'),
+        ])
+        self.assertEqual(rules.rates_for('Engineering', 'Developer').hra, Decimal('0.1000'))
+        self.assertEqual(rules.rates_for('Engineering', 'Lead').hra, Decimal('0.3000'))
+        self.assertEqual(rules.rates_for('Sales', 'Developer').hra, Decimal('0.4000'))
+        self.assertEqual(rules.rates_for('Sales', 'Lead').hra, Decimal('0.5000'))
+        self.assertEqual(PayrollRules().rates_for('Sales', 'Lead').hra, Payroll.HRA_RATE)
+
+    def test_rounds_half_up_to_the_paisa(self):
+        components = PayrollRules.compile([self.rule(hra='0.0005')]).components(Decimal('10.00'))
+        # 10.00 * 0.0005 = 0.005 rounds up to 0.01
+        self.assertEqual(components['hra'], Decimal('0.01'))
+        self.assertEqual(components['net_salary'], Decimal('10.51'))
+
+    def test_net_salary_is_the_sum_of_the_rounded_components(self):
+        from .payroll import recompute_payrolls
+
+        def adds_up(components, basic):
+            net = basic + components['hra'] + components['allowances'] - components['deductions']
+            self.assertEqual(components['net_salary'], net, basic)
+
+        basics = [Decimal('0.05'), Decimal('10000.05'), Decimal('12345.67')]
+        self.assertEqual(Payroll.salary_components(Decimal('0.05'))['net_salary'], Decimal('0.07'))
+        self.assertEqual(Payroll.salary_components(Decimal('10000.05'))['net_salary'], Decimal('12500.07'))
+        for basic in basics:
+            adds_up(Payroll.salary_components(basic), basic)
+            adds_up(PayrollRules.compile([self.rule(deductions='0.0777')]).components(basic), basic)
+
+        employee = Employee.objects.get(id=self.employees[0].id)
+        Payroll.objects.create(employee=employee, month='January', year=2025)
+        for basic in basics:
+            Employee.objects.filter(id=employee.id).update(basic_salary=basic)
+            recompute_payrolls()  # the SQL path
+            adds_up(Payroll.objects.values('hra', 'allowances', 'deductions', 'net_salary').get(), basic)
+
+    def test_payroll_save_and_run_use_rules(self):
+        PayrollRule.objects.create(department='Sales', hra_rate='0.5000', allowances_rate='0', deductions_rate='0')
+        Payroll.objects.create(employee=Employee.objects.get(id=self.employees[3].id), month='January', year=2025)
+        run_payroll('February', 2025)
+        for payroll in Payroll.objects.filter(employee__department='Sales'):
+            self.assertEqual(payroll.hra, (payroll.employee.basic_salary / 2).quantize(PAISA, rounding=ROUND_HALF_UP))
+        engineering = Payroll.objects.get(employee=self.employees[0], month='February')
+        self.assertEqual(engineering.net_salary, Decimal('12500.00'))
+
+    def test_recompute_sql_matches_python(self):
+        from .payroll import recompute_payrolls
+
+        create_payrolls(self.employees, [('January', 2025)])
+        rules = PayrollRules.compile([
+            self.rule(designation='Lead', hra='0.3333', deductions='0.0777'),
+            self.rule(department='Sales', hra='0.1234', allowances='0.0555'),
+            self.rule(department='Sales', designation='Lead', hra='0.0001'),
+        ])
+        recompute_payrolls(rules=rules)
+        expected = rules.calculate_all()
+        for index, employee_id in enumerate(expected.employee_ids):
+            payroll = Payroll.objects.get(employee_id=employee_id)
+            self.assertEqual(
+                {component: getattr(payroll, component) for component in expected.columns},
+                expected.components(index),
+            )
+
+    def test_simulate_reports_deltas_without_writing(self):
+        from .rules import simulate
+
+        PayrollRule.objects.create(department='Sales', hra_rate='0.2000', allowances_rate='0.1000', deductions_rate='0.0500')
+        with self.assertNumQueries(2):
+            result = simulate(rules=[self.rule(department='Sales', hra='0.3000')])
+        sales_basic = Decimal('12345.67') + Decimal('10000.00')
+        self.assertEqual(result['employees'], 4)
+        self.assertEqual(result['delta']['hra'], Decimal('2234.57'))
+        self.assertEqual(result['delta']['net_salary'], Decimal('2234.57'))  # the sum of the rounded HRA
+        self.assertEqual(result['current']['basic_salary'], sales_basic + 20000)
+        departments = {row['department']: row for row in result['departments']}
+        self.assertEqual(departments['Engineering']['delta']['net_salary'], 0)
+
+        removed = simulate(removed=[('Sales', '')])
+        self.assertEqual(removed['delta']['net_salary'], 0)  # the removed rule matched the defaults
+        self.assertEqual(PayrollRule.objects.get().hra_rate, Decimal('0.2000'))
+        self.assertFalse(Payroll.objects.exists())
+
+    def test_simulate_endpoint(self):
+        hr = User.objects.create_user(username='hr', password='pass', role='hr')
+        self.client.force_login(hr)
+        url = reverse('simulate_payroll_rules')
+        response = self.client.post(url, {
+            'rules': [{'department': 'Engineering', 'hra_rate': '0.25', 'allowances_rate': '0.1', 'deductions_rate': '0.05'}],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.json()['delta']['net_salary']), Decimal('1000.00'))
+
+        response = self.client.post(url, {'rules': [{'department': 'Engineering'}]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(url, {'department': 'Sales', 'remove': 'on'})
+        self.assertContains(response, 'Monthly Cost (4 employees)')
+        self.assertFalse(PayrollRule.objects.exists())
+
+
+# -------------------------------
+# Team Membership
+# -------------------------------
+class TeamMembershipTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.head_manager = User.objects.create(username='head', role='head_manager')
+        cls.manager = User.objects.create(username='manager', role='manager')
+        cls.alpha = Team.objects.create(name='Alpha', head_manager=cls.head_manager)
+        cls.beta = Team.objects.create(name='Beta', head_manager=cls.head_manager)
+        cls.alpha.managers.add(cls.manager)
+        cls.members = [employee.user for employee in create_employees(30)]
+
+    def setUp(self):
+        cache.clear()
+
+    def capture_signals(self):
+        from django.db.models.signals import m2m_changed
+
+        sent = []
+
+        def receiver(sender, action, **kwargs):
+            sent.append((sender, action, kwargs.get('changes')))
+
+        m2m_changed.connect(receiver, sender=Team.members.through)
+        self.addCleanup(m2m_changed.disconnect, receiver, sender=Team.members.through)
+        return sent
+
+    def ids(self, users):
+        return {user.id for user in users}
+
+    def test_set_writes_only_the_difference(self):
+        from .teams import set_team_users
+
+        self.alpha.members.add(*self.members[:3])
+        sent = self.capture_signals()
+        change = set_team_users(self.alpha, 'members', self.ids(self.members[1:4]))
+        self.assertEqual(change.added, {self.alpha.pk: {self.members[3].id}})
+        self.assertEqual(change.removed, {self.alpha.pk: {self.members[0].id}})
+        self.assertEqual(set(self.alpha.members.all()), set(self.members[1:4]))
+        self.assertEqual([action for _, action, _ in sent], ['post_bulk_change'])
+
+        sent.clear()
+        self.assertFalse(set_team_users(self.alpha, 'members', self.ids(self.members[1:4])))
+        self.assertEqual(sent, [])
+
+    def test_query_count_does_not_grow_with_team_size(self):
+        from .teams import set_team_users
+
+        def queries(users):
+            with CaptureQueriesContext(connection) as captured:
+                set_team_users(self.beta, 'members', self.ids(users))
+            return len(captured)
+
+        queries(self.members[:2])
+        small = queries(self.members[2:4])
+        self.assertEqual(queries(self.members[4:30]), small)
+
+    def test_move_members_between_teams(self):
+        from .teams import move_members
+
+        self.alpha.members.add(*self.members[:5])
+        self.beta.members.add(self.members[0])
+        sent = self.capture_signals()
+        change = move_members(self.ids(self.members[:3]), self.alpha, self.beta)
+        self.assertEqual(set(self.alpha.members.all()), set(self.members[3:5]))
+        self.assertEqual(set(self.beta.members.all()), set(self.members[:3]))
+        self.assertEqual(change.added, {self.beta.pk: self.ids(self.members[1:3])})
+        self.assertEqual(change.removed, {self.alpha.pk: self.ids(self.members[:3])})
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(sent[0][2].team_ids, {self.alpha.pk, self.beta.pk})
+
+    def test_bulk_changes_invalidate_dashboards(self):
+        from .dashboard_cache import cached_dashboard_metrics
+        from .teams import apply_membership, set_team_users
+
+        def metrics(user):
+            return cached_dashboard_metrics(User.objects.get(pk=user.pk))
+
+        self.assertEqual(metrics(self.manager)['total_team_members'], 0)
+        apply_membership('members', add={self.alpha.pk: self.ids(self.members[:4])})
+        self.assertEqual(metrics(self.manager)['total_team_members'], 4)
+
+        self.assertEqual(metrics(self.head_manager)['total_managers'], 1)
+        set_team_users(self.alpha, 'managers', [])
+        self.assertEqual(metrics(self.manager)['teams'], [])
+        self.assertEqual(metrics(self.head_manager)['total_managers'], 0)
+
+    def test_move_view(self):
+        self.alpha.members.add(*self.members[:3])
+        self.client.force_login(self.head_manager)
+        response = self.client.post(reverse('move_team_members'), {
+            'source': self.alpha.pk, 'target': self.beta.pk,
+            'members': [self.members[0].id, self.members[1].id, self.members[5].id],
+        })
+        self.assertRedirects(response, reverse('manage_teams'), fetch_redirect_response=False)
+        # members[5] was never on Alpha, so it is not moved
+        self.assertEqual(set(self.beta.members.all()), set(self.members[:2]))
+        self.assertEqual(set(self.alpha.members.all()), {self.members[2]})
+
+        other = Team.objects.create(name='Other', head_manager=User.objects.create(username='h2', role='head_manager'))
+        response = self.client.post(reverse('move_team_members'), {'source': other.pk, 'target': self.beta.pk})
+        self.assertEqual(response.status_code, 404)
+
+
+# -------------------------------
+# Org Hierarchy
+# -------------------------------
+class OrgHierarchyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.head = User.objects.create(username='head', role='head_manager')
+        cls.other_head = User.objects.create(username='head2', role='head_manager')
+        cls.managers = User.objects.bulk_create([User(username=f'manager{i}', role='manager') for i in range(3)])
+        cls.members = [employee.user for employee in create_employees(6)]
+        cls.alpha = Team.objects.create(name='Alpha', head_manager=cls.head)
+        cls.beta = Team.objects.create(name='Beta', head_manager=cls.head)
+        cls.alpha.managers.add(*cls.managers[:2])
+        cls.alpha.members.add(*cls.members[:3])
+        cls.beta.managers.add(cls.managers[2])
+        cls.beta.members.add(*cls.members[2:6])
+
+    def test_lookups_take_one_query(self):
+        from .hierarchy import descendants
+
+        with self.assertNumQueries(1):
+            self.assertEqual(set(descendants(self.head)), set(self.managers) | set(self.members))
+        with self.assertNumQueries(1):
+            self.assertEqual(set(descendants(self.head, depth=1)), set(self.managers))
+        with self.assertNumQueries(1):
+            self.assertEqual(set(descendants(self.managers[0])), set(self.members[:3]))
+        with self.assertNumQueries(1):
+            self.assertEqual(set(descendants(self.head, depth=2, team=self.beta)), set(self.members[2:6]))
+        self.assertFalse(descendants(self.managers[0], team=self.beta).exists())
+
+    def test_membership_changes_keep_links_current(self):
+        from .hierarchy import descendants
+        from .teams import move_members
+
+        def ancestors(user):
+            return set(OrgLink.objects.filter(descendant=user).values_list('ancestor_id', flat=True))
+
+        self.alpha.managers.remove(self.managers[1])
+        self.assertFalse(descendants(self.managers[1]).exists())
+
+        move_members([self.members[0].id], self.alpha, self.beta)
+        self.assertEqual(ancestors(self.members[0]), {self.head.pk, self.managers[2].pk})
+
+        self.members[5].team_memberships.clear()
+        self.assertFalse(ancestors(self.members[5]))
+
+        self.beta.head_manager = self.other_head
+        self.beta.save()
+        self.assertEqual(set(descendants(self.other_head, depth=1)), {self.managers[2]})
+        self.assertEqual(set(descendants(self.head)), {self.managers[0], self.members[1], self.members[2]})
+
+        self.alpha.delete()
+        self.assertFalse(descendants(self.head).exists())
+
+    def test_rebuild_matches_incremental_links(self):
+        from .hierarchy import rebuild_hierarchy
+
+        def links():
+            return set(OrgLink.objects.values_list('team_id', 'ancestor_id', 'descendant_id', 'ancestor_level', 'depth'))
+
+        incremental = links()
+        self.assertEqual(rebuild_hierarchy(), len(incremental))
+        self.assertEqual(links(), incremental)
+
+    def test_head_manager_dashboard_counts_managers(self):
+        from .dashboards import head_manager_metrics
+
+        self.assertEqual(head_manager_metrics(self.head)['total_managers'], 3)
+        self.beta.managers.add(self.managers[0])
+        self.assertEqual(head_manager_metrics(self.head)['total_managers'], 3)
+
+
+# -------------------------------
+# Incremental Task Feed
+# -------------------------------
+class TaskFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create(username='manager', role='manager')
+        head_manager = User.objects.create(username='head', role='head_manager')
+        cls.team = Team.objects.create(name='Alpha', head_manager=head_manager)
+        cls.other_team = Team.objects.create(name='Beta', head_manager=head_manager)
+        cls.team.managers.add(cls.manager)
+        TeamReport.objects.bulk_create([
+            TeamReport(team=cls.team, title=f'Task {i}', description='...') for i in range(5)
+        ])
+        TeamReport.objects.create(team=cls.other_team, title='Not mine', description='...')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.manager)
+        self.url = reverse('manager_task_feed')
+
+    def titles(self, response):
+        return [item['title'] for item in response.json()['items']]
+
+    def test_returns_items_after_the_cursor(self):
+        first = self.client.get(self.url, {'size': 3})
+        self.assertEqual(self.titles(first), ['Task 0', 'Task 1', 'Task 2'])
+        self.assertTrue(first.json()['has_more'])
+
+        rest = self.client.get(self.url, {'since': first.json()['cursor']})
+        self.assertEqual(self.titles(rest), ['Task 3', 'Task 4'])
+        self.assertFalse(rest.json()['has_more'])
+
+        cursor = rest.json()['cursor']
+        empty = self.client.get(self.url, {'since': cursor})
+        self.assertEqual((self.titles(empty), empty.json()['cursor']), ([], cursor))
+
+        TeamReport.objects.create(team=self.team, title='Task 5', description='...')
+        self.assertEqual(self.titles(self.client.get(self.url, {'since': cursor})), ['Task 5'])
+
+    def test_unchanged_feed_answers_304_without_queries(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        # Another team's report leaves this feed alone; one of ours changes it
+        TeamReport.objects.create(team=self.other_team, title='Still not mine', description='...')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        report = TeamReport.objects.filter(team=self.team).first()
+        report.title = 'Renamed'
+        report.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Renamed', self.titles(response))
+
+    def test_rejects_bad_cursors_and_other_roles(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'not-a-cursor'}).status_code, 400)
+
+        self.client.force_login(User.objects.create(username='sales', role='sales'))
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('unauthorized'), fetch_redirect_response=False)
+
+
+# -------------------------------
+# Conditional GET (list pages)
+# -------------------------------
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class ConditionalListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = User.objects.create(username='hr', role='hr')
+        cls.sales = User.objects.create(username='sales', role='sales')
+        cls.head_manager = User.objects.create(username='head', role='head_manager')
+        cls.employees = create_employees(3)
+        create_payrolls(cls.employees, [('January', 2025)])
+        cls.team = Team.objects.create(name='Alpha', head_manager=cls.head_manager)
+        cls.lead = Lead.objects.create(name='Lead', assigned_to=cls.sales)
+
+    def setUp(self):
+        cache.clear()
+
+    def assertRevalidates(self, user, url_name, change, **params):
+        """The page answers 304 without queries until `change()` runs, then 200 again."""
+        self.client.force_login(user)
+        url = reverse(url_name)
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(url, params, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertEqual(self.client.get(url, {**params, 'size': 1}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        change()
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_manage_employees(self):
+        def change():
+            employee = Employee.objects.get(pk=self.employees[0].pk)
+            employee.designation = 'Lead'
+            employee.save()
+            self.assertGreater(Employee.objects.get(pk=employee.pk).updated_at, self.employees[0].updated_at)
+
+        self.assertRevalidates(self.hr, 'manage_employees', change)
+
+    def test_manage_payrolls(self):
+        from .payroll import recompute_payrolls
+
+        def change():
+            before = Payroll.objects.get(employee=self.employees[0]).updated_at
+            Employee.objects.filter(pk=self.employees[0].pk).update(basic_salary=Decimal('20000'))
+            recompute_payrolls()
+            self.assertGreater(Payroll.objects.get(employee=self.employees[0]).updated_at, before)
+
+        self.assertRevalidates(self.hr, 'manage_payrolls', change, **{'from': '2025-01'})
+
+    def test_manage_teams(self):
+        from .teams import set_team_users
+
+        self.assertRevalidates(
+            self.head_manager, 'manage_teams',
+            lambda: set_team_users(self.team, 'managers', [User.objects.create(username='m', role='manager').pk]),
+        )
+
+    def test_sales_leads(self):
+        def change():
+            self.lead.status = 'Closed'
+            self.lead.save()
+
+        self.assertRevalidates(self.sales, 'sales_leads', change)
+
+    def test_a_cache_reset_does_not_answer_304_for_newer_rows(self):
+        self.client.force_login(self.hr)
+        url = reverse('manage_employees')
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        # A write the version counters never saw, e.g. while the cache was down.
+        Employee.objects.filter(pk=self.employees[0].pk).update(
+            updated_at=timezone.now() + datetime.timedelta(hours=1),
+        )
+        cache.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_manager_renames_revalidate_team_pages(self):
+        manager = User.objects.create(username='m', first_name='Old', role='manager')
+        self.team.managers.add(manager)
+
+        def change():
+            manager = User.objects.get(username='m')
+            manager.first_name = 'New'
+            manager.save()
+
+        self.assertRevalidates(self.head_manager, 'manage_teams', change)
+
+    def test_pending_messages_are_rendered_instead_of_304(self):
+        from django.contrib import messages
+        from django.contrib.messages.storage.fallback import FallbackStorage
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from .freshness import conditional_page
+
+        @conditional_page(('employees',))
+        def page(request):
+            return HttpResponse(' '.join(str(message) for message in messages.get_messages(request)))
+
+        def request(**headers):
+            request = RequestFactory().get('/', **headers)
+            request.user, request.session = self.hr, {}
+            request._messages = FallbackStorage(request)
+            return request
+
+        etag = page(request())['ETag']
+        flashed = request(HTTP_IF_NONE_MATCH=etag)
+        messages.success(flashed, 'Saved.')
+        response = page(flashed)
+        self.assertEqual((response.status_code, response.content), (200, b'Saved.'))
+        self.assertFalse(response.has_header('ETag'))
+        self.assertEqual(page(request(HTTP_IF_NONE_MATCH=etag)).status_code, 304)
+
+    def test_logins_and_redirects_do_not_change_validators(self):
+        from django.contrib.auth.signals import user_logged_in
+
+        self.client.force_login(self.hr)
+        etag = self.client.get(reverse('manage_employees'))['ETag']
+        user_logged_in.send(sender=User, request=None, user=User.objects.get(pk=self.employees[0].user_id))
+        self.assertEqual(self.client.get(reverse('manage_employees'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.force_login(self.sales)
+        response = self.client.get(reverse('manage_employees'))
+        self.assertRedirects(response, reverse('unauthorized'), fetch_redirect_response=False)
+        self.assertFalse(response.has_header('ETag'))
+
+
+# -------------------------------
+# Lead Assignment
+# -------------------------------
+class LeadAssignmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.bulk_create([User(username=f'sales{i}', role='sales') for i in range(3)])
+        User.objects.create(username='inactive', role='sales', is_active=False)
+        # sales0 already carries two open leads, sales1 one closed lead
+        Lead.objects.bulk_create([
+            Lead(name='Busy 1', assigned_to=cls.sales[0]),
+            Lead(name='Busy 2', assigned_to=cls.sales[0], status='In Progress'),
+            Lead(name='Done', assigned_to=cls.sales[1], status='Closed'),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def unassigned(self, *priorities):
+        return Lead.objects.bulk_create([Lead(name=f'New {i}', priority=p) for i, p in enumerate(priorities)])
+
+    def counts(self, result):
+        return [result.assigned[user.pk] for user in self.sales]
+
+    def test_round_robin_continues_between_runs(self):
+        from .assignment import assign_leads
+
+        self.unassigned(*['Medium'] * 4)
+        self.assertEqual(self.counts(assign_leads('round_robin')), [2, 1, 1])
+        self.unassigned('Medium')
+        self.assertEqual(self.counts(assign_leads('round_robin')), [0, 1, 0])
+
+    def test_round_robin_position_is_kept_in_the_database(self):
+        from .assignment import assign_leads
+
+        self.unassigned('Medium')
+        assign_leads('round_robin')
+        cache.clear()  # a restart or another worker
+        self.unassigned('Medium')
+        self.assertEqual(self.counts(assign_leads('round_robin')), [0, 1, 0])
+
+        # Deactivating the user the last run ended on moves on to the next one
+        User.objects.filter(pk=self.sales[1].pk).update(is_active=False)
+        self.unassigned('Medium')
+        self.assertEqual(self.counts(assign_leads('round_robin')), [0, 0, 1])
+
+    def test_least_open_fills_the_lightest_queues(self):
+        from .assignment import assign_leads
+
+        self.unassigned(*['Medium'] * 5)
+        result = assign_leads('least_open')
+        self.assertEqual(self.counts(result), [1, 2, 2])  # ties go to the lower user id
+        self.assertFalse(Lead.objects.filter(assigned_to__isnull=True).exists())
+        self.assertFalse(Lead.objects.filter(assigned_to__username='inactive').exists())
+
+    def test_closed_leads_carry_no_load(self):
+        from .assignment import assign_leads
+
+        # sales1's history outweighs everyone's open queue, but none of it is open
+        Lead.objects.bulk_create([
+            Lead(name=f'Won {i}', assigned_to=self.sales[1], status='Closed', priority='High') for i in range(5)
+        ])
+        for mode in ('least_open', 'weighted'):
+            with self.subTest(mode):
+                lead, = self.unassigned('Medium')
+                assign_leads(mode, leads=[lead.pk])
+                lead.refresh_from_db()
+                self.assertEqual(lead.assigned_to_id, self.sales[1].pk)
+                lead.delete()
+
+    def test_weighted_balances_priority_load(self):
+        from .assignment import assign_leads
+
+        leads = self.unassigned('High', 'High', 'Low', 'Low', 'Low')
+        assign_leads('weighted', leads=[lead.pk for lead in leads])
+        # sales0 starts at 4 (two Medium), so the Highs go to sales1 and sales2 and the Lows even it out
+        highs = Lead.objects.filter(priority='High').values_list('assigned_to', flat=True)
+        self.assertEqual(set(highs), {self.sales[1].pk, self.sales[2].pk})
+        weights = {'High': 3, 'Medium': 2, 'Low': 1}
+        load = Counter()
+        for user_id, priority in Lead.objects.exclude(status='Closed').values_list('assigned_to', 'priority'):
+            load[user_id] += weights[priority]
+        self.assertEqual(sorted(load.values()), [4, 4, 5])
+
+    def test_one_update_per_batch_and_dashboards_refresh(self):
+        from .assignment import assign_leads
+        from .dashboard_cache import cached_dashboard_metrics
+
+        self.assertEqual(cached_dashboard_metrics(self.sales[2])['total_leads'], 0)
+        self.unassigned(*['Low'] * 7)
+        with CaptureQueriesContext(connection) as queries:
+            assign_leads('least_open', batch_size=3)
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 3)
+        self.assertGreater(cached_dashboard_metrics(self.sales[2])['total_leads'], 0)
+
+    def test_view(self):
+        head = User.objects.create_user(username='head', password='pass', role='head_sales')
+        self.client.force_login(head)
+        self.unassigned('High', 'Low')
+        self.assertContains(self.client.get(reverse('assign_leads')), '2 unassigned leads')
+        response = self.client.post(reverse('assign_leads'), {'mode': 'weighted'})
+        self.assertRedirects(response, reverse('assign_leads'))
+        self.assertFalse(Lead.objects.filter(assigned_to__isnull=True).exists())
+        self.assertEqual(self.client.post(reverse('assign_leads'), {'mode': 'random'}).status_code, 400)
+
+
+# -------------------------------
+# Bulk Lead Import
+# -------------------------------
+class LeadImportTests(TestCase):
+    CSV = (
+        "name,email,phone,company,priority,notes\n"
+        "Priya Shah, Priya@Acme.com ,,Acme Pvt. Ltd,High,Wants a demo\n"
+        "Ravi Kumar,,+91 98765-43210,Globex Inc,,\n"
+        "Priya S,priya@acme.com,9000000001,,,Asked about pricing\n"
+        "No Contact,,,Initech,,\n"
+        "Bad Email,not-an-email,,,,\n"
+        "Ravi K,,9876543210,GLOBEX,,Call after 5\n"
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = User.objects.create(username='sales', role='sales')
+        cls.existing = Lead.objects.create(
+            name='Ravi', phone='98765 43210', company='Globex', notes='Met at expo', assigned_to=cls.sales,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fingerprint_normalizes_contact_details(self):
+        self.assertEqual(Lead.fingerprint_of(' A@B.com '), Lead.fingerprint_of('a@b.com', '123', 'Other'))
+        self.assertEqual(
+            Lead.fingerprint_of(phone='+91 98765-43210', company='Globex Inc.'),
+            Lead.fingerprint_of(phone='9876543210', company='globex'),
+        )
+        self.assertNotEqual(
+            Lead.fingerprint_of(phone='9876543210', company='Globex'),
+            Lead.fingerprint_of(phone='9876543210', company='Initech'),
+        )
+        self.assertEqual(Lead.fingerprint_of(company='Globex'), '')
+        self.assertEqual(self.existing.fingerprint, Lead.fingerprint_of(phone='9876543210', company='Globex'))
+
+    def test_merge_inserts_new_and_merges_duplicates(self):
+        from io import StringIO
+        from .imports import import_leads, iter_rows
+
+        report = import_leads(iter_rows(StringIO(self.CSV)), batch_size=4)
+        self.assertEqual((report.rows, report.inserted, report.merged, report.skipped), (6, 1, 3, 0))
+        self.assertEqual([number for number, _ in report.errors], [4, 5])
+        self.assertEqual(Lead.objects.count(), 2)
+
+        priya = Lead.objects.get(email='priya@acme.com')
+        self.assertEqual((priya.name, priya.company, priya.priority), ('Priya Shah', 'Acme Pvt. Ltd', 'High'))
+        self.assertEqual(priya.phone, '9000000001')
+        self.assertEqual(priya.notes, 'Wants a demo\nAsked about pricing')
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.notes, 'Met at expo\nCall after 5')
+        self.assertEqual(self.existing.assigned_to, self.sales)
+
+    def test_skip_leaves_duplicates_alone(self):
+        from io import StringIO
+        from .imports import import_leads, iter_rows
+
+        report = import_leads(iter_rows(StringIO(self.CSV)), on_duplicate='skip')
+        self.assertEqual((report.inserted, report.merged, report.skipped, report.rejected), (1, 0, 3, 2))
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.notes, 'Met at expo')
+        self.assertIsNone(Lead.objects.get(email='priya@acme.com').phone)
+
+    def test_queries_do_not_grow_with_rows(self):
+        from .imports import import_leads
+
+        rows = [{'name': f'Lead {i}', 'email': f'lead{i}@example.com'} for i in range(50)]
+        with CaptureQueriesContext(connection) as queries:
+            report = import_leads(rows, batch_size=25)
+        self.assertEqual(report.inserted, 50)
+        selects = [query for query in queries if query['sql'].startswith('SELECT')]
+        self.assertLessEqual(len(selects), 2)  # one fingerprint lookup per batch
+        with CaptureQueriesContext(connection) as queries:
+            report = import_leads(rows, batch_size=25)
+        self.assertEqual((report.inserted, report.merged), (0, 50))
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE')])  # nothing to fill in
+
+    def test_merge_refreshes_search_and_dashboard(self):
+        from .dashboard_cache import scope_version
+        from .imports import import_leads
+        from .search import search_leads
+
+        version = scope_version(f'user:{self.sales.pk}')
+        import_leads([
+            {'name': 'Ravi', 'phone': '9876543210', 'company': 'Globex', 'notes': 'Budget approved'},
+            {'name': 'Wayne', 'email': 'bruce@wayne.com', 'company': 'Wayne Enterprises'},
+        ])
+        self.assertEqual(search_leads('budget'), [self.existing])
+        self.assertEqual([lead.email for lead in search_leads('wayne')], ['bruce@wayne.com'])
+        self.assertNotEqual(scope_version(f'user:{self.sales.pk}'), version)
+
+    def test_assigns_new_leads(self):
+        from .imports import import_leads
+
+        report = import_leads([{'name': 'New', 'email': 'new@example.com'}], assign='least_open')
+        self.assertEqual(report.inserted, 1)
+        self.assertEqual(Lead.objects.get(email='new@example.com').assigned_to, self.sales)
+
+    def test_views(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        self.client.force_login(User.objects.create(username='head', role='head_sales'))
+        upload = SimpleUploadedFile('leads.csv', self.CSV.encode())
+        response = self.client.post(reverse('import_leads'), {'file': upload, 'on_duplicate': 'skip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report'].skipped, 3)
+
+        response = self.client.post(
+            reverse('import_leads'),
+            data={'leads': [{'name': 'Api', 'email': 'api@example.com'}, {'name': 'Nope'}]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['inserted'], 1)
+        self.assertEqual(response.json()['rejected'], 1)
+        response = self.client.post(reverse('import_leads'), data={'leads': 'x'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
 
-# Create your tests here.
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     # -------------------------------
@@ -18,6 +18,8 @@ urlpatterns = [
     path('erp/head_manager/dashboard/', views.head_manager_dashboard, name='head_manager_dashboard'),
     path('erp/sales/dashboard/', views.sales_dashboard, name='sales_dashboard'),
     path('erp/head_sales/dashboard/', views.head_sales_dashboard, name='head_sales_dashboard'),
+    path('erp/head_sales/assign-leads/', views.assign_leads, name='assign_leads'),
+    path('erp/head_sales/import-leads/', views.import_leads, name='import_leads'),
     path('erp/support/dashboard/', views.support_dashboard, name='support_dashboard'),
     path('erp/head_support/dashboard/', views.head_support_dashboard, name='head_support_dashboard'),
     path('erp/tech/dashboard/', views.tech_dashboard, name='tech_dashboard'),
@@ -27,6 +29,18 @@ urlpatterns = [
     path('erp/customer/dashboard/', views.customer_dashboard, name='customer_dashboard'),
     path('erp/head_customer/dashboard/', views.head_customer_dashboard, name='head_customer_dashboard'),
 
+    # -------------------------------
+    # Async (ASGI) dashboards and lists
+    # -------------------------------
+    path('erp/async/head_hr/dashboard/', async_views.head_hr_dashboard, name='async_head_hr_dashboard'),
+    path('erp/async/manager/dashboard/', async_views.manager_dashboard, name='async_manager_dashboard'),
+    path('erp/async/head_manager/dashboard/', async_views.head_manager_dashboard, name='async_head_manager_dashboard'),
+    path('erp/async/sales/dashboard/', async_views.sales_dashboard, name='async_sales_dashboard'),
+    path('erp/async/hr/employees/', async_views.manage_employees, name='async_manage_employees'),
+    path('erp/async/hr/payrolls/', async_views.manage_payrolls, name='async_manage_payrolls'),
+    path('erp/async/manager/tasks/', async_views.manager_tasks, name='async_manager_tasks'),
+    path('erp/async/sales/leads/', async_views.sales_leads, name='async_sales_leads'),
+
     # -------------------------------
     # Unauthorized page
     # -------------------------------
@@ -49,6 +63,9 @@ urlpatterns = [
     # Reports
     # -------------------------------
     path('erp/admin/reports/', views.admin_reports, name='admin_reports'),
+    path('erp/admin/cache-stats/', views.dashboard_cache_stats, name='dashboard_cache_stats'),
+    path('erp/admin/perf/', views.perf_dashboard, name='perf_dashboard'),
+    path('erp/admin/perf/metrics/', views.perf_metrics, name='perf_metrics'),
     path('erp/hr/reports/', views.hr_reports, name='hr_reports'),
 
 
@@ -56,6 +73,8 @@ urlpatterns = [
     # HR Employee Management
     path('erp/hr/employees/', views.manage_employees, name='manage_employees'),
     path('erp/hr/employees/add/', views.add_employee, name='add_employee'),
+    path('erp/hr/employees/import/', views.import_employees, name='import_employees'),
+    path('erp/hr/employees/export/', views.export_employees, name='export_employees'),
     path('erp/hr/employees/edit/<int:employee_id>/', views.edit_employee, name='edit_employee'),
     path('erp/hr/employees/delete/<int:employee_id>/', views.delete_employee, name='delete_employee'),
 
@@ -63,19 +82,25 @@ urlpatterns = [
     # HR Payroll Management
     path('erp/hr/payrolls/', views.manage_payrolls, name='manage_payrolls'),
     path('erp/hr/payrolls/add/', views.add_payroll, name='add_payroll'),
+    path('erp/hr/payrolls/run/', views.run_payroll, name='run_payroll'),
+    path('erp/hr/payrolls/simulate/', views.simulate_payroll_rules, name='simulate_payroll_rules'),
+    path('erp/hr/payrolls/export/', views.export_payrolls, name='export_payrolls'),
     path('erp/hr/payrolls/edit/<int:payroll_id>/', views.edit_payroll, name='edit_payroll'),
     path('erp/hr/payrolls/delete/<int:payroll_id>/', views.delete_payroll, name='delete_payroll'),
     path('erp/head_manager/assign-manager/', views.assign_manager, name='assign_manager'),
     path('erp/head_manager/create-team/', views.create_team, name='create_team'),
     path('erp/head_manager/manage-teams/', views.manage_teams, name='manage_teams'),
     path('erp/head_manager/edit-team/<int:team_id>/', views.edit_team, name='edit_team'),
+    path('erp/head_manager/move-members/', views.move_team_members, name='move_team_members'),
     path('erp/head_manager/delete-team/<int:team_id>/', views.delete_team, name='delete_team'),     
 
     path('manager/dashboard/', views.manager_dashboard, name='manager_dashboard'),
     path('manager/assign-task/<int:team_id>/', views.assign_task, name='assign_task'),
     path('manager/tasks/', views.manager_tasks, name='manager_tasks'),
+    path('manager/tasks/feed/', views.manager_task_feed, name='manager_task_feed'),
     path('sales/leads/', views.sales_leads, name='sales_leads'),
     path('sales/leads/', views.sales_leads_list, name='sales_leads_list'),
+    path('sales/leads/search/', views.search_leads, name='search_leads'),
 
     path('sales/lead/update/<int:lead_id>/', views.update_lead, name='update_lead'),
     path('sales/add-lead/', views.add_lead, name='add_lead'),
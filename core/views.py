@@ -1,11 +1,27 @@
+import csv
 import datetime
+import io
+import json
 from pyexpat.errors import messages
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout, get_user_model
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import condition
 from functools import wraps
 
-from core.forms import EmployeeForm, LeadForm, UserForm
+from core import feeds, profiling
+from core.dashboard_cache import cached_dashboard_metrics, cache_stats
+from core.freshness import conditional_page
+from core.forms import EmployeeForm, LeadForm, PayrollRuleChangeForm, PayrollRunForm, UserForm
+from core.hierarchy import descendants
+from core.models import Employee, Lead, Payroll
+from core.pagination import paginate_keyset
+from core.signals import EMPLOYEE_LIST_SCOPES, PAYROLL_LIST_SCOPES
+from core.teams import move_members, set_team_users
 
 User = get_user_model()
 
@@ -22,6 +38,20 @@ def role_required(allowed_roles):
         return _wrapped_view
     return decorator
 
+# --------------------------------
+# Rows Behind the Conditional Pages (core/freshness.py)
+# --------------------------------
+def all_employees(request):
+    return Employee.objects.all()
+
+
+def all_payrolls(request):
+    return Payroll.objects.all()
+
+
+def own_leads(request):
+    return Lead.objects.filter(assigned_to=request.user)
+
 # --------------------------------
 # Authentication
 # --------------------------------
@@ -67,15 +97,7 @@ def head_hr_dashboard(request):
     if request.user.role != 'head_hr':
         return redirect('unauthorized')
 
-    total_employees = Employee.objects.count()
-    total_payrolls = Payroll.objects.count()
-    total_reports = 0  # You can calculate actual pending HR reports here
-
-    context = {
-        'total_employees': total_employees,
-        'total_payrolls': total_payrolls,
-        'total_reports': total_reports,
-    }
+    context = cached_dashboard_metrics(request.user)
     return render(request, 'head_hr/dashboard.html', context)
 
 
@@ -84,18 +106,8 @@ def manager_dashboard(request):
     if request.user.role != 'manager':
         return redirect('unauthorized')
 
-    # Teams assigned to this manager
-    teams = request.user.assigned_teams.all()  # ManyToManyField from Team model
-
-    # Count total team members and reports
-    total_team_members = sum(team.members.count() for team in teams)
-    total_reports = TeamReport.objects.filter(team__in=teams).count()
-
-    context = {
-        'teams': teams,
-        'total_team_members': total_team_members,
-        'total_reports': total_reports,
-    }
+    # Teams assigned to this manager, with member and report counts
+    context = cached_dashboard_metrics(request.user)
     return render(request, 'manager/dashboard.html', context)
 
 
@@ -105,7 +117,7 @@ def assign_task(request, team_id):
         return redirect('unauthorized')
 
     team = get_object_or_404(Team, id=team_id, managers=request.user)
-    members = team.members.all()
+    members = descendants(request.user, depth=1, team=team)
 
     if request.method == 'POST':
         title = request.POST.get('title')
@@ -127,26 +139,54 @@ def manager_tasks(request):
         return redirect('unauthorized')
 
     teams = request.user.assigned_teams.all()
-    tasks = TeamReport.objects.filter(team__in=teams).order_by('-created_at')
+    page = paginate_keyset(request, TeamReport.objects.filter(team__in=teams).select_related('team'))
 
-    context = {'tasks': tasks}
+    context = {'tasks': page.object_list, 'page': page}
     return render(request, 'manager/tasks.html', context)
 
 
+def _task_feed_etag(request):
+    return feeds.task_feed_etag(request.user, *feeds.feed_params(request))
+
+
+def _task_feed_last_modified(request):
+    return feeds.task_feed_last_modified(request.user)
+
+
+@login_required
+@role_required(['manager'])
+@condition(etag_func=_task_feed_etag, last_modified_func=_task_feed_last_modified)
+def manager_task_feed(request):
+    since, size = feeds.feed_params(request)
+    try:
+        page = feeds.task_feed(request.user, since, size)
+    except feeds.InvalidCursor:
+        return HttpResponseBadRequest("Invalid since cursor.")
+    response = JsonResponse({
+        'items': [
+            {
+                'id': report.id,
+                'team': {'id': report.team_id, 'name': report.team.name},
+                'title': report.title,
+                'description': report.description,
+                'created_at': report.created_at,
+            }
+            for report in page.items
+        ],
+        'cursor': page.cursor,
+        'has_more': page.has_more,
+    })
+    # Let clients cache the feed but revalidate every poll.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 @login_required
 def head_manager_dashboard(request):
     if request.user.role != 'head_manager':
         return redirect('unauthorized')
 
-    total_teams = Team.objects.filter(head_manager=request.user).count()
-    total_managers = User.objects.filter(role='manager', assigned_teams__head_manager=request.user).count()
-    total_reports = sum(team.reports.count() for team in Team.objects.filter(head_manager=request.user))
-
-    context = {
-        'total_teams': total_teams,
-        'total_managers': total_managers,
-        'total_reports': total_reports,
-    }
+    context = cached_dashboard_metrics(request.user)
     return render(request, 'head_manager/dashboard.html', context)
 
 
@@ -170,8 +210,8 @@ def assign_manager(request):
         manager_ids = request.POST.getlist('managers')
 
         team = get_object_or_404(Team, id=team_id, head_manager=request.user)
-        selected_managers = User.objects.filter(id__in=manager_ids, role='manager')
-        team.managers.set(selected_managers)
+        selected_managers = User.objects.filter(id__in=manager_ids, role='manager').values_list('id', flat=True)
+        set_team_users(team, 'managers', selected_managers)
 
         messages.success(request, f"Managers assigned to team '{team.name}' successfully!")
         return redirect('manage_teams')  # redirect to a view that lists all teams
@@ -194,16 +234,7 @@ def sales_dashboard(request):
     if request.user.role != 'sales':
         return redirect('unauthorized')
 
-    # Example metrics
-    total_leads = Lead.objects.filter(assigned_to=request.user).count()
-    open_leads = Lead.objects.filter(assigned_to=request.user, status='Open').count()
-    closed_leads = Lead.objects.filter(assigned_to=request.user, status='Closed').count()
-
-    context = {
-        'total_leads': total_leads,
-        'open_leads': open_leads,
-        'closed_leads': closed_leads,
-    }
+    context = cached_dashboard_metrics(request.user)
     return render(request, 'sales/dashboard.html', context)
 
 
@@ -212,8 +243,21 @@ def sales_leads(request):
     if request.user.role != 'sales':
         return redirect('unauthorized')
 
-    leads = Lead.objects.filter(assigned_to=request.user).order_by('-created_at')
-    return render(request, 'sales/leads.html', {'leads': leads})
+    page = paginate_keyset(request, Lead.objects.filter(assigned_to=request.user))
+    return render(request, 'sales/leads.html', {'leads': page.object_list, 'page': page})
+
+@login_required
+def search_leads(request):
+    if request.user.role not in ['sales', 'head_sales']:
+        return redirect('unauthorized')
+
+    from .search import search_leads as ranked_search
+    query = request.GET.get('q', '')
+    leads = Lead.objects.all()
+    if request.user.role == 'sales':
+        leads = leads.filter(assigned_to=request.user)
+    results = ranked_search(query, leads)
+    return render(request, 'sales/leads.html', {'leads': results, 'query': query})
 
 @login_required
 def add_lead(request):
@@ -242,7 +286,7 @@ def add_lead(request):
 def update_lead(request, lead_id):
     lead = get_object_or_404(Lead, id=lead_id)
 
-    if request.user.role != 'sales' or lead.assigned_to != request.user:
+    if request.user.role != 'sales' or lead.assigned_to_id != request.user.id:
         return redirect('unauthorized')
 
     if request.method == 'POST':
@@ -268,8 +312,8 @@ def sales_leads_list(request):
     if request.user.role != 'sales':
         return redirect('unauthorized')
 
-    leads = Lead.objects.filter(assigned_to=request.user)
-    context = {'leads': leads}
+    page = paginate_keyset(request, Lead.objects.filter(assigned_to=request.user))
+    context = {'leads': page.object_list, 'page': page}
     return render(request, 'sales/leads_list.html', context)
 
 
@@ -278,6 +322,80 @@ def sales_leads_list(request):
 def head_sales_dashboard(request):
     return render(request, 'head_sales/dashboard.html')
 
+@login_required
+@role_required(['head_sales'])
+def assign_leads(request):
+    from django.db.models import Count, Q
+    from .assignment import MODES, assign_leads as run_assignment, sales_users
+
+    if request.method == 'POST':
+        mode = request.POST.get('mode')
+        if mode not in MODES:
+            return HttpResponseBadRequest("Unknown assignment mode.")
+        result = run_assignment(mode)
+        messages.success(request, f"Assigned {result.total} lead(s) to {len(result.assigned)} sales user(s).")
+        return redirect('assign_leads')
+
+    open_leads = Q(lead__status__in=Lead.OPEN_STATUSES)
+    return render(request, 'head_sales/assign_leads.html', {
+        'modes': MODES,
+        'unassigned': Lead.objects.filter(assigned_to__isnull=True).count(),
+        'sales_users': sales_users().annotate(open_leads=Count('lead', filter=open_leads)),
+    })
+
+
+@login_required
+@role_required(['head_sales'])
+def import_leads(request):
+    from .assignment import MODES
+    from .imports import ON_DUPLICATE, detect_format, import_leads as run_import, iter_rows
+
+    context = {'modes': MODES, 'on_duplicate_choices': ON_DUPLICATE, 'report': None}
+    if request.method != 'POST':
+        return render(request, 'head_sales/import_leads.html', context)
+
+    # API clients send {"leads": [...], "on_duplicate": "merge"|"skip", "assign": mode} (or just the list);
+    # the page uploads a CSV, JSON or JSON Lines file.
+    wants_json = request.content_type == 'application/json'
+    if wants_json:
+        try:
+            body = json.loads(request.body)
+            if isinstance(body, list):
+                body = {'leads': body}
+            rows, options = body['leads'], {name: body.get(name) for name in ('on_duplicate', 'assign')}
+            if not isinstance(rows, list):
+                raise TypeError
+        except (KeyError, TypeError, ValueError):
+            return JsonResponse({'error': "Expected {\"leads\": [...]} or a list of leads."}, status=400)
+    elif request.FILES.get('file'):
+        upload = request.FILES['file']
+        rows = iter_rows(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''), detect_format(upload.name))
+        options = {name: request.POST.get(name) for name in ('on_duplicate', 'assign')}
+    else:
+        return HttpResponseBadRequest("No file uploaded.")
+
+    options = {'on_duplicate': options['on_duplicate'] or 'merge', 'assign': options['assign'] or None}
+    if options['on_duplicate'] not in ON_DUPLICATE or options['assign'] not in (None, *MODES):
+        if wants_json:
+            return JsonResponse({'error': "Unknown on_duplicate or assign option."}, status=400)
+        return HttpResponseBadRequest("Unknown on_duplicate or assign option.")
+
+    try:
+        report = run_import(rows, **options)
+    except (csv.Error, UnicodeDecodeError, ValueError) as exc:
+        if wants_json:
+            return JsonResponse({'error': str(exc)}, status=400)
+        return HttpResponseBadRequest(f"Could not read the file: {exc}")
+    if wants_json:
+        return JsonResponse(report.as_dict())
+    messages.success(
+        request,
+        f"Imported {report.rows} lead(s): {report.inserted} inserted, {report.merged} merged, "
+        f"{report.skipped} skipped, {report.rejected} rejected.",
+    )
+    context['report'] = report
+    return render(request, 'head_sales/import_leads.html', context)
+
 @login_required
 @role_required(['support'])
 def support_dashboard(request):
@@ -318,14 +436,37 @@ def customer_dashboard(request):
 def head_customer_dashboard(request):
     return render(request, 'head_customer/dashboard.html')
 
+@login_required
+@role_required(['admin'])
+def dashboard_cache_stats(request):
+    return JsonResponse(cache_stats())
+
+@login_required
+@role_required(['admin'])
+def perf_dashboard(request):
+    return render(request, 'admin/perf.html', {
+        'routes': profiling.route_summaries(),
+        'window_minutes': settings.ERP_PERF_WINDOWS * settings.ERP_PERF_WINDOW_SECONDS / 60,
+        'cache_stats': sorted(cache_stats().items()),
+    })
+
+def perf_metrics(request):
+    # Scrapers authenticate with the bearer token; admins can also open it in the browser.
+    token = settings.ERP_PERF_METRICS_TOKEN
+    has_token = bool(token) and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    is_admin = request.user.is_authenticated and request.user.role == 'admin'
+    if not (has_token or is_admin):
+        return HttpResponseForbidden()
+    return HttpResponse(profiling.prometheus_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # --------------------------------
 # Admin: User Management
 # --------------------------------
 @login_required
 @role_required(['admin'])
 def manage_users(request):
-    users = User.objects.all()
-    return render(request, 'admin/manage_users.html', {'users': users})
+    page = paginate_keyset(request, User.objects.select_related('employee'), ordering=('id',))
+    return render(request, 'admin/manage_users.html', {'users': page.object_list, 'page': page})
 
 @login_required
 @role_required(['admin'])
@@ -422,16 +563,13 @@ def profile(request):
 @login_required
 @role_required(['admin'])
 def admin_reports(request):
-    from .models import Employee, Payroll
-    # Example: total employees and payroll summary
-    total_employees = Employee.objects.count()
-    total_payrolls = Payroll.objects.count()
-    total_salary = sum([p.net_salary for p in Payroll.objects.all()])
-    context = {
-        'total_employees': total_employees,
-        'total_payrolls': total_payrolls,
-        'total_salary': total_salary
-    }
+    from .reports import payroll_summary, period_params
+    try:
+        start, end = period_params(request.GET)
+    except ValueError:
+        return HttpResponseBadRequest("Periods must look like 2025-07.")
+    # Totals and per-year/per-month breakdowns, aggregated in the database
+    context = payroll_summary(start, end)
     return render(request, 'admin/reports.html', context)
 
 
@@ -440,9 +578,18 @@ def admin_reports(request):
 @role_required(['hr'])
 def hr_reports(request):
     from .models import Employee, Payroll
-    employees = Employee.objects.all()
-    payrolls = Payroll.objects.all()
-    context = {'employees': employees, 'payrolls': payrolls}
+    employee_page = paginate_keyset(
+        request, Employee.objects.select_related('user'), ordering=('id',), prefix='employees_'
+    )
+    payroll_page = paginate_keyset(
+        request, Payroll.objects.select_related('employee__user'), prefix='payrolls_'
+    )
+    context = {
+        'employees': employee_page.object_list,
+        'employee_page': employee_page,
+        'payrolls': payroll_page.object_list,
+        'payroll_page': payroll_page,
+    }
     return render(request, 'hr/reports.html', context)
 
 
@@ -451,11 +598,11 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 
 @login_required
+@role_required(['hr', 'head_hr'])
+@conditional_page(EMPLOYEE_LIST_SCOPES, updated_rows=all_employees)
 def manage_employees(request):
-    if request.user.role not in ['hr', 'head_hr']:
-        return redirect('unauthorized')
-    employees = Employee.objects.all()
-    return render(request, 'hr/employee_list.html', {'employees': employees})
+    page = paginate_keyset(request, Employee.objects.select_related('user'), ordering=('id',))
+    return render(request, 'hr/employee_list.html', {'employees': page.object_list, 'page': page})
 
 
 @login_required
@@ -494,6 +641,45 @@ def add_employee(request):
 
 
 
+@login_required
+def export_employees(request):
+    if request.user.role not in ['hr', 'head_hr']:
+        return redirect('unauthorized')
+
+    from .exports import employee_export
+    try:
+        return employee_export(fmt=request.GET.get('format', 'csv'))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+
+@login_required
+def import_employees(request):
+    if request.user.role not in ['hr', 'head_hr']:
+        return redirect('unauthorized')
+
+    report, status = None, 200
+    if request.method == 'POST' and request.FILES.get('file'):
+        from django.core.exceptions import ValidationError
+        from .imports import ImportReport, detect_format, import_employees as run_import, iter_rows
+        upload = request.FILES['file']
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        batches = []
+        try:
+            report = run_import(iter_rows(stream, detect_format(upload.name)), on_batch=batches.append)
+            messages.success(request, f"Imported {report.created} of {report.rows} employees.")
+        except (csv.Error, UnicodeDecodeError, ValueError, ValidationError) as exc:
+            # json.JSONDecodeError is a ValueError. Batches before the bad row are already saved.
+            report, status = ImportReport(batches), 400
+            messages.error(
+                request,
+                f"Could not read the file after row {report.rows}: {exc}. "
+                f"{report.created} employee(s) from earlier rows were imported.",
+            )
+
+    return render(request, 'hr/employee_import.html', {'report': report}, status=status)
+
+
 @login_required
 def edit_employee(request, employee_id):
     if request.user.role not in ['hr', 'head_hr']:
@@ -532,11 +718,17 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 
 @login_required
+@role_required(['hr', 'head_hr', 'account', 'head_account'])
+@conditional_page(PAYROLL_LIST_SCOPES, updated_rows=all_payrolls)
 def manage_payrolls(request):
-    if request.user.role not in ['hr', 'head_hr', 'account', 'head_account']:
-        return redirect('unauthorized')
-    payrolls = Payroll.objects.all()
-    return render(request, 'hr/payroll_list.html', {'payrolls': payrolls})
+    from .reports import payrolls_for_listing, period_params
+    try:
+        start, end = period_params(request.GET)
+    except ValueError:
+        return HttpResponseBadRequest("Periods must look like 2025-07.")
+    payrolls, ordering = payrolls_for_listing(start, end)
+    page = paginate_keyset(request, payrolls, ordering=ordering)
+    return render(request, 'hr/payroll_list.html', {'payrolls': page.object_list, 'page': page})
 
 @login_required
 def add_payroll(request):
@@ -545,16 +737,107 @@ def add_payroll(request):
 
     if request.method == 'POST':
         employee_id = request.POST.get('employee')
-        month = request.POST.get('month')
+        month = Payroll.month_name(request.POST.get('month'))
         year = request.POST.get('year')
         employee = get_object_or_404(Employee, id=employee_id)
 
-        Payroll.objects.create(employee=employee, month=month, year=year)
+        # One payroll per employee and period: re-adding a month recalculates it.
+        Payroll.objects.update_or_create(employee=employee, month=month, year=year)
         return redirect('manage_payrolls')
 
-    employees = Employee.objects.all()
+    employees = Employee.objects.select_related('user')
     return render(request, 'hr/payroll_form.html', {'employees': employees})
 
+@login_required
+def run_payroll(request):
+    if request.user.role not in ['hr', 'head_hr', 'account', 'head_account']:
+        return redirect('unauthorized')
+
+    form = PayrollRunForm(request.POST or None)
+    if request.method == 'POST':
+        if not form.is_valid():
+            return render(request, 'hr/payroll_run.html', {'form': form}, status=400)
+        from .payroll import run_payroll as run_payroll_for_month
+        result = run_payroll_for_month(form.cleaned_data['month'], form.cleaned_data['year'])
+        messages.success(
+            request,
+            f"Payroll for {result.month} {result.year}: {result.created} created, "
+            f"{result.updated} updated ({result.rows_per_second:.0f} rows/s)."
+        )
+        return redirect('manage_payrolls')
+
+    return render(request, 'hr/payroll_run.html', {'form': form})
+
+@login_required
+def simulate_payroll_rules(request):
+    if request.user.role not in ['hr', 'head_hr', 'account', 'head_account']:
+        return redirect('unauthorized')
+
+    from .models import PayrollRule
+    from .rules import PayrollRules, simulate
+    rules = list(PayrollRule.objects.order_by('department', 'designation'))
+    context = {'rules': rules, 'form': PayrollRuleChangeForm()}
+    if request.method != 'POST':
+        return render(request, 'hr/payroll_simulate.html', context)
+
+    # JSON clients send {"rules": [{department, designation, *_rate}], "removed": [{department, designation}]};
+    # the page posts a single change.
+    wants_json = request.content_type == 'application/json'
+    if wants_json:
+        try:
+            body = json.loads(request.body)
+            changes = [dict(change) for change in body.get('rules', [])]
+            changes += [dict(change, remove=True) for change in body.get('removed', [])]
+        except (AttributeError, TypeError, ValueError):
+            return JsonResponse({'error': "Expected {\"rules\": [...], \"removed\": [...]}."}, status=400)
+    else:
+        changes = [request.POST]
+
+    proposals = [PayrollRuleChangeForm(change) for change in changes]
+    errors = [form.errors for form in proposals if not form.is_valid()]
+    if errors:
+        if wants_json:
+            return JsonResponse({'errors': errors}, status=400)
+        context['form'] = proposals[0]
+        return render(request, 'hr/payroll_simulate.html', context, status=400)
+
+    result = simulate(
+        rules=[form.rule() for form in proposals if not form.cleaned_data['remove']],
+        removed=[form.scope for form in proposals if form.cleaned_data['remove']],
+        current=PayrollRules.compile(rules),
+    )
+    if wants_json:
+        return JsonResponse(result)
+    context.update(form=proposals[0], result=result)
+    return render(request, 'hr/payroll_simulate.html', context)
+
+@login_required
+def export_payrolls(request):
+    if request.user.role not in ['hr', 'head_hr', 'account', 'head_account']:
+        return redirect('unauthorized')
+
+    from .exports import payroll_export
+    from .reports import parse_year, period_params
+    try:
+        year = parse_year(request.GET.get('year'))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+    try:
+        start, end = period_params(request.GET)
+    except ValueError:
+        return HttpResponseBadRequest("Periods must look like 2025-07.")
+    try:
+        return payroll_export(
+            year=year,
+            month=request.GET.get('month'),
+            department=request.GET.get('department'),
+            start=start,
+            end=end,
+            fmt=request.GET.get('format', 'csv'),
+        )
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
 @login_required
 def edit_payroll(request, payroll_id):
     payroll = get_object_or_404(Payroll, id=payroll_id)
@@ -562,14 +845,19 @@ def edit_payroll(request, payroll_id):
         return redirect('unauthorized')
 
     if request.method == 'POST':
-        month = request.POST.get('month')
+        month = Payroll.month_name(request.POST.get('month'))
         year = request.POST.get('year')
-        payroll.month = month
-        payroll.year = year
-        payroll.save()
-        return redirect('manage_payrolls')
-
-    employees = Employee.objects.all()
+        duplicate = Payroll.objects.filter(
+            employee=payroll.employee, month=month, year=year
+        ).exclude(id=payroll.id).exists()
+        if not duplicate:
+            payroll.month = month
+            payroll.year = year
+            payroll.save()
+            return redirect('manage_payrolls')
+        messages.error(request, f"A payroll for {month} {year} already exists for this employee.")
+
+    employees = Employee.objects.select_related('user')
     return render(request, 'hr/payroll_form.html', {'payroll': payroll, 'employees': employees})
 
 @login_required
@@ -602,7 +890,8 @@ def create_team(request):
 
         team = Team.objects.create(name=team_name, head_manager=request.user)
         if selected_employee_ids:
-            team.members.set(User.objects.filter(id__in=selected_employee_ids))
+            selected_employees = User.objects.filter(id__in=selected_employee_ids).values_list('id', flat=True)
+            set_team_users(team, 'members', selected_employees)
 
         messages.success(request, f"Team '{team_name}' created successfully!")
         return redirect('head_manager_dashboard')
@@ -613,10 +902,9 @@ def create_team(request):
 
 
 @login_required
+@role_required(['head_manager'])
+@conditional_page()
 def manage_teams(request):
-    if request.user.role != 'head_manager':
-        return redirect('unauthorized')
-
     # Get all teams of this head manager
     teams = Team.objects.filter(head_manager=request.user).prefetch_related('managers')
 
@@ -637,8 +925,8 @@ def edit_team(request, team_id):
     if request.method == 'POST':
         team.name = request.POST.get('team_name')
         manager_ids = request.POST.getlist('managers')
-        selected_managers = User.objects.filter(id__in=manager_ids, role='manager')
-        team.managers.set(selected_managers)
+        selected_managers = User.objects.filter(id__in=manager_ids, role='manager').values_list('id', flat=True)
+        set_team_users(team, 'managers', selected_managers)
         team.save()
         return redirect('manage_teams')
 
@@ -668,7 +956,7 @@ def edit_team(request, team_id):
     if request.method == 'POST':
         team.name = request.POST.get('team_name')
         selected_members = request.POST.getlist('members')
-        team.members.set(User.objects.filter(id__in=selected_members))
+        set_team_users(team, 'members', User.objects.filter(id__in=selected_members).values_list('id', flat=True))
         team.save()
         messages.success(request, f"Team '{team.name}' updated successfully!")
         return redirect('manage_teams')
@@ -677,6 +965,30 @@ def edit_team(request, team_id):
     return render(request, 'head_manager/edit_team.html', context)
 
 
+@login_required
+def move_team_members(request):
+    if request.user.role != 'head_manager':
+        return redirect('unauthorized')
+
+    teams = Team.objects.filter(head_manager=request.user).prefetch_related('members')
+
+    if request.method == 'POST':
+        source = get_object_or_404(Team, id=request.POST.get('source'), head_manager=request.user)
+        target = get_object_or_404(Team, id=request.POST.get('target'), head_manager=request.user)
+        # Only people under this head manager in the source team (one closure-table lookup)
+        member_ids = descendants(request.user, depth=2, team=source).filter(
+            id__in=request.POST.getlist('members')
+        ).values_list('id', flat=True)
+        change = move_members(member_ids, source, target)
+        messages.success(
+            request,
+            f"Moved {len(change.removed.get(source.pk, ()))} member(s) from '{source.name}' to '{target.name}'."
+        )
+        return redirect('manage_teams')
+
+    return render(request, 'head_manager/move_members.html', {'teams': teams})
+
+
 @login_required
 def delete_team(request, team_id):
     if request.user.role != 'head_manager':
@@ -694,12 +1006,11 @@ from .models import Lead
 
 
 @login_required
+@role_required(['sales'])
+@conditional_page(updated_rows=own_leads)
 def sales_leads(request):
-    if request.user.role != 'sales':
-        return redirect('unauthorized')
-
     # Example: fetch leads assigned to this sales user
-    leads = Lead.objects.filter(assigned_to=request.user).order_by('-created_at')
+    page = paginate_keyset(request, Lead.objects.filter(assigned_to=request.user))
 
-    context = {'leads': leads}
+    context = {'leads': page.object_list, 'page': page}
     return render(request, 'sales/leads.html', context)